@@ -2,14 +2,49 @@ __version__ = "1.0.0"
 __license__ = "MIT"
 
 from .linea_de_eventos import LineaDeEventos
-from .eventos import TipoEvento, Evento
+from .eventos import TipoEvento, Evento, EventoRecurrente
+from .colas import MotorCola
+from .historial_eventos import HistorialEventos
+from .historial_columnar import HistorialColumnar
+from .demanda import DemandaVectorizada
+from .registro_binario import RegistroBinario, LectorRegistro
+from .retencion import PoliticaRetencion
+from .metricas import Metricas
+from .replicaciones import Replicaciones
+from .concurrencia import agrupar_sin_conflictos
+from .particionado import SimulacionParticionada
+from .exportacion import FormatoExportacion, ExportadorHistorial
+from .instantaneas import Instantaneas
+from .topologia import Topologia
+from .asincrono import EjecucionAsincrona, PoliticaDesborde, Suscripcion
+from .coalescencia import MomentoCoalescencia
 
 # Define public API
 __all__ = [
     # Core classes
     "TipoEvento",
     "Evento",
+    "EventoRecurrente",
     "LineaDeEventos",
+    "MotorCola",
+    "HistorialEventos",
+    "HistorialColumnar",
+    "DemandaVectorizada",
+    "RegistroBinario",
+    "LectorRegistro",
+    "PoliticaRetencion",
+    "FormatoExportacion",
+    "ExportadorHistorial",
+    "Metricas",
+    "Replicaciones",
+    "agrupar_sin_conflictos",
+    "SimulacionParticionada",
+    "Instantaneas",
+    "Topologia",
+    "EjecucionAsincrona",
+    "PoliticaDesborde",
+    "Suscripcion",
+    "MomentoCoalescencia",
     # Metadata
     "__version__",
 ]
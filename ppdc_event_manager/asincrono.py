@@ -0,0 +1,348 @@
+import asyncio
+import datetime as dt
+import time
+from collections import deque
+from enum import Enum
+from typing import Callable, Hashable, Iterable, Optional
+
+from ppdc_event_manager.eventos import TipoEvento, Evento
+from ppdc_event_manager.linea_de_eventos import EstadisticasEjecucion, LineaDeEventos
+
+
+class PoliticaDesborde(Enum):
+    """Qué hacer cuando la cola de una [Suscripcion] está llena y llega un nuevo lote."""
+
+    # El motor espera a que el suscriptor libere espacio (contrapresión).
+    BLOQUEAR = "bloquear"
+    # Se descarta el lote pendiente más antiguo, para entregar siempre lo más reciente.
+    DESCARTAR = "descartar"
+    # El nuevo lote se une al lote pendiente más reciente (ver [Suscripcion.clave]).
+    COALESCER = "coalescer"
+
+
+class Suscripcion:
+    """Cola acotada de lotes de eventos consumidos, para un suscriptor asíncrono.
+    Se crea con [EjecucionAsincrona.suscribir], y se recorre con `async for lote in ...`.
+    """
+
+    def __init__(
+        self,
+        tipos: Optional[Iterable[TipoEvento]] = None,
+        capacidad: int = 64,
+        politica: PoliticaDesborde = PoliticaDesborde.BLOQUEAR,
+        clave: Optional[Callable[[Evento], Hashable]] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        tipos: Optional[Iterable[TipoEvento]] = None
+            Tipos de evento que recibe. Por defecto, todos.
+        capacidad: int = 64
+            Cantidad máxima de lotes pendientes.
+        clave: Optional[Callable[[Evento], Hashable]] = None
+            Con [PoliticaDesborde.COALESCER], al unir dos lotes se conserva sólo el último
+            evento de cada clave (por ejemplo, la última llegada de cada tren).
+        """
+        if capacidad < 1:
+            raise Exception("[Error] La capacidad de una suscripción debe ser al menos 1.")
+        self.tipos: Optional[frozenset[TipoEvento]] = (
+            frozenset(tipos) if tipos is not None else None
+        )
+        self.capacidad: int = capacidad
+        self.politica: PoliticaDesborde = politica
+        self.clave: Optional[Callable[[Evento], Hashable]] = clave
+
+        self.__lotes: deque[list[Evento]] = deque()
+        self.__condicion = asyncio.Condition()
+        self.cerrada: bool = False
+        # Eventos descartados ([PoliticaDesborde.DESCARTAR]), o reemplazados por otro de su
+        # misma clave ([PoliticaDesborde.COALESCER]).
+        self.descartados: int = 0
+
+    def __len__(self) -> int:
+        return len(self.__lotes)
+
+    def filtrar(self, eventos: list[Evento]) -> list[Evento]:
+        if self.tipos is None:
+            return eventos
+        return [e for e in eventos if e.tipo in self.tipos]
+
+    async def publicar(
+        self, eventos: list[Evento], detener: Optional[asyncio.Event] = None
+    ) -> None:
+        """Agrega un lote (ya filtrado) a la cola, según [self.politica] si está llena.
+
+        Parameters
+        ----------
+        detener: Optional[asyncio.Event] = None
+            Con [PoliticaDesborde.BLOQUEAR], si se activa mientras se espera espacio en la
+            cola, se deja de esperar y el lote no se publica.
+        """
+        async with self.__condicion:
+            if self.cerrada:
+                return
+            if len(self.__lotes) >= self.capacidad:
+                if self.politica is PoliticaDesborde.BLOQUEAR:
+                    while len(self.__lotes) >= self.capacidad and not self.cerrada:
+                        if detener is None:
+                            await self.__condicion.wait()
+                        elif not await self.__esperar_espacio(detener):
+                            return
+                    if self.cerrada:
+                        return
+                elif self.politica is PoliticaDesborde.DESCARTAR:
+                    self.descartados += len(self.__lotes.popleft())
+                else:
+                    self.__lotes[-1] = self.__coalescer(self.__lotes[-1], eventos)
+                    self.__condicion.notify_all()
+                    return
+            self.__lotes.append(eventos)
+            self.__condicion.notify_all()
+
+    async def __esperar_espacio(self, detener: asyncio.Event) -> bool:
+        """Espera un aviso de [self.__condicion] o que se active [detener], lo que ocurra
+        primero. Al volver, se tiene nuevamente el candado de la condición.
+
+        Returns
+        -------
+        Entrega False si se activó [detener].
+        """
+        if detener.is_set():
+            return False
+        aviso = asyncio.ensure_future(self.__condicion.wait())
+        parada = asyncio.ensure_future(detener.wait())
+        try:
+            await asyncio.wait([aviso, parada], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            aviso.cancel()
+            parada.cancel()
+            # Al cancelarse, [Condition.wait] vuelve a tomar el candado antes de terminar.
+            await asyncio.wait([aviso])
+        return not detener.is_set()
+
+    def __coalescer(self, previo: list[Evento], nuevo: list[Evento]) -> list[Evento]:
+        if self.clave is None:
+            return previo + nuevo
+        ultimos: dict[Hashable, Evento] = dict()
+        for evento in previo + nuevo:
+            # Al reasignar la clave, el evento queda en la posición de su última aparición.
+            clave = self.clave(evento)
+            ultimos.pop(clave, None)
+            ultimos[clave] = evento
+        self.descartados += len(previo) + len(nuevo) - len(ultimos)
+        return list(ultimos.values())
+
+    async def obtener(self) -> Optional[list[Evento]]:
+        """Espera el próximo lote.
+
+        Returns
+        -------
+        Entrega None si la suscripción se cerró y no quedan lotes pendientes.
+        """
+        async with self.__condicion:
+            await self.__condicion.wait_for(lambda: self.__lotes or self.cerrada)
+            if not self.__lotes:
+                return None
+            lote = self.__lotes.popleft()
+            self.__condicion.notify_all()
+            return lote
+
+    async def cerrar(self) -> None:
+        """Deja de recibir lotes. Los pendientes aún se pueden obtener."""
+        async with self.__condicion:
+            self.cerrada = True
+            self.__condicion.notify_all()
+
+    def __aiter__(self) -> "Suscripcion":
+        return self
+
+    async def __anext__(self) -> list[Evento]:
+        lote = await self.obtener()
+        if lote is None:
+            raise StopAsyncIteration
+        return lote
+
+
+class EjecucionAsincrona:
+    """Ejecuta una [LineaDeEventos] dentro de un bucle de [asyncio], publicando los eventos
+    consumidos a suscriptores asíncronos (ver [self.suscribir]), sin que un suscriptor lento
+    detenga al resto del programa.
+
+    Con [velocidad], la simulación avanza al ritmo del reloj real: cada segundo real
+    corresponde con [velocidad] segundos simulados. Sin ella, avanza lo más rápido posible,
+    cediendo el control al bucle después de cada lote.
+
+    Ejemplo:
+        ejecucion = EjecucionAsincrona(linea, velocidad=60)  # un minuto simulado por segundo
+        llegadas = ejecucion.suscribir([TipoEvento.TREN_LLEGADA], capacidad=10)
+
+        async def panel():
+            async for lote in llegadas:
+                mostrar(lote)
+
+        async def main():
+            await asyncio.gather(ejecucion.ejecutar(hasta=fecha_final), panel())
+    """
+
+    def __init__(self, linea: LineaDeEventos, velocidad: Optional[float] = None) -> None:
+        """
+        Parameters
+        ----------
+        velocidad: Optional[float] = None
+            Segundos simulados por cada segundo real. Con None, lo más rápido posible.
+        """
+        if velocidad is not None and velocidad <= 0:
+            raise Exception("[Error] La velocidad de la simulación debe ser positiva.")
+        self.linea: LineaDeEventos = linea
+        self.velocidad: Optional[float] = velocidad
+        self.suscripciones: list[Suscripcion] = []
+
+        self.__detener: Optional[asyncio.Event] = None
+        # Se activa al cambiar la velocidad, para recalcular la espera en curso.
+        self.__cambio_velocidad: Optional[asyncio.Event] = None
+        # Referencia del ritmo: fecha simulada que corresponde con [__reloj_base].
+        self.__fecha_base: dt.datetime = linea.fecha_actual
+        self.__reloj_base: float = time.monotonic()
+
+    def suscribir(
+        self,
+        tipos: Optional[Iterable[TipoEvento]] = None,
+        capacidad: int = 64,
+        politica: PoliticaDesborde = PoliticaDesborde.BLOQUEAR,
+        clave: Optional[Callable[[Evento], Hashable]] = None,
+    ) -> Suscripcion:
+        """Crea una suscripción a los eventos consumidos de los [tipos] indicados (por
+        defecto, todos). El filtro se aplica antes de publicar, por lo que la suscripción no
+        recibe lotes sin eventos de sus tipos. Ver [Suscripcion]."""
+        suscripcion = Suscripcion(tipos, capacidad, politica, clave)
+        self.suscripciones.append(suscripcion)
+        return suscripcion
+
+    def desuscribir(self, suscripcion: Suscripcion) -> None:
+        self.suscripciones.remove(suscripcion)
+
+    @property
+    def fecha_simulada(self) -> dt.datetime:
+        """Fecha simulada que corresponde con este instante, según [self.velocidad]. Sin
+        velocidad, o fuera de [self.ejecutar], es la fecha del último lote."""
+        if self.velocidad is None or self.__detener is None:
+            return self.linea.fecha_actual
+        transcurrido = (time.monotonic() - self.__reloj_base) * self.velocidad
+        return self.__fecha_base + dt.timedelta(seconds=transcurrido)
+
+    def ajustar_velocidad(self, velocidad: Optional[float]) -> None:
+        """Cambia la velocidad, incluso durante la ejecución, desde la fecha simulada actual."""
+        if velocidad is not None and velocidad <= 0:
+            raise Exception("[Error] La velocidad de la simulación debe ser positiva.")
+        self.__fecha_base = max(self.fecha_simulada, self.linea.fecha_actual)
+        self.__reloj_base = time.monotonic()
+        self.velocidad = velocidad
+        if self.__cambio_velocidad is not None:
+            self.__cambio_velocidad.set()
+
+    def detener(self) -> None:
+        """Detiene [self.ejecutar] después del lote en curso. Si está esperando espacio en
+        una suscripción llena ([PoliticaDesborde.BLOQUEAR]), deja de esperar sin publicar."""
+        if self.__detener is not None:
+            self.__detener.set()
+
+    async def __esperar_hasta(
+        self, fecha: dt.datetime, detener: asyncio.Event, cambio_velocidad: asyncio.Event
+    ) -> bool:
+        """Espera a que el reloj real alcance [fecha], según [self.velocidad]. Si la velocidad
+        cambia durante la espera (ver [self.ajustar_velocidad]), se recalcula lo que falta.
+
+        Returns
+        -------
+        Entrega False si se pidió detener la ejecución durante la espera.
+        """
+        while not detener.is_set():
+            cambio_velocidad.clear()
+            if self.velocidad is None:
+                # Sin ritmo, sólo se cede el control a las otras tareas.
+                await asyncio.sleep(0)
+                break
+            espera = (fecha - self.__fecha_base).total_seconds() / self.velocidad - (
+                time.monotonic() - self.__reloj_base
+            )
+            if espera <= 0:
+                await asyncio.sleep(0)
+                break
+            esperas = [
+                asyncio.ensure_future(detener.wait()),
+                asyncio.ensure_future(cambio_velocidad.wait()),
+            ]
+            try:
+                await asyncio.wait(
+                    esperas, timeout=espera, return_when=asyncio.FIRST_COMPLETED
+                )
+            finally:
+                for tarea in esperas:
+                    tarea.cancel()
+            if not cambio_velocidad.is_set():
+                # Se alcanzó la fecha, o se pidió detener la ejecución.
+                break
+        return not detener.is_set()
+
+    async def ejecutar(
+        self,
+        hasta: Optional[dt.datetime] = None,
+        max_eventos: Optional[int] = None,
+        historial: bool = True,
+        cerrar_suscripciones: bool = True,
+    ) -> EstadisticasEjecucion:
+        """Ejecuta lotes de eventos, como [LineaDeEventos.ejecutar], hasta que la cola quede
+        vacía, se ejecuten al menos [max_eventos] eventos, el próximo evento ocurra después de
+        [hasta], o se llame a [self.detener]. Cada lote se publica a las suscripciones
+        después de ejecutarlo.
+
+        Con [hasta] y [velocidad], al terminar los eventos se espera hasta que el reloj alcance
+        [hasta], y [LineaDeEventos.fecha_actual] queda en [hasta] (como en
+        [LineaDeEventos.avanzar_hasta]).
+
+        Parameters
+        ----------
+        cerrar_suscripciones: bool = True
+            Si es True, al terminar se cierran las suscripciones, lo que termina los
+            `async for` de los suscriptores después de sus lotes pendientes.
+        """
+        linea = self.linea
+        detener = self.__detener = asyncio.Event()
+        cambio_velocidad = self.__cambio_velocidad = asyncio.Event()
+        self.__fecha_base = linea.fecha_actual
+        self.__reloj_base = time.monotonic()
+        estadisticas = EstadisticasEjecucion(linea.fecha_actual)
+        inicio = time.perf_counter()
+
+        try:
+            while max_eventos is None or estadisticas.eventos < max_eventos:
+                fecha_proxima = linea.eventos.proxima_fecha()
+                if fecha_proxima is None or (hasta is not None and fecha_proxima > hasta):
+                    if hasta is not None and self.velocidad is not None:
+                        if not await self.__esperar_hasta(hasta, detener, cambio_velocidad):
+                            break
+                    if hasta is not None and hasta > linea.fecha_actual:
+                        linea.fecha_actual = hasta
+                    break
+                if not await self.__esperar_hasta(
+                    fecha_proxima, detener, cambio_velocidad
+                ):
+                    break
+
+                eventos = linea.ejecutar_proximo_lote(historial)
+                estadisticas.eventos += len(eventos)
+                estadisticas.lotes += 1
+                for suscripcion in self.suscripciones:
+                    filtrados = suscripcion.filtrar(eventos)
+                    if filtrados:
+                        await suscripcion.publicar(filtrados, detener)
+        finally:
+            self.__detener = None
+            self.__cambio_velocidad = None
+            if cerrar_suscripciones:
+                for suscripcion in self.suscripciones:
+                    await suscripcion.cerrar()
+
+        estadisticas.fecha_final = linea.fecha_actual
+        estadisticas.duracion = time.perf_counter() - inicio
+        return estadisticas
@@ -0,0 +1,72 @@
+from enum import Enum
+from typing import Callable, Hashable, Optional
+
+from ppdc_event_manager.eventos import TipoEvento, Evento
+
+# Entrega la clave de un evento: dos eventos pendientes del mismo tipo y clave se pueden
+# fusionar. Con None, el evento no se fusiona.
+ClaveCoalescencia = Callable[[Evento], Optional[Hashable]]
+# Fusiona dos eventos (el anterior y el nuevo) en uno solo, que puede ser alguno de ellos.
+# Si entrega None, los eventos no se pueden fusionar y se mantienen ambos.
+FusionarEventos = Callable[[Evento, Evento], Optional[Evento]]
+
+
+class MomentoCoalescencia(Enum):
+    """Cuándo se fusionan los eventos de un tipo (ver [LineaDeEventos.registrar_coalescencia])."""
+
+    # Al insertar un evento futuro, con el último evento pendiente de su misma clave.
+    INSERCION = "insercion"
+    # Al obtener un lote, entre los eventos del lote (que comparten fecha de ocurrencia).
+    EXTRACCION = "extraccion"
+
+
+class Coalescencia:
+    __slots__ = ("clave", "fusionar", "momento")
+
+    def __init__(
+        self,
+        clave: ClaveCoalescencia,
+        fusionar: FusionarEventos,
+        momento: MomentoCoalescencia,
+    ) -> None:
+        self.clave: ClaveCoalescencia = clave
+        self.fusionar: FusionarEventos = fusionar
+        self.momento: MomentoCoalescencia = momento
+
+
+def clave_estacion(evento: Evento) -> Optional[Hashable]:
+    return evento.obtener_dato("id_estacion")
+
+
+def clave_tren(evento: Evento) -> Optional[Hashable]:
+    return evento.obtener_dato("id_tren")
+
+
+def fusionar_ventanas_demanda(anterior: Evento, nuevo: Evento) -> Optional[Evento]:
+    """Une dos eventos GENERACION_DEMANDA cuyas ventanas (`fecha_previa` a `fecha_actual`)
+    son contiguas, en un solo evento que cubre ambas ventanas y ocurre al final de ellas.
+    El resto de los datos se toma del evento que queda al final."""
+    if anterior.obtener_dato("fecha_actual") == nuevo.obtener_dato("fecha_previa"):
+        primero, ultimo = anterior, nuevo
+    elif nuevo.obtener_dato("fecha_actual") == anterior.obtener_dato("fecha_previa"):
+        primero, ultimo = nuevo, anterior
+    else:
+        return None
+    if primero.obtener_dato("fecha_previa") is None:
+        return None
+    ultimo.datos["fecha_previa"] = primero.datos["fecha_previa"]
+    return ultimo
+
+
+def fusionar_llegada_reemplazada(anterior: Evento, nuevo: Evento) -> Optional[Evento]:
+    """Un tren sólo puede tener una próxima llegada: la agendada más recientemente reemplaza
+    a la anterior."""
+    return nuevo
+
+
+# Coalescencias utilizadas por [LineaDeEventos.registrar_coalescencia] cuando no se indican
+# la clave ni la función de fusión.
+COALESCENCIAS_POR_DEFECTO: dict[TipoEvento, tuple[ClaveCoalescencia, FusionarEventos]] = {
+    TipoEvento.GENERACION_DEMANDA: (clave_estacion, fusionar_ventanas_demanda),
+    TipoEvento.TREN_LLEGADA: (clave_tren, fusionar_llegada_reemplazada),
+}
@@ -0,0 +1,29 @@
+import datetime as dt
+
+from .motor_cola import MotorCola
+from .cola_eventos import ColaEventos
+from .cola_lista import ColaLista
+from .cola_heap import ColaHeap
+from .cola_calendario import ColaCalendario
+
+
+def crear_cola(motor: MotorCola, fecha_inicial: dt.datetime) -> ColaEventos:
+    """Crea una cola vacía para el [MotorCola] indicado.
+    [fecha_inicial] es el origen de las cubetas de [MotorCola.CALENDARIO]."""
+    if motor == MotorCola.LISTA:
+        return ColaLista()
+    if motor == MotorCola.HEAP:
+        return ColaHeap()
+    if motor == MotorCola.CALENDARIO:
+        return ColaCalendario(fecha_inicial)
+    raise Exception(f"[Error] Motor de cola desconocido: {motor}.")
+
+
+__all__ = [
+    "MotorCola",
+    "ColaEventos",
+    "ColaLista",
+    "ColaHeap",
+    "ColaCalendario",
+    "crear_cola",
+]
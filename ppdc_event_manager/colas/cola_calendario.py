@@ -0,0 +1,123 @@
+import datetime as dt
+import heapq
+from typing import Iterable, Iterator, Optional
+
+from ppdc_event_manager.eventos import Evento
+
+from .cola_eventos import ColaEventos
+
+_MICROSEGUNDO = dt.timedelta(microseconds=1)
+
+
+class ColaCalendario(ColaEventos):
+    """Cola de calendario: agrupa los eventos en cubetas según el minuto (contado desde
+    [fecha_base]) en que ocurren.
+
+    Está pensada para simulaciones donde los eventos caen en una grilla gruesa de tiempo (por
+    ejemplo, llegadas cada 60 minutos y demanda cada minuto):
+    - Insertar sólo agrega el evento al final de su cubeta: O(1). Sólo cuando aparece un minuto
+      nuevo se actualiza el heap de minutos, que tiene tantos elementos como minutos distintos.
+    - La cubeta más próxima se ordena una sola vez al llegar a ella, y luego sus eventos se
+      extraen desde el final de la lista: O(1) amortizado por evento.
+
+    Cada entrada es una lista `[microsegundos, prioridad, secuencia, evento]`, de manera que los
+    ordenamientos comparan enteros en vez de fechas.
+    """
+
+    def __init__(
+        self,
+        fecha_base: dt.datetime,
+        resolucion: dt.timedelta = dt.timedelta(minutes=1),
+    ) -> None:
+        super().__init__()
+        self.fecha_base: dt.datetime = fecha_base
+        self.resolucion: dt.timedelta = resolucion
+        self.__micros_resolucion: int = resolucion // _MICROSEGUNDO
+
+        # Cubetas por minuto. La cubeta más próxima se mantiene en orden descendente,
+        # para extraer sus eventos desde el final.
+        self.cubetas: dict[int, list[list]] = dict()
+        # Heap con los minutos que tienen cubeta.
+        self.minutos: list[int] = []
+        # Minutos cuyas cubetas deben ordenarse antes de extraer eventos.
+        self.__desordenadas: set[int] = set()
+        self._entrada_por_id: dict[int, list] = dict()
+
+    def __iter__(self) -> Iterator[Evento]:
+        for entrada in sorted(self._entrada_por_id.values()):
+            yield entrada[3]
+
+    def insertar(self, evento: Evento) -> None:
+        self._indexar(evento)
+        micros = (evento.ocurrencia - self.fecha_base) // _MICROSEGUNDO
+        entrada = [micros, evento.prioridad, self._secuencia, evento]
+        self._secuencia += 1
+        self._entrada_por_id[evento.id] = entrada
+
+        minuto = micros // self.__micros_resolucion
+        cubeta = self.cubetas.get(minuto)
+        if cubeta is None:
+            self.cubetas[minuto] = [entrada]
+            heapq.heappush(self.minutos, minuto)
+            return
+        # Agregar al final mantiene el orden descendente sólo si es la menor entrada.
+        if cubeta and entrada > cubeta[-1]:
+            self.__desordenadas.add(minuto)
+        cubeta.append(entrada)
+
+    def insertar_varios(self, eventos: Iterable[Evento]) -> None:
+        for evento in eventos:
+            self.insertar(evento)
+
+    def eliminar(self, id_evento: int) -> Optional[Evento]:
+        evento = self._por_id.pop(id_evento, None)
+        if evento is None:
+            return None
+        # Eliminación perezosa: la entrada se descarta al llegar a ella.
+        self._entrada_por_id.pop(id_evento)[3] = None
+        return evento
+
+    def __cubeta_proxima(self) -> Optional[list[list]]:
+        """Entrega la cubeta más próxima, ordenada y sin entradas eliminadas al final."""
+        while self.minutos:
+            minuto = self.minutos[0]
+            cubeta = self.cubetas[minuto]
+            if minuto in self.__desordenadas:
+                cubeta.sort(reverse=True)
+                self.__desordenadas.discard(minuto)
+            while cubeta and cubeta[-1][3] is None:
+                cubeta.pop()
+            if cubeta:
+                return cubeta
+            del self.cubetas[minuto]
+            heapq.heappop(self.minutos)
+        return None
+
+    def proxima_fecha(self) -> Optional[dt.datetime]:
+        cubeta = self.__cubeta_proxima()
+        if cubeta is None:
+            return None
+        return cubeta[-1][3].ocurrencia
+
+    def obtener_proximos(self, eliminar: bool = True) -> list[Evento]:
+        cubeta = self.__cubeta_proxima()
+        if cubeta is None:
+            return []
+        micros = cubeta[-1][0]
+
+        out = []
+        if eliminar:
+            while cubeta and cubeta[-1][0] == micros:
+                evento = cubeta.pop()[3]
+                if evento is not None:
+                    out.append(evento)
+                    del self._por_id[evento.id]
+                    del self._entrada_por_id[evento.id]
+            return out
+
+        for i in range(len(cubeta) - 1, -1, -1):
+            if cubeta[i][0] != micros:
+                break
+            if cubeta[i][3] is not None:
+                out.append(cubeta[i][3])
+        return out
@@ -0,0 +1,81 @@
+import datetime as dt
+from abc import ABC, abstractmethod
+from operator import attrgetter
+from typing import Iterable, Iterator, Optional
+
+from ppdc_event_manager.eventos import Evento
+
+# Clave con la que se ordenan los eventos: `(ocurrencia, prioridad)`.
+clave_orden = attrgetter("ocurrencia", "prioridad")
+
+
+def ordenar_eventos(eventos: list[Evento]) -> list[Evento]:
+    """Ordena (de forma estable) los eventos por [clave_orden].
+    Si ya venían ordenados, sólo se recorren una vez y se entregan tal cual."""
+    for i in range(1, len(eventos)):
+        if clave_orden(eventos[i]) < clave_orden(eventos[i - 1]):
+            return sorted(eventos, key=clave_orden)
+    return eventos
+
+
+class ColaEventos(ABC):
+    """Interfaz común de las colas de eventos futuros utilizadas por [LineaDeEventos].
+
+    Todas las colas ordenan sus eventos por `(ocurrencia, prioridad)`, y los eventos que
+    empatan en ambos valores se mantienen en el mismo orden en que fueron insertados.
+    """
+
+    def __init__(self) -> None:
+        # Contador de inserciones, que desempata eventos con igual fecha y prioridad.
+        self._secuencia: int = 0
+        # Índice id -> evento, con los eventos que siguen pendientes.
+        self._por_id: dict[int, Evento] = dict()
+
+    def __len__(self) -> int:
+        return len(self._por_id)
+
+    def __contains__(self, id_evento: int) -> bool:
+        return id_evento in self._por_id
+
+    @abstractmethod
+    def __iter__(self) -> Iterator[Evento]:
+        """Recorre los eventos pendientes en el orden en que ocurrirán."""
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def _indexar(self, evento: Evento) -> None:
+        if evento.id in self._por_id:
+            raise Exception(f"[Error] El evento {evento.id} ya se encuentra agendado.")
+        self._por_id[evento.id] = evento
+
+    def buscar(self, id_evento: int) -> Optional[Evento]:
+        """Entrega el evento pendiente con el id indicado, o None si no está en la cola."""
+        return self._por_id.get(id_evento)
+
+    @abstractmethod
+    def insertar(self, evento: Evento) -> None:
+        ...
+
+    @abstractmethod
+    def insertar_varios(self, eventos: Iterable[Evento]) -> None:
+        """Inserta varios eventos a la vez. El resultado es el mismo que insertarlos
+        uno a uno, en el orden entregado."""
+
+    @abstractmethod
+    def eliminar(self, id_evento: int) -> Optional[Evento]:
+        """Quita de la cola el evento pendiente con el id indicado.
+
+        Returns
+        -------
+        Entrega el evento eliminado, o None si no estaba en la cola.
+        """
+
+    @abstractmethod
+    def proxima_fecha(self) -> Optional[dt.datetime]:
+        """Entrega la fecha del próximo evento sin sacarlo de la cola, o None si está vacía."""
+
+    @abstractmethod
+    def obtener_proximos(self, eliminar: bool = True) -> list[Evento]:
+        """Entrega todos los eventos que comparten la fecha de ocurrencia más próxima,
+        ordenados por prioridad. Por defecto, también los elimina de la cola."""
@@ -0,0 +1,111 @@
+import datetime as dt
+import heapq
+from typing import Iterable, Iterator, Optional
+
+from ppdc_event_manager.eventos import Evento
+
+from .cola_eventos import ColaEventos
+
+
+class ColaHeap(ColaEventos):
+    """Cola respaldada por un heap binario (módulo [heapq]).
+    Inserción y extracción cuestan O(log n).
+
+    Cada entrada del heap es una lista `[ocurrencia, prioridad, secuencia, evento]`.
+    Como la secuencia nunca se repite, las comparaciones nunca llegan al [Evento].
+
+    Los eventos eliminados no se quitan del heap: su entrada queda marcada con `evento = None`
+    y se descarta al llegar a la raíz (eliminación perezosa), por lo que eliminar cuesta O(1).
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.entradas: list[list] = []
+        # Entrada de cada evento pendiente, para poder marcarla al eliminarlo.
+        self._entrada_por_id: dict[int, list] = dict()
+
+    def __iter__(self) -> Iterator[Evento]:
+        for entrada in sorted(self._entrada_por_id.values()):
+            yield entrada[3]
+
+    def insertar(self, evento: Evento) -> None:
+        self._indexar(evento)
+        entrada = [evento.ocurrencia, evento.prioridad, self._secuencia, evento]
+        self._secuencia += 1
+        self._entrada_por_id[evento.id] = entrada
+        heapq.heappush(self.entradas, entrada)
+
+    def insertar_varios(self, eventos: Iterable[Evento]) -> None:
+        nuevas = []
+        for evento in eventos:
+            self._indexar(evento)
+            entrada = [evento.ocurrencia, evento.prioridad, self._secuencia, evento]
+            self._secuencia += 1
+            self._entrada_por_id[evento.id] = entrada
+            nuevas.append(entrada)
+
+        if not self.entradas and all(
+            nuevas[i - 1] <= nuevas[i] for i in range(1, len(nuevas))
+        ):
+            # Una lista ordenada ya cumple con la propiedad de heap.
+            self.entradas = nuevas
+        elif len(nuevas) > len(self.entradas) // 8:
+            # Para cargas grandes es más barato reconstruir el heap completo: O(n + m).
+            self.entradas.extend(nuevas)
+            heapq.heapify(self.entradas)
+        else:
+            for entrada in nuevas:
+                heapq.heappush(self.entradas, entrada)
+
+    def eliminar(self, id_evento: int) -> Optional[Evento]:
+        evento = self._por_id.pop(id_evento, None)
+        if evento is None:
+            return None
+        self._entrada_por_id.pop(id_evento)[3] = None
+
+        # Si las entradas eliminadas son mayoría, reconstruimos el heap para liberarlas.
+        if len(self.entradas) > 2 * len(self._por_id) + 32:
+            self.entradas = list(self._entrada_por_id.values())
+            heapq.heapify(self.entradas)
+        return evento
+
+    def __limpiar_tope(self) -> None:
+        """Descarta las entradas eliminadas que hayan llegado a la raíz del heap."""
+        while self.entradas and self.entradas[0][3] is None:
+            heapq.heappop(self.entradas)
+
+    def proxima_fecha(self) -> Optional[dt.datetime]:
+        self.__limpiar_tope()
+        if not self.entradas:
+            return None
+        return self.entradas[0][0]
+
+    def obtener_proximos(self, eliminar: bool = True) -> list[Evento]:
+        self.__limpiar_tope()
+        if not self.entradas:
+            return []
+        fecha_proxima = self.entradas[0][0]
+
+        if eliminar:
+            out = []
+            while self.entradas and self.entradas[0][0] == fecha_proxima:
+                evento = heapq.heappop(self.entradas)[3]
+                if evento is not None:
+                    out.append(evento)
+                    del self._por_id[evento.id]
+                    del self._entrada_por_id[evento.id]
+            return out
+
+        # Sin eliminar, recorremos el heap desde la raíz, bajando sólo por los nodos
+        # que comparten la fecha más próxima (sus hijos nunca son anteriores).
+        encontradas = []
+        pendientes = [0]
+        while pendientes:
+            i = pendientes.pop()
+            if i < len(self.entradas) and self.entradas[i][0] == fecha_proxima:
+                if self.entradas[i][3] is not None:
+                    encontradas.append(self.entradas[i])
+                pendientes.append(2 * i + 1)
+                pendientes.append(2 * i + 2)
+        encontradas.sort()
+        return [entrada[3] for entrada in encontradas]
@@ -0,0 +1,77 @@
+import datetime as dt
+import heapq
+from typing import Iterable, Iterator, Optional
+
+from ppdc_event_manager.eventos import Evento
+
+from .cola_eventos import ColaEventos, clave_orden, ordenar_eventos
+
+
+class ColaLista(ColaEventos):
+    """Cola respaldada por una lista ordenada.
+    Corresponde con la implementación original de [LineaDeEventos]: cada inserción recorre
+    la lista desde el inicio, por lo que cuesta O(n). Se mantiene como referencia para
+    comparar el rendimiento de los otros motores.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.eventos: list[Evento] = []
+
+    def __iter__(self) -> Iterator[Evento]:
+        return iter(self.eventos)
+
+    def insertar(self, evento: Evento) -> None:
+        self._indexar(evento)
+        for i in range(len(self.eventos)):
+            ev_en_lista = self.eventos[i]
+
+            if ev_en_lista.ocurrencia > evento.ocurrencia or (
+                ev_en_lista.ocurrencia == evento.ocurrencia
+                and ev_en_lista.prioridad > evento.prioridad
+            ):
+                self.eventos.insert(i, evento)
+                return
+        # Si no, lo ponemos al final.
+        self.eventos.append(evento)
+
+    def insertar_varios(self, eventos: Iterable[Evento]) -> None:
+        nuevos = ordenar_eventos(list(eventos))
+        for evento in nuevos:
+            self._indexar(evento)
+        if not nuevos:
+            return
+
+        if not self.eventos or clave_orden(self.eventos[-1]) <= clave_orden(nuevos[0]):
+            self.eventos.extend(nuevos)
+        else:
+            # Mezcla en una sola pasada. Ante empates, [heapq.merge] deja primero
+            # a los eventos que ya estaban en la lista.
+            self.eventos = list(heapq.merge(self.eventos, nuevos, key=clave_orden))
+
+    def proxima_fecha(self) -> Optional[dt.datetime]:
+        if not self.eventos:
+            return None
+        return self.eventos[0].ocurrencia
+
+    def obtener_proximos(self, eliminar: bool = True) -> list[Evento]:
+        if not self.eventos:
+            return []
+        out = [self.eventos[0]]
+        fecha_proxima = out[0].ocurrencia
+        i = 1
+        while i < len(self.eventos) and self.eventos[i].ocurrencia == fecha_proxima:
+            out.append(self.eventos[i])
+            i += 1
+        if eliminar:
+            # Eliminamos en el lugar, sin crear una copia de los eventos restantes.
+            del self.eventos[: len(out)]
+            for evento in out:
+                del self._por_id[evento.id]
+        return out
+
+    def eliminar(self, id_evento: int) -> Optional[Evento]:
+        evento = self._por_id.pop(id_evento, None)
+        if evento is not None:
+            self.eventos.remove(evento)
+        return evento
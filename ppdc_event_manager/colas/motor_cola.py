@@ -0,0 +1,16 @@
+from enum import Enum
+
+
+class MotorCola(Enum):
+    """Motores disponibles para la cola de eventos futuros de [LineaDeEventos].
+
+    Ejemplo: `LineaDeEventos(estado, fecha, motor=MotorCola.LISTA)` utiliza la lista
+    ordenada original, lo que permite comparar ambos motores.
+    """
+
+    # Lista ordenada: inserción O(n), recorriendo desde el inicio.
+    LISTA = "lista"
+    # Heap binario: inserción y extracción O(log n).
+    HEAP = "heap"
+    # Cubetas por minuto desde la fecha inicial: inserción O(1), para tiempos discretos.
+    CALENDARIO = "calendario"
@@ -0,0 +1,76 @@
+from typing import Hashable, Iterable, Mapping
+
+from ppdc_event_manager.eventos import Evento
+
+# Campos de `datos` que identifican a las entidades que modifica un evento, y el tipo de
+# entidad al que corresponden. Dos eventos están en conflicto si comparten alguna entidad.
+CAMPOS_CONFLICTO: dict[str, str] = {
+    "id_tren": "tren",
+    "id_estacion_destino": "estacion",
+    "id_estacion": "estacion",
+}
+
+
+def agrupar_sin_conflictos(
+    eventos: Iterable[Evento], campos: Mapping[str, Hashable] = CAMPOS_CONFLICTO
+) -> list[list[list[Evento]]]:
+    """Separa un lote de eventos en grupos que no comparten entidades, por lo que pueden
+    ejecutarse en paralelo.
+
+    Los eventos sin ninguno de los [campos] no declaran qué modifican, así que actúan como
+    barreras: se ejecutan solos, después de todo lo anterior y antes de todo lo siguiente.
+
+    Returns
+    -------
+    Entrega los segmentos del lote, en orden. Cada segmento es una lista de grupos que pueden
+    ejecutarse en paralelo, y dentro de cada grupo se mantiene el orden original del lote.
+    """
+    segmentos: list[list[list[Evento]]] = []
+    segmento: list[Evento] = []
+    claves_segmento: list[list[tuple]] = []
+    for evento in eventos:
+        claves = []
+        for campo, entidad in campos.items():
+            valor = evento.obtener_dato(campo)
+            if valor is not None:
+                claves.append((entidad, valor))
+        if claves:
+            segmento.append(evento)
+            claves_segmento.append(claves)
+            continue
+
+        if segmento:
+            segmentos.append(_agrupar(segmento, claves_segmento))
+            segmento, claves_segmento = [], []
+        segmentos.append([[evento]])
+
+    if segmento:
+        segmentos.append(_agrupar(segmento, claves_segmento))
+    return segmentos
+
+
+def _agrupar(eventos: list[Evento], claves: list[list[tuple]]) -> list[list[Evento]]:
+    """Une (union-find) los eventos que comparten alguna clave."""
+    padres = list(range(len(eventos)))
+
+    def raiz(i: int) -> int:
+        while padres[i] != i:
+            padres[i] = padres[padres[i]]
+            i = padres[i]
+        return i
+
+    primero_por_clave: dict[tuple, int] = dict()
+    for i, claves_evento in enumerate(claves):
+        for clave in claves_evento:
+            j = primero_por_clave.setdefault(clave, i)
+            if j != i:
+                a, b = raiz(i), raiz(j)
+                if a != b:
+                    # La raíz es siempre el evento más antiguo del grupo.
+                    padres[max(a, b)] = min(a, b)
+
+    grupos: dict[int, list[Evento]] = dict()
+    for i, evento in enumerate(eventos):
+        grupos.setdefault(raiz(i), []).append(evento)
+    # Los grupos quedan ordenados según su primer evento.
+    return list(grupos.values())
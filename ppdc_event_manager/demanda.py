@@ -0,0 +1,215 @@
+import datetime as dt
+from typing import Any, Callable, Iterable, Optional
+
+np: Any
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional: sólo lo necesita [DemandaVectorizada].
+    np = None
+
+from ppdc_event_manager.eventos import TipoEvento, Evento
+
+MINUTOS_DIA = 24 * 60
+
+
+def _minutos_del_dia(hora: dt.time) -> float:
+    return hora.hour * 60 + hora.minute + hora.second / 60
+
+
+class DemandaVectorizada:
+    """Generador de demanda para todas las estaciones a la vez, utilizando arreglos de NumPy.
+
+    En vez de un evento GENERACION_DEMANDA (y una llamada a su handler) por estación, cada
+    intervalo de tiempo se representa con un solo evento agregado, y los clientes de todas las
+    estaciones se generan con una sola operación sobre arreglos.
+
+    Cada estación genera clientes siguiendo un proceso de Poisson, con una tasa proporcional a
+    su población, sólo durante su horario de funcionamiento (`hora_inicio` a `hora_final`).
+
+    Ejemplo:
+        demanda = DemandaVectorizada.desde_estaciones(estado.estaciones.values())
+        linea.registrar_handler(
+            TipoEvento.GENERACION_DEMANDA, demanda.procesar_lote, por_lote=True
+        )
+        demanda.agendar(linea, fecha_previa, fecha_actual)
+    """
+
+    def __init__(
+        self,
+        ids_estacion: Iterable[int],
+        poblaciones: Iterable[int],
+        horas_inicio: Iterable[dt.time],
+        horas_final: Iterable[dt.time],
+        tasa_por_habitante: float = 1e-4,
+        semilla: Optional[int] = None,
+        al_generar: Optional[Callable[[Any, Any, Evento], None]] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        tasa_por_habitante: float = 1e-4
+            Clientes generados por habitante, por cada minuto dentro del horario.
+        semilla: Optional[int] = None
+            Semilla del generador aleatorio, para obtener resultados reproducibles.
+        al_generar: Optional[Callable] = None
+            Función llamada como `al_generar(ids_estacion, clientes, evento)` cada vez que se
+            procesa un evento, con los arreglos de estaciones y clientes generados.
+        """
+        if np is None:
+            raise Exception(
+                "[Error] DemandaVectorizada requiere NumPy. Instálalo con `pip install numpy`."
+            )
+        self.ids_estacion = np.asarray(list(ids_estacion), dtype=np.int64)
+        self.poblaciones = np.asarray(list(poblaciones), dtype=np.float64)
+        self.inicios = np.asarray(
+            [_minutos_del_dia(h) for h in horas_inicio], dtype=np.float64
+        )
+        self.finales = np.asarray(
+            [_minutos_del_dia(h) for h in horas_final], dtype=np.float64
+        )
+        if not (
+            len(self.ids_estacion)
+            == len(self.poblaciones)
+            == len(self.inicios)
+            == len(self.finales)
+        ):
+            raise Exception(
+                "[Error] Todos los arreglos de estaciones deben tener el mismo largo."
+            )
+
+        # Horarios que cruzan la medianoche (por ejemplo, de 20:00 a 02:00).
+        self.cruza_medianoche = self.finales <= self.inicios
+        self.tasa_por_habitante = tasa_por_habitante
+        self.rng = np.random.default_rng(semilla)
+        self.al_generar = al_generar
+
+        # Permite traducir ids de estación a posiciones en los arreglos con [np.searchsorted].
+        self.__orden_ids = np.argsort(self.ids_estacion, kind="stable")
+        self.__ids_ordenados = self.ids_estacion[self.__orden_ids]
+
+    def __indices(self, ids_estacion: Any) -> Any:
+        """Posiciones de las estaciones en los arreglos. Lanza [KeyError] si alguna no existe."""
+        posiciones = np.searchsorted(self.__ids_ordenados, ids_estacion)
+        posiciones = np.minimum(posiciones, len(self.__ids_ordenados) - 1)
+        desconocidas = self.__ids_ordenados[posiciones] != ids_estacion
+        if np.any(desconocidas):
+            raise KeyError(
+                f"[Error] Estaciones desconocidas: {np.asarray(ids_estacion)[desconocidas]}."
+            )
+        return self.__orden_ids[posiciones]
+
+    @classmethod
+    def desde_estaciones(
+        cls, estaciones: Iterable[Any], **kwargs: Any
+    ) -> "DemandaVectorizada":
+        """Crea el generador a partir de objetos con los atributos `id`, `poblacion`,
+        `hora_inicio` y `hora_final` (como [Estacion])."""
+        estaciones = list(estaciones)
+        return cls(
+            [e.id for e in estaciones],
+            [e.poblacion for e in estaciones],
+            [e.hora_inicio for e in estaciones],
+            [e.hora_final for e in estaciones],
+            **kwargs,
+        )
+
+    def minutos_activos(
+        self, fecha_previa: dt.datetime, fecha_actual: dt.datetime, indices: Any = None
+    ):
+        """Entrega, para cada estación, cuántos minutos entre [fecha_previa] y [fecha_actual]
+        caen dentro de su horario de funcionamiento. Con [indices], sólo para las estaciones
+        en esas posiciones de los arreglos."""
+        inicios, finales, cruza_medianoche = self.inicios, self.finales, self.cruza_medianoche
+        if indices is not None:
+            inicios, finales = inicios[indices], finales[indices]
+            cruza_medianoche = cruza_medianoche[indices]
+        minutos = np.zeros(len(inicios), dtype=np.float64)
+        if fecha_actual <= fecha_previa:
+            return minutos
+
+        finales_dia = np.where(cruza_medianoche, MINUTOS_DIA, finales)
+        dia = dt.datetime.combine(fecha_previa.date(), dt.time())
+        while dia < fecha_actual:
+            # Intervalo [a, b) de este día, en minutos desde la medianoche.
+            a = max((fecha_previa - dia) / dt.timedelta(minutes=1), 0.0)
+            b = min((fecha_actual - dia) / dt.timedelta(minutes=1), MINUTOS_DIA)
+            minutos += np.clip(np.minimum(b, finales_dia) - np.maximum(a, inicios), 0, None)
+            # Parte del horario que viene desde el día anterior.
+            minutos += np.where(
+                cruza_medianoche,
+                np.clip(np.minimum(b, finales) - a, 0, None),
+                0.0,
+            )
+            dia += dt.timedelta(days=1)
+        return minutos
+
+    def crear_evento(
+        self,
+        fecha_previa: dt.datetime,
+        fecha_actual: dt.datetime,
+        prioridad: int = 0,
+        id: Optional[int] = None,
+    ) -> Optional[Evento]:
+        """Crea un único evento GENERACION_DEMANDA agregado para todas las estaciones que
+        funcionan entre [fecha_previa] y [fecha_actual]. Si ninguna funciona, entrega None."""
+        minutos = self.minutos_activos(fecha_previa, fecha_actual)
+        activas = minutos > 0
+        if not activas.any():
+            return None
+
+        evento = Evento(
+            TipoEvento.GENERACION_DEMANDA, fecha_actual, prioridad=prioridad, id=id
+        )
+        evento.datos["fecha_previa"] = fecha_previa
+        evento.datos["fecha_actual"] = fecha_actual
+        evento.datos["ids_estacion"] = self.ids_estacion[activas]
+        evento.datos["minutos"] = minutos[activas]
+        return evento
+
+    def agendar(
+        self,
+        linea: Any,
+        fecha_previa: dt.datetime,
+        fecha_actual: dt.datetime,
+        prioridad: int = 0,
+    ) -> Optional[Evento]:
+        """Crea el evento agregado del intervalo y lo inserta como evento futuro de [linea].
+        Si ninguna estación funciona en el intervalo, no inserta nada y entrega None."""
+        evento = self.crear_evento(
+            fecha_previa, fecha_actual, prioridad, id=linea.nuevo_id_evento()
+        )
+        if evento is not None:
+            linea.insertar_evento_futuro(evento)
+        return evento
+
+    def generar(self, ids_estacion: Any, minutos: Any) -> Any:
+        """Genera los clientes de las estaciones indicadas, en una sola operación."""
+        indices = self.__indices(np.asarray(ids_estacion, dtype=np.int64))
+        lam = self.tasa_por_habitante * self.poblaciones[indices] * minutos
+        return self.rng.poisson(lam)
+
+    def procesar(self, evento: Evento) -> Any:
+        """Handler de GENERACION_DEMANDA. Acepta tanto eventos agregados (creados con
+        [self.crear_evento]) como eventos de una sola estación (con `datos["id_estacion"]`).
+        Guarda los clientes generados en `evento.datos["clientes"]` y los entrega."""
+        if "ids_estacion" in evento.datos:
+            ids_estacion = evento.datos["ids_estacion"]
+            minutos = evento.datos["minutos"]
+        else:
+            ids_estacion = np.asarray([evento.datos["id_estacion"]], dtype=np.int64)
+            minutos = self.minutos_activos(
+                evento.datos["fecha_previa"],
+                evento.datos["fecha_actual"],
+                self.__indices(ids_estacion),
+            )
+
+        clientes = self.generar(ids_estacion, minutos)
+        evento.datos["clientes"] = clientes
+        if self.al_generar is not None:
+            self.al_generar(ids_estacion, clientes, evento)
+        return clientes
+
+    def procesar_lote(self, eventos: list[Evento]) -> None:
+        """Handler por lote de GENERACION_DEMANDA (ver [LineaDeEventos.registrar_handler])."""
+        for evento in eventos:
+            self.procesar(evento)
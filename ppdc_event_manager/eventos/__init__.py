@@ -1,7 +1,9 @@
 from .tipos_evento import TipoEvento
 from .eventos import Evento
+from .evento_recurrente import EventoRecurrente
 
 __all__ = [
     "TipoEvento",
     "Evento",
+    "EventoRecurrente",
 ]
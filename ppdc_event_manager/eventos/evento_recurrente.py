@@ -0,0 +1,76 @@
+import datetime as dt
+from typing import Any, Callable, Optional
+
+from .tipos_evento import TipoEvento
+from .eventos import Evento
+
+
+class EventoRecurrente:
+    """Plantilla para eventos que se repiten cada cierto intervalo, como la generación de
+    demanda de cada estación.
+
+    En vez de agendar todas las repeticiones de una vez, [LineaDeEventos] mantiene sólo la
+    próxima instancia en su cola, y crea la siguiente cuando ésta ocurre. Así, el tamaño de la
+    cola no depende del horizonte de la simulación.
+    """
+
+    def __init__(
+        self,
+        id: int,
+        tipo: TipoEvento,
+        inicio: dt.datetime,
+        intervalo: dt.timedelta,
+        hasta: Optional[dt.datetime] = None,
+        handler: Optional[Callable] = None,
+        prioridad: int = 0,
+        datos: Optional[dict[str, Any]] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        inicio: dt.datetime
+            Fecha de la primera instancia.
+        intervalo: dt.timedelta
+            Tiempo entre instancias consecutivas. Debe ser positivo.
+        hasta: Optional[dt.datetime] = None
+            Fecha máxima de las instancias (inclusive). Si es None, se repite indefinidamente.
+        handler: Optional[Callable] = None
+            Handler compartido por todas las instancias. Si es None, se utiliza el handler
+            registrado para [tipo] (ver [LineaDeEventos.registrar_handler]).
+        datos: Optional[dict[str, Any]] = None
+            Datos que se copian a cada instancia. Para GENERACION_DEMANDA, además se agregan
+            `datos["fecha_previa"]` y `datos["fecha_actual"]`, que cubren el intervalo desde la
+            instancia anterior. La primera instancia no tiene intervalo previo, por lo que su
+            ventana comienza y termina en [inicio].
+        """
+        if intervalo <= dt.timedelta(0):
+            raise Exception("[Error] El intervalo de un evento recurrente debe ser positivo.")
+        self.id: int = id
+        self.tipo: TipoEvento = tipo
+        self.inicio: dt.datetime = inicio
+        self.intervalo: dt.timedelta = intervalo
+        self.hasta: Optional[dt.datetime] = hasta
+        self.handler: Optional[Callable] = handler
+        self.prioridad: int = prioridad
+        self.datos: dict[str, Any] = datos if datos is not None else dict()
+
+        # Id de la instancia que se encuentra agendada.
+        self.id_evento_pendiente: Optional[int] = None
+
+    def crear_instancia(
+        self, ocurrencia: dt.datetime, id: Optional[int] = None
+    ) -> Optional[Evento]:
+        """Crea la instancia que ocurre en [ocurrencia], o entrega None si ya pasó [self.hasta].
+        [id] es el id de la instancia (ver [Evento])."""
+        if self.hasta is not None and ocurrencia > self.hasta:
+            return None
+        evento = Evento(
+            self.tipo, ocurrencia, self.handler, prioridad=self.prioridad, id=id
+        )
+        if self.datos:
+            evento.datos = dict(self.datos)
+        if self.tipo == TipoEvento.GENERACION_DEMANDA:
+            # La primera instancia no tiene un intervalo previo.
+            evento.datos["fecha_previa"] = max(ocurrencia - self.intervalo, self.inicio)
+            evento.datos["fecha_actual"] = ocurrencia
+        return evento
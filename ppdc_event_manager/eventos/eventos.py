@@ -1,3 +1,4 @@
+import copy
 import datetime as dt
 from enum import Enum
 from typing import Any, Callable, Dict, List, Optional
@@ -6,18 +7,34 @@ from .tipos_evento import TipoEvento
 
 
 class Evento:
+    # Con [__slots__] los eventos no tienen un [__dict__] propio, lo que reduce
+    # considerablemente la memoria utilizada por cada evento del historial.
+    __slots__ = (
+        "tipo",
+        "_ocurrencia",
+        "_fecha_base",
+        "handler",
+        "ha_ocurrido",
+        "prioridad",
+        "id",
+        "_datos",
+    )
+
     # Variable de la clase.
     # Con esto podemos conseguir el id desde la misma clase,
     # en vez de depender del [EstadoDeSimulacion].
+    # Sólo se utiliza si no se entrega un id: [LineaDeEventos.crear_evento] asigna ids con
+    # el contador propio de cada línea temporal.
     next_id_evento = 0
 
     def __init__(
         self,
         tipo: TipoEvento,
         ocurrencia: dt.datetime,
-        handler: Callable,
+        handler: Optional[Callable] = None,
         prioridad: int = 0,
         ha_ocurrido: bool = False,
+        id: Optional[int] = None,
     ) -> None:
         """
         Parameters
@@ -27,14 +44,18 @@ class Evento:
             para el evento.
         ocurrencia: dt.datetime
             Fecha exacta en la que debería ocurrir el evento.
-        handler: Callable
+        handler: Optional[Callable] = None
             Está será la función que será ejecutada una vez el evento deba ocurrir.
+            Si es None, [LineaDeEventos] utilizará el handler registrado para su [TipoEvento]
+            (ver [LineaDeEventos.registrar_handler]).
         ha_ocurrido: bool = False
             Indica si efectivamente el evento ha sido procesado por la simulación. Esto indica
             que debería moverse al historial de eventos correspondiente.
         prioridad: int
             Valor que ayuda a ordenar eventos que tengan la misma fecha de ocurrencia.
             Mientras más cerca de 0, más adelante estará en la lista de eventos.
+        id: Optional[int] = None
+            Id del evento. Si es None, se asigna uno con el contador de la clase.
 
         Other attributes
         ----------
@@ -47,25 +68,112 @@ class Evento:
 
         datos: dict[str, Any]
             Diccionario disponible para agregar cualquier otro dato que sea necesario para su evento.
+            Sólo se crea la primera vez que se utiliza.
         """
         self.tipo: TipoEvento = tipo
-        self.ocurrencia: dt.datetime = ocurrencia
-        self.handler = handler
+        self._ocurrencia: Any = ocurrencia
+        # Cuando el evento está compactado, [_ocurrencia] guarda los microsegundos
+        # transcurridos desde esta fecha.
+        self._fecha_base: Optional[dt.datetime] = None
+        self.handler: Optional[Callable] = handler
 
         self.ha_ocurrido: bool = ha_ocurrido
         self.prioridad: int = prioridad
 
-        # Asignamos un id utilizando el atributo de la clase.
-        self.id = Evento.next_id_evento
-        Evento.next_id_evento += 1
+        if id is None:
+            # Asignamos un id utilizando el atributo de la clase.
+            id = Evento.next_id_evento
+            Evento.next_id_evento += 1
+        # Con un id explícito no se modifica el contador de la clase: los ids de cada línea
+        # temporal los asigna su propio contador, incluso desde varios hilos.
+        self.id = id
+
+        # El diccionario de datos adicionales se crea al utilizarlo por primera vez.
+        self._datos: Optional[dict[str, Any]] = None
+
+    @classmethod
+    def restaurar(
+        cls,
+        tipo: TipoEvento,
+        ocurrencia: dt.datetime,
+        prioridad: int,
+        id: int,
+        ha_ocurrido: bool,
+        datos: Optional[dict[str, Any]] = None,
+        handler: Optional[Callable] = None,
+    ) -> "Evento":
+        """Reconstruye un evento guardado (por ejemplo, desde un [RegistroBinario]),
+        conservando su id original en vez de asignarle uno nuevo."""
+        evento = cls.__new__(cls)
+        evento.tipo = tipo
+        evento._ocurrencia = ocurrencia
+        evento._fecha_base = None
+        evento.handler = handler
+        evento.ha_ocurrido = ha_ocurrido
+        evento.prioridad = prioridad
+        evento.id = id
+        evento._datos = datos
+        return evento
+
+    @property
+    def ocurrencia(self) -> dt.datetime:
+        if self._fecha_base is None:
+            return self._ocurrencia
+        return self._fecha_base + dt.timedelta(microseconds=self._ocurrencia)
+
+    @ocurrencia.setter
+    def ocurrencia(self, ocurrencia: dt.datetime) -> None:
+        self._ocurrencia = ocurrencia
+        self._fecha_base = None
 
-        # Dejamos disponible un diccionario para datos adicionales.
-        self.datos: dict[str, Any] = dict()
+    @property
+    def datos(self) -> dict[str, Any]:
+        if self._datos is None:
+            self._datos = dict()
+        return self._datos
+
+    @datos.setter
+    def datos(self, datos: dict[str, Any]) -> None:
+        self._datos = datos
+
+    def obtener_dato(self, clave: str, defecto: Any = None) -> Any:
+        """Entrega [self.datos][clave], o [defecto] si no existe.
+        A diferencia de [self.datos], no crea el diccionario si el evento no tiene datos."""
+        if self._datos is None:
+            return defecto
+        return self._datos.get(clave, defecto)
+
+    def copiar(self) -> "Evento":
+        """Crea una copia del evento, con el mismo id y una copia de sus datos.
+        Se utiliza al crear variantes, para que cada línea temporal ejecute sus propios eventos."""
+        copia = copy.copy(self)
+        if self._datos is not None:
+            copia._datos = self._datos.copy()
+        return copia
+
+    def compactar(self, fecha_base: dt.datetime) -> None:
+        """Reduce la memoria de un evento que ya ocurrió: su fecha se guarda como un entero
+        (microsegundos desde [fecha_base], que es compartida entre eventos) y se libera su
+        handler, ya que no volverá a ejecutarse. [self.ocurrencia] entrega la misma fecha."""
+        if not self.ha_ocurrido:
+            raise Exception("[Error] Sólo se pueden compactar eventos que ya ocurrieron.")
+        if self._fecha_base is None:
+            self._ocurrencia = (self._ocurrencia - fecha_base) // dt.timedelta(
+                microseconds=1
+            )
+            self._fecha_base = fecha_base
+        self.handler = None
 
     def ejecutar(self):
         if self.ha_ocurrido:
             raise Exception(
                 '[Error] No se puede ejecutar un evento que ya está marcado como "ocurrido".'
             )
+        if self.handler is None:
+            raise Exception(
+                f"[Error] El evento {self.id} no tiene handler propio. "
+                "Debe consumirse desde una [LineaDeEventos] con un handler registrado "
+                f"para {self.tipo}."
+            )
         self.handler()
         self.ha_ocurrido = True
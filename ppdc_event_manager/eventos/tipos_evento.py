@@ -34,6 +34,17 @@ Datos:
 ["fecha_actual"]: dt.datetime
     Fecha a la cual se actualizará la estación. Junto a la fecha previa,
     podremos calcular la cantidad de minutos transcurridos.
+
+Evento agregado (ver [DemandaVectorizada]):
+----------
+Un solo evento puede representar a varias estaciones. En ese caso no se utiliza
+["id_estacion"], sino:
+["ids_estacion"]: np.ndarray[int]
+    Identificadores de las estaciones que funcionan durante el intervalo.
+["minutos"]: np.ndarray[float]
+    Minutos del intervalo que caen dentro del horario de cada estación.
+["clientes"]: np.ndarray[int]
+    Clientes generados en cada estación. Se agrega al procesar el evento.
 """
 
 
@@ -0,0 +1,135 @@
+"""Benchmarks de [LineaDeEventos] sobre redes sintéticas (ver [EstadoSintetico]).
+
+Uso (desde esta carpeta):
+    python 02_benchmarks.py --escenario pequeno
+    python 02_benchmarks.py --estaciones 1000 --trenes 10000 --horas 12 --salida r.json
+
+Los resultados se entregan como JSON, para poder comparar distintas ejecuciones.
+"""
+
+import argparse
+import datetime as dt
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import ppdc_event_manager
+from ppdc_event_manager import MotorCola
+
+from red_sintetica import EstadoSintetico
+
+# Escenarios predefinidos: (estaciones, trenes).
+ESCENARIOS = {
+    "pequeno": (10, 10),
+    "mediano": (1_000, 10_000),
+    "grande": (10_000, 100_000),
+}
+
+FECHA_INICIAL = dt.datetime(2025, 1, 1, 7, 0)
+
+
+def medir_escenario(
+    estaciones: int, trenes: int, horas: float, motor: MotorCola, semilla: int
+) -> dict:
+    resultado = {
+        "estaciones": estaciones,
+        "trenes": trenes,
+        "horas": horas,
+        "motor": motor.value,
+    }
+
+    inicio = time.perf_counter()
+    estado = EstadoSintetico(FECHA_INICIAL, estaciones, trenes, motor, semilla)
+    resultado["segundos_generacion"] = time.perf_counter() - inicio
+    linea = estado.admin_eventos
+
+    # Latencia de inserción: un evento TREN_LLEGADA por tren.
+    inicio = time.perf_counter()
+    estado.agendar_viajes_iniciales()
+    duracion = time.perf_counter() - inicio
+    resultado["insercion_us_por_evento"] = duracion / max(len(linea.eventos), 1) * 1e6
+
+    # Rendimiento de obtener_proximos + consumir_eventos, como [avanzar_simulacion].
+    fecha_final = FECHA_INICIAL + dt.timedelta(hours=horas)
+    eventos = 0
+    lotes = 0
+    inicio = time.perf_counter()
+    while True:
+        fecha_proxima = linea.eventos.proxima_fecha()
+        if fecha_proxima is None or fecha_proxima > fecha_final:
+            break
+        eventos += len(estado.avanzar_simulacion())
+        lotes += 1
+    duracion = time.perf_counter() - inicio
+    resultado["eventos_consumidos"] = eventos
+    resultado["lotes"] = lotes
+    resultado["eventos_por_segundo"] = eventos / duracion if duracion else 0.0
+    resultado["largo_historial"] = len(linea.historial_eventos)
+    resultado["eventos_pendientes"] = len(linea.eventos)
+
+    # Costo de crear variantes, completas y cortadas a la mitad del tiempo simulado.
+    inicio = time.perf_counter()
+    linea.crear_variante(None)
+    resultado["variante_completa_ms"] = (time.perf_counter() - inicio) * 1e3
+    inicio = time.perf_counter()
+    linea.crear_variante(FECHA_INICIAL + dt.timedelta(hours=horas / 2))
+    resultado["variante_parcial_ms"] = (time.perf_counter() - inicio) * 1e3
+
+    # Memoria por evento del historial, en una segunda ejecución (tracemalloc la hace más lenta).
+    estado = EstadoSintetico(FECHA_INICIAL, estaciones, trenes, motor, semilla)
+    estado.agendar_viajes_iniciales()
+    linea = estado.admin_eventos
+    tracemalloc.start()
+    memoria_previa = tracemalloc.get_traced_memory()[0]
+    historial_previo = len(linea.historial_eventos)
+    linea.avanzar_hasta(fecha_final)
+    memoria = tracemalloc.get_traced_memory()[0] - memoria_previa
+    tracemalloc.stop()
+    nuevos = len(linea.historial_eventos) - historial_previo
+    resultado["bytes_por_evento"] = memoria / nuevos if nuevos else 0.0
+
+    return resultado
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--escenario", choices=sorted(ESCENARIOS))
+    parser.add_argument("--estaciones", type=int, default=100)
+    parser.add_argument("--trenes", type=int, default=1_000)
+    parser.add_argument("--horas", type=float, default=6.0)
+    parser.add_argument(
+        "--motores",
+        nargs="+",
+        default=[MotorCola.HEAP.value, MotorCola.CALENDARIO.value],
+        choices=[m.value for m in MotorCola],
+    )
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida", help="Archivo JSON de salida (por defecto, stdout).")
+    args = parser.parse_args()
+
+    estaciones, trenes = args.estaciones, args.trenes
+    if args.escenario is not None:
+        estaciones, trenes = ESCENARIOS[args.escenario]
+
+    resultados = {
+        "fecha": dt.datetime.now().isoformat(timespec="seconds"),
+        "version": ppdc_event_manager.__version__,
+        "python": sys.version.split()[0],
+        "plataforma": platform.platform(),
+        "resultados": [
+            medir_escenario(estaciones, trenes, args.horas, MotorCola(m), args.semilla)
+            for m in args.motores
+        ],
+    }
+    texto = json.dumps(resultados, indent=2)
+    if args.salida is None:
+        print(texto)
+    else:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            archivo.write(texto + "\n")
+
+
+if __name__ == "__main__":
+    main()
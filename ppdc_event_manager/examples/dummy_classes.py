@@ -1,7 +1,7 @@
 import datetime as dt
 from typing import Any, Callable, Dict, List, Optional
 
-from ppdc_event_manager import LineaDeEventos, Evento, TipoEvento
+from ppdc_event_manager import LineaDeEventos, Evento, TipoEvento, MotorCola, Topologia
 
 
 class Via:
@@ -59,25 +59,25 @@ class Estacion:
         self.anden_a: Optional[Anden] = None
         self.anden_b: Optional[Anden] = None
 
-    def asignar_via(self, via: Via) -> bool:
-        """Asigna una vía a la estación.
+    def asignar_via(self, via: Via, extremo_a: bool = True) -> bool:
+        """Asigna una vía a la estación, en el primer andén disponible.
+        Un andén nuevo recibe la vía en via_a (o en via_b, si [extremo_a] es False), y un andén
+        existente la recibe en su otro lado, si está libre.
 
         Returns:
             True si se asignó exitosamente, False si no hay espacio disponible.
         """
-        # Intentar asignar en el primer andén disponible
-        if self.anden_a is None:
-            self.anden_a = Anden(id=0, via_a=via, via_b=None)
-            return True
-        elif self.anden_a.via_b is None:
-            self.anden_a.via_b = via
-            return True
-        elif self.anden_b is None:
-            self.anden_b = Anden(id=1, via_a=via, via_b=None)
-            return True
-        elif self.anden_b.via_b is None:
-            self.anden_b.via_b = via
-            return True
+        lado, otro_lado = ("via_a", "via_b") if extremo_a else ("via_b", "via_a")
+        for i, nombre in enumerate(("anden_a", "anden_b")):
+            anden = getattr(self, nombre)
+            if anden is None:
+                anden = Anden(id=i, via_a=None, via_b=None)
+                setattr(anden, lado, via)
+                setattr(self, nombre, anden)
+                return True
+            if getattr(anden, otro_lado) is None:
+                setattr(anden, otro_lado, via)
+                return True
 
         return False
 
@@ -90,7 +90,7 @@ class Tren:
         nombre: Optional[str],
         id_evento_siguiente: Optional[int],
     ):
-        self.id: int = 0
+        self.id: int = id
         self.id_estacion: int = id_estacion
 
         self.nombre: str = nombre
@@ -101,13 +101,14 @@ class Tren:
 
 
 class EstadoDeSimulacion:
-    def __init__(self, fecha_inicial: dt.datetime):
+    def __init__(self, fecha_inicial: dt.datetime, motor: MotorCola = MotorCola.HEAP):
         self.fecha_inicial = fecha_inicial
         self.fecha_actual = fecha_inicial
 
         self.admin_eventos: LineaDeEventos = LineaDeEventos(
             self,
             fecha_inicial,
+            motor=motor,
         )
 
         self.estaciones: dict[int, Estacion] = dict()
@@ -118,6 +119,15 @@ class EstadoDeSimulacion:
 
         self.next_id_vias: int = 0
 
+        # Red de estaciones y vías, actualizada con los eventos MODIFICACION_SISTEMA.
+        self.topologia: Topologia = Topologia()
+        self.topologia.observar(self.admin_eventos)
+
+        # Un solo handler por tipo de evento, en vez de una función por cada evento.
+        self.admin_eventos.registrar_handler(
+            TipoEvento.TREN_LLEGADA, self.procesar_llegadas, por_lote=True
+        )
+
     def crear_estacion_dummy(
         self, nombre: str = "Ferroviario Valdivia", poblacion: int = 100_000
     ) -> Estacion:
@@ -132,10 +142,9 @@ class EstadoDeSimulacion:
         self.estaciones[estacion.id] = estacion
 
         # Ahora creamos el evento:
-        evento = Evento(
+        evento = self.admin_eventos.crear_evento(
             TipoEvento.MODIFICACION_SISTEMA,
             self.fecha_actual,
-            lambda: print("[LOG] ¡Evento de creación de Estación!"),
             ha_ocurrido=True,
         )
         # Con todos los atributos adicionales que necesite el evento:
@@ -150,20 +159,21 @@ class EstadoDeSimulacion:
 
         return estacion
 
-    def crear_tren_dummy(self, nombre: str = "Trenesito") -> Tren:
-        # Crearemos un tren en la primera estación configurada.
+    def crear_tren_dummy(
+        self, nombre: str = "Trenesito", estacion: Optional[Estacion] = None
+    ) -> Tren:
+        # Si no se indica, crearemos el tren en la primera estación configurada.
         assert len(self.estaciones) > 0
-        e1 = self.estaciones[0]
+        e1 = estacion if estacion is not None else self.estaciones[0]
 
         tren = Tren(self.next_id_trenes, e1.id, nombre, None)
         self.next_id_trenes += 1
         self.trenes[tren.id] = tren
 
         # Ahora creamos el evento:
-        evento = Evento(
+        evento = self.admin_eventos.crear_evento(
             TipoEvento.MODIFICACION_SISTEMA,
             self.fecha_actual,
-            lambda: print("[LOG] ¡Evento de creación de Tren!"),
             ha_ocurrido=True,
         )
         # Con todos los atributos adicionales que necesite el evento:
@@ -177,70 +187,63 @@ class EstadoDeSimulacion:
 
         return tren
 
-    def conectar_estaciones(self, estacion_a: Estacion, estacion_b: Estacion):
-        """Conecta dos estaciones mediante una vía bidireccional.
-        La vía se asigna en via_a de una estación y via_b de la otra."""
+    def conectar_estaciones(
+        self, estacion_a: Estacion, estacion_b: Estacion, minutos: float = 60
+    ):
+        """Conecta dos estaciones mediante una vía bidireccional, que toma [minutos] en
+        recorrerse. La vía se asigna en via_a de una estación y via_b de la otra."""
         # Crear la vía
         via = Via(id=self.next_id_vias, estacion_a=estacion_a, estacion_b=estacion_b)
         self.next_id_vias += 1
 
-        ### TODO: Esta lógica se puede mejorar notablemente.
-
-        # Asignar la vía: via_a en estacion_a
-        if estacion_a.anden_a is None:
-            estacion_a.anden_a = Anden(id=0, via_a=via, via_b=None)
-        elif estacion_a.anden_a.via_b is None:
-            estacion_a.anden_a.via_b = via
-        elif estacion_a.anden_b is None:
-            estacion_a.anden_b = Anden(id=1, via_a=via, via_b=None)
-        elif estacion_a.anden_b.via_b is None:
-            estacion_a.anden_b.via_b = via
-        else:
-            return None  # No hay espacio
-
-        # Asignar la vía: via_b en estacion_b
-        if estacion_b.anden_a is None:
-            estacion_b.anden_a = Anden(id=0, via_a=None, via_b=via)
-        elif estacion_b.anden_a.via_a is None:
-            estacion_b.anden_a.via_a = via
-        elif estacion_b.anden_b is None:
-            estacion_b.anden_b = Anden(id=1, via_a=None, via_b=via)
-        elif estacion_b.anden_b.via_a is None:
-            estacion_b.anden_b.via_a = via
-        else:
+        if not self.__ubicar_via(via, estacion_a, estacion_b):
             return None  # No hay espacio
 
         # Crear evento de conexión
-        evento = Evento(
+        evento = self.admin_eventos.crear_evento(
             TipoEvento.MODIFICACION_SISTEMA,
             self.fecha_actual,
-            lambda: print(
-                f"[LOG] ¡Evento de conexión de Estaciones {estacion_a.nombre} - {estacion_b.nombre}!"
-            ),
             ha_ocurrido=True,
         )
         evento.datos["entidad"] = "Via"
         evento.datos["id"] = via.id
         evento.datos["estacion_a_id"] = estacion_a.id
         evento.datos["estacion_b_id"] = estacion_b.id
+        evento.datos["minutos"] = minutos
 
         self.admin_eventos.insertar_evento_pasado(evento)
 
         return via
 
-    def agendar_tren_llegada(self, tren: Tren, id_estacion_destino: int) -> Evento:
-        """Programa el movimiento de un tren hacia una estación destino.
-        Crea un evento TREN_LLEGADA para 60 minutos después."""
-        # Momento de llegada: 60 minutos después del tiempo actual
-        momento_llegada = self.fecha_actual + dt.timedelta(minutes=60)
+    def __ubicar_via(self, via: Via, estacion_a: Estacion, estacion_b: Estacion) -> bool:
+        """Asigna la vía en via_a de [estacion_a] y en via_b de [estacion_b].
+
+        Returns
+        -------
+        Entrega False si alguna de las estaciones no tiene espacio.
+        """
+        if not estacion_a.asignar_via(via):
+            return False
+        return estacion_b.asignar_via(via, extremo_a=False)
 
-        # Crear evento de llegada
-        evento = Evento(
+    def agendar_tren_llegada(
+        self, tren: Tren, id_estacion_destino: int, minutos: Optional[float] = None
+    ) -> Evento:
+        """Programa el movimiento de un tren hacia una estación destino.
+        Crea un evento TREN_LLEGADA para [minutos] minutos después, reemplazando la llegada
+        que el tren tuviera agendada. Por defecto, se utiliza el tiempo de viaje mínimo según
+        [self.topologia], o 60 minutos si las estaciones no están conectadas."""
+        if minutos is None:
+            minutos = self.topologia.tiempo_viaje(tren.id_estacion, id_estacion_destino)
+            if minutos is None:
+                minutos = 60
+        # Momento de llegada: [minutos] después del tiempo actual
+        momento_llegada = self.fecha_actual + dt.timedelta(minutes=minutos)
+
+        # Crear evento de llegada (se procesa con [self.procesar_llegadas])
+        evento = self.admin_eventos.crear_evento(
             TipoEvento.TREN_LLEGADA,
             momento_llegada,
-            lambda: print(
-                f"[LOG] ¡Tren {tren.nombre} llegó a estación {id_estacion_destino}!"
-            ),
             ha_ocurrido=False,
         )
         evento.datos["entidad"] = "Tren"
@@ -249,11 +252,76 @@ class EstadoDeSimulacion:
         evento.datos["id_estacion_origen"] = tren.id_estacion
         evento.datos["id_estacion_destino"] = id_estacion_destino
 
+        # Si el tren ya tenía una llegada agendada, ésta queda reemplazada por la nueva.
+        if tren.id_evento_siguiente is not None:
+            self.admin_eventos.cancelar_evento(tren.id_evento_siguiente)
+        tren.id_evento_siguiente = evento.id
+
         # Insertar evento futuro sin avanzar el tiempo
         self.admin_eventos.insertar_evento_futuro(evento)
 
         return evento
 
+    def procesar_llegadas(self, eventos: List[Evento]) -> None:
+        """Handler de TREN_LLEGADA. Recibe todas las llegadas que ocurren a la misma hora."""
+        for evento in eventos:
+            self.aplicar_llegada(evento)
+            print(
+                f"[LOG] ¡Tren {evento.datos['nombre_tren']} llegó a estación "
+                f"{evento.datos['id_estacion_destino']}!"
+            )
+
+    def aplicar_llegada(self, evento: Evento) -> None:
+        """Mueve el tren de un evento TREN_LLEGADA a su estación destino.
+        Se usa también para rebobinar (ver [LineaDeEventos.activar_instantaneas])."""
+        tren = self.trenes.get(evento.datos["id_tren"])
+        if tren is None:
+            return
+        tren.id_estacion = evento.datos["id_estacion_destino"]
+        if tren.id_evento_siguiente == evento.id:
+            tren.id_evento_siguiente = None
+
+    def aplicar_modificacion(self, evento: Evento) -> None:
+        """Vuelve a crear la entidad descrita por un evento MODIFICACION_SISTEMA, para
+        rebobinar la simulación (ver [LineaDeEventos.activar_instantaneas])."""
+        datos = evento.datos
+        if datos["entidad"] == "Estacion":
+            self.estaciones[datos["id"]] = Estacion(
+                id=datos["id"],
+                nombre=datos["nombre"],
+                poblacion=datos["poblacion"],
+                hora_inicio=datos["hora_inicio"],
+                hora_final=datos["hora_final"],
+            )
+            self.next_id_estaciones = max(self.next_id_estaciones, datos["id"] + 1)
+        elif datos["entidad"] == "Tren":
+            self.trenes[datos["id"]] = Tren(
+                datos["id"],
+                datos["id_estacion"],
+                datos["nombre"],
+                datos["id_evento_siguiente"],
+            )
+            self.next_id_trenes = max(self.next_id_trenes, datos["id"] + 1)
+        elif datos["entidad"] == "Via":
+            via = Via(
+                datos["id"],
+                self.estaciones[datos["estacion_a_id"]],
+                self.estaciones[datos["estacion_b_id"]],
+            )
+            self.__ubicar_via(via, via.estacion_a, via.estacion_b)
+            self.next_id_vias = max(self.next_id_vias, datos["id"] + 1)
+        self.topologia.aplicar_evento(evento)
+
+    def activar_instantaneas(self, cada_eventos: int = 1_000) -> None:
+        """Activa las instantáneas de la línea, con los aplicadores de este estado."""
+        self.admin_eventos.activar_instantaneas(
+            {
+                TipoEvento.TREN_LLEGADA: EstadoDeSimulacion.aplicar_llegada,
+                TipoEvento.MODIFICACION_SISTEMA: EstadoDeSimulacion.aplicar_modificacion,
+            },
+            cada_eventos=cada_eventos,
+        )
+
     def avanzar_simulacion(self) -> List[Evento]:
         """Esta función se encarga de conseguir los próximos eventos a ocurrir,
         obteniendo todos los que comparten la misma hora de ocurrencia.
@@ -269,3 +337,15 @@ class EstadoDeSimulacion:
         # Actualiza la fecha.
         self.fecha_actual = fecha_proxima
         return eventos
+
+    def avanzar_simulacion_hasta(self, fecha: dt.datetime) -> int:
+        """Consume todos los eventos que ocurren hasta [fecha], en una sola llamada
+        a la [LineaDeEventos].
+
+        Returns
+        -------
+        Entrega la cantidad de eventos consumidos.
+        """
+        estadisticas = self.admin_eventos.avanzar_hasta(fecha)
+        self.fecha_actual = self.admin_eventos.fecha_actual
+        return estadisticas.eventos
@@ -0,0 +1,87 @@
+import datetime as dt
+import random
+from typing import List, Optional
+
+from ppdc_event_manager import Evento, MotorCola
+
+from dummy_classes import EstadoDeSimulacion
+
+
+class EstadoSintetico(EstadoDeSimulacion):
+    """[EstadoDeSimulacion] con una red ferroviaria generada automáticamente, para medir
+    el rendimiento de [LineaDeEventos] con redes de distintos tamaños.
+
+    Las estaciones se conectan en línea (cada una con la siguiente), y cada cierta cantidad
+    de estaciones se agrega una conexión hacia una estación lejana, mientras los andenes lo
+    permitan. Cada tren, al llegar a una estación, viaja hacia una estación vecina al azar.
+    """
+
+    def __init__(
+        self,
+        fecha_inicial: dt.datetime,
+        cantidad_estaciones: int,
+        cantidad_trenes: int,
+        motor: MotorCola = MotorCola.HEAP,
+        semilla: Optional[int] = 0,
+        minutos_viaje: tuple[int, int] = (20, 90),
+    ):
+        """
+        Parameters
+        ----------
+        minutos_viaje: tuple[int, int] = (20, 90)
+            Rango (en minutos) de la duración de cada viaje entre estaciones.
+        """
+        super().__init__(fecha_inicial, motor=motor)
+        self.rng = random.Random(semilla)
+        self.minutos_viaje = minutos_viaje
+        # Ids de las estaciones conectadas con cada estación.
+        self.vecinos: dict[int, list[int]] = dict()
+
+        estaciones = [
+            self.crear_estacion_dummy(
+                f"Estación {i}", poblacion=self.rng.randint(10_000, 500_000)
+            )
+            for i in range(cantidad_estaciones)
+        ]
+        for estacion in estaciones:
+            self.vecinos[estacion.id] = []
+        for a, b in zip(estaciones, estaciones[1:]):
+            self.__conectar(a, b)
+        # Atajos entre estaciones lejanas, para que la red no sea sólo una línea.
+        for i in range(0, cantidad_estaciones - 2, 7):
+            j = self.rng.randrange(cantidad_estaciones)
+            if abs(i - j) > 1:
+                self.__conectar(estaciones[i], estaciones[j])
+
+        for i in range(cantidad_trenes):
+            self.crear_tren_dummy(
+                f"Tren {i}", estacion=estaciones[self.rng.randrange(cantidad_estaciones)]
+            )
+
+    def __conectar(self, estacion_a, estacion_b) -> None:
+        if self.conectar_estaciones(estacion_a, estacion_b) is not None:
+            self.vecinos[estacion_a.id].append(estacion_b.id)
+            self.vecinos[estacion_b.id].append(estacion_a.id)
+
+    def agendar_viaje(self, tren) -> Optional[Evento]:
+        """Agenda la llegada del tren a una estación vecina al azar."""
+        vecinos = self.vecinos[tren.id_estacion]
+        if not vecinos:
+            return None
+        return self.agendar_tren_llegada(
+            tren, self.rng.choice(vecinos), self.rng.randint(*self.minutos_viaje)
+        )
+
+    def agendar_viajes_iniciales(self) -> None:
+        for tren in self.trenes.values():
+            self.agendar_viaje(tren)
+
+    def procesar_llegadas(self, eventos: List[Evento]) -> None:
+        """Handler de TREN_LLEGADA: mueve cada tren a su destino y agenda su próximo viaje."""
+        for evento in eventos:
+            tren = self.trenes[evento.datos["id_tren"]]
+            tren.id_estacion = evento.datos["id_estacion_destino"]
+            tren.id_evento_siguiente = None
+            # Los nuevos viajes parten desde la hora de esta llegada.
+            self.fecha_actual = evento.ocurrencia
+            self.agendar_viaje(tren)
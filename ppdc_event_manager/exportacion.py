@@ -0,0 +1,363 @@
+"""Exportación del historial de eventos por bloques, sin cargarlo completo en memoria.
+
+Cada evento se convierte en una fila con las columnas de [COLUMNAS]: los datos base del evento
+y las claves documentadas de `datos` para cada [TipoEvento] (ver eventos/tipos_evento.py).
+Las claves no documentadas se agrupan, como JSON, en la columna "otros_datos", al igual que los
+valores que no son del tipo de su columna (ej: un texto en una columna "entero").
+
+Formato columnar ([FormatoExportacion.COLUMNAR]):
+    MAGIA (8 bytes) | largo del esquema (uint32) | esquema (JSON: lista de [nombre, tipo])
+    | grupos de filas...
+Cada grupo de filas comienza con su cantidad de filas (uint32), seguida de cada columna:
+    largo en bytes (uint32) | contenido
+Las columnas "entero" y "fecha" son arreglos int64 (las fechas en microsegundos desde 1970,
+y los valores faltantes como [SIN_DATO]). Las columnas "texto" son los largos (uint32) de cada
+valor, seguidos de los textos en utf-8 (los faltantes son de largo [SIN_TEXTO]).
+Como no hay un pie de archivo, se pueden agregar nuevos grupos al final.
+"""
+
+import bisect
+import csv
+import datetime as dt
+import json
+import numbers
+import os
+import struct
+from array import array
+from enum import Enum
+from itertools import chain, islice
+from typing import Any, BinaryIO, Iterable, Iterator, Union
+
+from ppdc_event_manager.eventos import Evento
+from ppdc_event_manager.historial_columnar import SIN_DATO
+from ppdc_event_manager.historial_eventos import HistorialEventos
+
+
+class FormatoExportacion(Enum):
+    """Formatos disponibles para [LineaDeEventos.exportar_historial]."""
+
+    CSV = "csv"
+    JSONL = "jsonl"
+    # Formato binario por columnas, con tipos (ver la descripción del módulo).
+    COLUMNAR = "columnar"
+
+
+# Columnas exportadas, con su tipo. Las de "lista" (arreglos de los eventos agregados de
+# GENERACION_DEMANDA) se escriben como texto JSON en CSV y en el formato columnar.
+COLUMNAS: list[tuple[str, str]] = [
+    ("id", "entero"),
+    ("tipo", "texto"),
+    ("ocurrencia", "fecha"),
+    ("prioridad", "entero"),
+    # TREN_LLEGADA y MODIFICACION_SISTEMA
+    ("entidad", "texto"),
+    # TREN_LLEGADA
+    ("id_tren", "entero"),
+    ("nombre_tren", "texto"),
+    ("id_estacion_origen", "entero"),
+    ("id_estacion_destino", "entero"),
+    # GENERACION_DEMANDA
+    ("id_estacion", "entero"),
+    ("fecha_previa", "fecha"),
+    ("fecha_actual", "fecha"),
+    ("ids_estacion", "lista"),
+    ("minutos", "lista"),
+    ("clientes", "lista"),
+    # Resto de los datos (por ejemplo, los de MODIFICACION_SISTEMA).
+    ("otros_datos", "texto"),
+]
+NOMBRES_COLUMNAS: list[str] = [nombre for nombre, _ in COLUMNAS]
+_CLAVES_DATOS = frozenset(NOMBRES_COLUMNAS[4:-1])
+
+MAGIA = b"PPDCCOL1"
+SIN_TEXTO = 0xFFFFFFFF
+_LARGO = struct.Struct("<I")
+_EPOCA = dt.datetime(1970, 1, 1)
+_MICROSEGUNDO = dt.timedelta(microseconds=1)
+# Marca de un valor que no es del tipo de su columna (ver [_valor_columna]).
+_NO_CABE = object()
+
+
+def _a_lista(valor: Any) -> Any:
+    # Arreglos de NumPy (o cualquier objeto con [tolist]).
+    if hasattr(valor, "tolist"):
+        return valor.tolist()
+    return list(valor)
+
+
+def _valor_columna(valor: Any, tipo: str) -> Any:
+    """Entrega [valor] como se guarda en una columna de [tipo], o [_NO_CABE] si no es de ese
+    tipo (así, un dato inesperado no interrumpe la exportación a medio escribir)."""
+    if tipo == "entero":
+        if isinstance(valor, numbers.Integral) and SIN_DATO < int(valor) < 2**63:
+            return int(valor)
+        return _NO_CABE
+    if tipo == "fecha":
+        if isinstance(valor, dt.datetime) and valor.tzinfo is None:
+            return valor
+        return _NO_CABE
+    if tipo == "lista":
+        if isinstance(valor, (str, bytes, dict)):
+            return _NO_CABE
+        try:
+            return _a_lista(valor)
+        except TypeError:
+            return _NO_CABE
+    return valor
+
+
+def _json_por_defecto(valor: Any) -> Any:
+    if isinstance(valor, (dt.datetime, dt.date, dt.time)):
+        return valor.isoformat()
+    if hasattr(valor, "tolist"):
+        return valor.tolist()
+    return str(valor)
+
+
+def fila_evento(evento: Evento) -> tuple:
+    """Entrega la fila de un evento, con un valor por cada columna de [COLUMNAS]
+    (None si el evento no tiene ese dato, o si no es del tipo de la columna: en ese caso, el
+    valor va en "otros_datos")."""
+    datos = evento._datos or {}
+    fila: list[Any] = [evento.id, evento.tipo.value, evento.ocurrencia, evento.prioridad]
+    otros = {clave: valor for clave, valor in datos.items() if clave not in _CLAVES_DATOS}
+    for nombre, tipo in COLUMNAS[4:-1]:
+        valor = datos.get(nombre)
+        if valor is not None:
+            valor = _valor_columna(valor, tipo)
+            if valor is _NO_CABE:
+                otros[nombre] = datos[nombre]
+                valor = None
+        fila.append(valor)
+
+    fila.append(json.dumps(otros, default=_json_por_defecto) if otros else None)
+    return tuple(fila)
+
+
+def bloques_historial(
+    eventos: Iterable[Evento], tamano_bloque: int = 10_000
+) -> Iterator[list[tuple]]:
+    """Entrega las filas de [eventos] en bloques de a lo más [tamano_bloque] filas, de manera
+    que sólo un bloque esté en memoria a la vez."""
+    iterador = iter(eventos)
+    while True:
+        bloque = [fila_evento(e) for e in islice(iterador, tamano_bloque)]
+        if not bloque:
+            return
+        yield bloque
+
+
+def _texto_csv(valor: Any, tipo: str) -> Any:
+    if valor is None:
+        return ""
+    if tipo == "fecha":
+        return valor.isoformat()
+    if tipo == "lista":
+        return json.dumps(valor, default=_json_por_defecto)
+    return valor
+
+
+def _escribir_csv(archivo: Any, bloques: Iterable[list[tuple]], cabecera: bool) -> int:
+    escritor = csv.writer(archivo)
+    if cabecera:
+        escritor.writerow(NOMBRES_COLUMNAS)
+    tipos = [tipo for _, tipo in COLUMNAS]
+    cantidad = 0
+    for bloque in bloques:
+        escritor.writerows(
+            [_texto_csv(v, t) for v, t in zip(fila, tipos)] for fila in bloque
+        )
+        cantidad += len(bloque)
+    return cantidad
+
+
+def _escribir_jsonl(archivo: Any, bloques: Iterable[list[tuple]]) -> int:
+    cantidad = 0
+    for bloque in bloques:
+        archivo.write(
+            "".join(
+                json.dumps(dict(zip(NOMBRES_COLUMNAS, fila)), default=_json_por_defecto)
+                + "\n"
+                for fila in bloque
+            )
+        )
+        cantidad += len(bloque)
+    return cantidad
+
+
+def _codificar_columna(valores: list[Any], tipo: str) -> bytes:
+    if tipo == "entero":
+        return array("q", (SIN_DATO if v is None else v for v in valores)).tobytes()
+    if tipo == "fecha":
+        return array(
+            "q",
+            (SIN_DATO if v is None else (v - _EPOCA) // _MICROSEGUNDO for v in valores),
+        ).tobytes()
+
+    textos = []
+    largos = array("I")
+    for valor in valores:
+        if valor is None:
+            largos.append(SIN_TEXTO)
+            continue
+        texto = (
+            json.dumps(valor, default=_json_por_defecto) if tipo == "lista" else str(valor)
+        ).encode("utf-8")
+        largos.append(len(texto))
+        textos.append(texto)
+    return largos.tobytes() + b"".join(textos)
+
+
+def _escribir_columnar(
+    archivo: BinaryIO, bloques: Iterable[list[tuple]], cabecera: bool
+) -> int:
+    if cabecera:
+        esquema = json.dumps(COLUMNAS).encode("utf-8")
+        archivo.write(MAGIA + _LARGO.pack(len(esquema)) + esquema)
+    cantidad = 0
+    for bloque in bloques:
+        partes = [_LARGO.pack(len(bloque))]
+        for i, (_, tipo) in enumerate(COLUMNAS):
+            columna = _codificar_columna([fila[i] for fila in bloque], tipo)
+            partes.append(_LARGO.pack(len(columna)))
+            partes.append(columna)
+        archivo.write(b"".join(partes))
+        cantidad += len(bloque)
+    return cantidad
+
+
+def _decodificar_columna(contenido: bytes, tipo: str, filas: int) -> list[Any]:
+    if tipo in ("entero", "fecha"):
+        valores = array("q")
+        valores.frombytes(contenido)
+        if tipo == "entero":
+            return [None if v == SIN_DATO else v for v in valores]
+        return [
+            None if v == SIN_DATO else _EPOCA + dt.timedelta(microseconds=v)
+            for v in valores
+        ]
+
+    largos = array("I")
+    largos.frombytes(contenido[: filas * largos.itemsize])
+    posicion = filas * largos.itemsize
+    out: list[Any] = []
+    for largo in largos:
+        if largo == SIN_TEXTO:
+            out.append(None)
+            continue
+        texto = contenido[posicion : posicion + largo].decode("utf-8")
+        posicion += largo
+        out.append(json.loads(texto) if tipo == "lista" else texto)
+    return out
+
+
+def leer_columnar(ruta: Union[str, os.PathLike]) -> Iterator[dict[str, list[Any]]]:
+    """Lee un archivo en [FormatoExportacion.COLUMNAR], entregando un grupo de filas a la
+    vez, como un diccionario de columna a lista de valores."""
+    with open(ruta, "rb") as archivo:
+        if archivo.read(len(MAGIA)) != MAGIA:
+            raise Exception(f"[Error] {ruta} no es un archivo columnar de eventos.")
+        (largo,) = _LARGO.unpack(archivo.read(_LARGO.size))
+        esquema = json.loads(archivo.read(largo).decode("utf-8"))
+        while True:
+            cabecera = archivo.read(_LARGO.size)
+            if len(cabecera) < _LARGO.size:
+                return
+            (filas,) = _LARGO.unpack(cabecera)
+            grupo = dict()
+            for nombre, tipo in esquema:
+                (largo,) = _LARGO.unpack(archivo.read(_LARGO.size))
+                grupo[nombre] = _decodificar_columna(archivo.read(largo), tipo, filas)
+            yield grupo
+
+
+class ExportadorHistorial:
+    """Exporta un [HistorialEventos] a un archivo, por bloques. Cada llamada a
+    [self.exportar] agrega al archivo sólo los eventos nuevos desde la exportación anterior.
+
+    Si el historial recibió eventos antes de la última posición exportada (ver
+    [HistorialEventos.seguir_inserciones]), esos eventos se exportan en la siguiente llamada,
+    antes de los eventos nuevos del final: en el archivo quedan fuera de orden.
+
+    Al dejar de utilizarlo, se debe llamar a [self.cerrar].
+    """
+
+    def __init__(
+        self,
+        historial: HistorialEventos,
+        ruta: Union[str, os.PathLike],
+        formato: FormatoExportacion = FormatoExportacion.CSV,
+        tamano_bloque: int = 10_000,
+    ) -> None:
+        self.historial: HistorialEventos = historial
+        self.ruta = ruta
+        self.formato: FormatoExportacion = formato
+        self.tamano_bloque: int = tamano_bloque
+
+        # Cantidad de eventos del historial que ya se exportaron.
+        self.exportados: int = 0
+        # Posición del historial hasta la que se exportó, y posiciones (ordenadas) de los
+        # eventos anteriores a ella que aún no se exportan.
+        self.__limite: int = 0
+        self.__faltantes: list[int] = []
+        # Posiciones de los eventos insertados en el historial fuera de su final, desde la
+        # exportación anterior.
+        self.__insertadas = historial.seguir_inserciones()
+
+        # El archivo se reemplaza en la primera exportación.
+        self.__iniciado: bool = False
+
+    def exportar(self) -> int:
+        """Exporta los eventos nuevos del historial.
+
+        Returns
+        -------
+        Entrega la cantidad de eventos exportados en esta llamada.
+        """
+        historial = self.historial
+        faltantes = self.__faltantes
+        for posicion in self.__insertadas:
+            # Los eventos insertados desde el límite en adelante se exportan con el resto.
+            if posicion < self.__limite:
+                i = bisect.bisect_left(faltantes, posicion)
+                for j in range(i, len(faltantes)):
+                    faltantes[j] += 1
+                faltantes.insert(i, posicion)
+                self.__limite += 1
+        del self.__insertadas[:]
+
+        final = len(historial)
+        if self.__iniciado and final <= self.__limite and not self.__faltantes:
+            return 0
+
+        eventos = chain(
+            (historial[posicion] for posicion in self.__faltantes),
+            islice(historial.iterar_desde(self.__limite), final - self.__limite),
+        )
+        bloques = bloques_historial(eventos, self.tamano_bloque)
+
+        cabecera = not self.__iniciado
+        if self.formato == FormatoExportacion.COLUMNAR:
+            with open(self.ruta, "ab" if self.__iniciado else "wb") as archivo:
+                cantidad = _escribir_columnar(archivo, bloques, cabecera)
+        else:
+            with open(
+                self.ruta,
+                "a" if self.__iniciado else "w",
+                encoding="utf-8",
+                newline="",
+            ) as archivo:
+                if self.formato == FormatoExportacion.CSV:
+                    cantidad = _escribir_csv(archivo, bloques, cabecera)
+                else:
+                    cantidad = _escribir_jsonl(archivo, bloques)
+
+        self.__iniciado = True
+        self.__faltantes = []
+        self.__limite = final
+        self.exportados += cantidad
+        return cantidad
+
+    def cerrar(self) -> None:
+        """Deja de seguir las inserciones del historial."""
+        self.historial.dejar_de_seguir(self.__insertadas)
@@ -0,0 +1,161 @@
+import bisect
+import datetime as dt
+from array import array
+from typing import Iterable, Optional
+
+from ppdc_event_manager.eventos import TipoEvento, Evento
+from ppdc_event_manager.historial_eventos import HistorialEventos
+from ppdc_event_manager.registro_binario import CODIGOS_TIPO
+
+# Valor utilizado en las columnas de entidades cuando el evento no tiene el dato.
+SIN_DATO = -(2**63)
+
+
+class HistorialColumnar:
+    """Índice columnar de un [HistorialEventos], para consultarlo sin recorrer los eventos.
+
+    Cada fila corresponde con la posición del evento en el historial, y se guardan en arreglos
+    (módulo [array]):
+    - [tiempos]: microsegundos desde [fecha_base] hasta la ocurrencia del evento.
+    - [tipos]: código del [TipoEvento] (ver [CODIGOS_TIPO]).
+    - [prioridades]: prioridad del evento.
+    - [entidades][campo]: valor entero de `datos[campo]` para cada campo de [CAMPOS_ENTIDAD].
+
+    Además, mantiene índices secundarios (filas ordenadas) por tipo de evento y por entidad.
+    El índice se actualiza con [self.actualizar]: si el historial sólo creció por el final, se
+    agregan las filas nuevas; si no, se reconstruye completo.
+    """
+
+    CAMPOS_ENTIDAD = ("id_tren", "id_estacion_destino", "id_estacion")
+
+    def __init__(self, historial: HistorialEventos, fecha_base: dt.datetime) -> None:
+        self.historial: HistorialEventos = historial
+        self.fecha_base: dt.datetime = fecha_base
+        self.__reiniciar()
+
+    def __reiniciar(self) -> None:
+        self.tiempos = array("q")
+        self.tipos = array("B")
+        self.prioridades = array("q")
+        self.entidades: dict[str, array] = {
+            campo: array("q") for campo in self.CAMPOS_ENTIDAD
+        }
+
+        self.filas_por_tipo: dict[TipoEvento, array] = dict()
+        self.filas_por_entidad: dict[str, dict[int, array]] = {
+            campo: dict() for campo in self.CAMPOS_ENTIDAD
+        }
+        self.__inserciones_intermedias = self.historial.inserciones_intermedias
+
+    def __len__(self) -> int:
+        return len(self.tiempos)
+
+    def __tiempo(self, fecha: dt.datetime) -> int:
+        return (fecha - self.fecha_base) // dt.timedelta(microseconds=1)
+
+    def actualizar(self) -> None:
+        """Agrega al índice los eventos que faltan del historial."""
+        if self.__inserciones_intermedias != self.historial.inserciones_intermedias:
+            self.__reiniciar()
+
+        for fila in range(len(self.tiempos), len(self.historial)):
+            self.__agregar(fila, self.historial[fila])
+
+    def __agregar(self, fila: int, evento: Evento) -> None:
+        self.tiempos.append(self.__tiempo(evento.ocurrencia))
+        self.tipos.append(CODIGOS_TIPO[evento.tipo])
+        self.prioridades.append(evento.prioridad)
+
+        filas_tipo = self.filas_por_tipo.get(evento.tipo)
+        if filas_tipo is None:
+            filas_tipo = self.filas_por_tipo[evento.tipo] = array("q")
+        filas_tipo.append(fila)
+
+        for campo in self.CAMPOS_ENTIDAD:
+            valor = evento.obtener_dato(campo)
+            if not isinstance(valor, int):
+                self.entidades[campo].append(SIN_DATO)
+                continue
+            self.entidades[campo].append(valor)
+            filas_entidad = self.filas_por_entidad[campo].get(valor)
+            if filas_entidad is None:
+                filas_entidad = self.filas_por_entidad[campo][valor] = array("q")
+            filas_entidad.append(fila)
+
+    def consultar(
+        self,
+        desde: Optional[dt.datetime] = None,
+        hasta: Optional[dt.datetime] = None,
+        tipo: Optional[TipoEvento] = None,
+        **entidades: int,
+    ) -> list[int]:
+        """Entrega las filas (posiciones en el historial) de los eventos que cumplen con todos
+        los filtros indicados.
+
+        Parameters
+        ----------
+        desde: Optional[dt.datetime] = None
+            Fecha mínima de ocurrencia (inclusive).
+        hasta: Optional[dt.datetime] = None
+            Fecha máxima de ocurrencia (inclusive).
+        tipo: Optional[TipoEvento] = None
+            Tipo de los eventos buscados.
+        **entidades: int
+            Valores exactos de los campos de [CAMPOS_ENTIDAD], como `id_tren=42`.
+
+        Ejemplo: `consultar(t_8, t_10, TipoEvento.TREN_LLEGADA, id_tren=42)`.
+        """
+        for campo in entidades:
+            if campo not in self.CAMPOS_ENTIDAD:
+                raise Exception(f"[Error] El campo {campo} no está indexado.")
+
+        # Partimos por el índice secundario más selectivo (el de menos filas).
+        candidatas: Optional[array] = None
+        if tipo is not None:
+            candidatas = self.filas_por_tipo.get(tipo, array("q"))
+        for campo, valor in entidades.items():
+            filas = self.filas_por_entidad[campo].get(valor, array("q"))
+            if candidatas is None or len(filas) < len(candidatas):
+                candidatas = filas
+
+        # Como los tiempos están ordenados, el rango de fechas se obtiene con bisect.
+        inicio_t = self.__tiempo(desde) if desde is not None else None
+        final_t = self.__tiempo(hasta) if hasta is not None else None
+        if candidatas is None:
+            i = 0 if inicio_t is None else bisect.bisect_left(self.tiempos, inicio_t)
+            j = len(self.tiempos)
+            if final_t is not None:
+                j = bisect.bisect_right(self.tiempos, final_t)
+            filas_rango: Iterable[int] = range(i, j)
+        else:
+            tiempo_fila = self.tiempos.__getitem__
+            i = 0
+            if inicio_t is not None:
+                i = bisect.bisect_left(candidatas, inicio_t, key=tiempo_fila)
+            j = len(candidatas)
+            if final_t is not None:
+                j = bisect.bisect_right(candidatas, final_t, key=tiempo_fila)
+            filas_rango = candidatas[i:j]
+
+        codigo = CODIGOS_TIPO[tipo] if tipo is not None else None
+        out = []
+        for fila in filas_rango:
+            if codigo is not None and self.tipos[fila] != codigo:
+                continue
+            if any(self.entidades[c][fila] != v for c, v in entidades.items()):
+                continue
+            out.append(fila)
+        return out
+
+    def eventos(
+        self,
+        desde: Optional[dt.datetime] = None,
+        hasta: Optional[dt.datetime] = None,
+        tipo: Optional[TipoEvento] = None,
+        **entidades: int,
+    ) -> list[Evento]:
+        """Igual que [self.consultar], pero entrega los eventos en vez de sus filas."""
+        return [
+            self.historial[fila]
+            for fila in self.consultar(desde, hasta, tipo, **entidades)
+        ]
@@ -0,0 +1,282 @@
+import bisect
+import datetime as dt
+import heapq
+from array import array
+from collections.abc import Sequence
+from itertools import islice
+from operator import attrgetter
+from typing import Iterable, Iterator, Optional, Union
+
+from ppdc_event_manager.eventos import Evento
+from ppdc_event_manager.colas.cola_eventos import clave_orden
+from ppdc_event_manager.retencion import PoliticaRetencion
+
+
+class HistorialEventos(Sequence):
+    """Secuencia ordenada de los eventos que ya ocurrieron en una [LineaDeEventos].
+
+    Para que crear variantes sea barato, el historial se compone de:
+    - Tramos de sólo lectura: prefijos de historiales de otras líneas, compartidos con ellas.
+    - Eventos propios: la parte del historial que pertenece sólo a esta línea.
+
+    Crear una rama ([self.crear_rama]) no copia eventos: la nueva línea sólo guarda referencias
+    a los tramos de ésta. Si luego se necesita modificar una parte compartida (por ejemplo, al
+    insertar un evento más antiguo), esa parte se copia antes de modificarla (copy-on-write).
+
+    Con una [PoliticaRetencion], los eventos propios más antiguos se escriben a segmentos en
+    disco, que pasan a ser tramos más del historial. Estos segmentos no se vuelven a cargar en
+    memoria: no se pueden insertar eventos anteriores al último evento escrito a disco.
+    """
+
+    def __init__(
+        self,
+        eventos: Optional[Iterable[Evento]] = None,
+        politica: Optional[PoliticaRetencion] = None,
+    ) -> None:
+        # Tramos compartidos: pares (secuencia, largo), de los cuales se utilizan
+        # sólo los primeros [largo] eventos de la secuencia.
+        self._tramos: list[tuple[Sequence, int]] = []
+        # Posición (dentro del historial) en la que comienza cada tramo.
+        self._inicios: list[int] = []
+        self._largo_tramos: int = 0
+        # Cantidad de eventos, al inicio del historial, escritos a disco por [self.politica].
+        self._largo_retenido: int = 0
+
+        self._propios: list[Evento] = list(eventos) if eventos is not None else []
+        # Cantidad de eventos, al inicio de [_propios], que están compartidos con ramas.
+        self._compartidos: int = 0
+        # Cuenta las inserciones que no fueron al final del historial. Permite a los índices
+        # derivados (como [HistorialColumnar]) saber si basta con agregar los eventos nuevos.
+        self.inserciones_intermedias: int = 0
+        # Arreglos de quienes siguen las inserciones intermedias (ver [self.seguir_inserciones]).
+        self.__seguidores: list[array] = []
+
+        self.politica: Optional[PoliticaRetencion] = politica
+
+    def seguir_inserciones(self) -> array:
+        """Entrega un arreglo al que, desde ahora, se agrega la posición final de cada evento
+        insertado fuera del final del historial, en el orden en que se insertan (los de una
+        misma llamada, de menor a mayor). Permite a quienes recorren el historial por posición
+        (como [ExportadorHistorial]) ubicar esos eventos.
+
+        Quien lo recibe debe vaciarlo después de procesarlo, y llamar a
+        [self.dejar_de_seguir] cuando ya no lo necesite.
+        """
+        posiciones = array("q")
+        self.__seguidores.append(posiciones)
+        return posiciones
+
+    def dejar_de_seguir(self, posiciones: array) -> None:
+        self.__seguidores = [s for s in self.__seguidores if s is not posiciones]
+
+    @classmethod
+    def desde_secuencia(
+        cls, secuencia: Sequence, largo: Optional[int] = None
+    ) -> "HistorialEventos":
+        """Crea un historial que utiliza los primeros [largo] eventos de [secuencia] como un
+        tramo de sólo lectura, sin copiarlos. Por ejemplo, un [LectorRegistro], cuyos eventos
+        se leen desde el disco sólo cuando se necesitan."""
+        historial = cls()
+        if largo is None:
+            largo = len(secuencia)
+        if largo > 0:
+            historial.__agregar_tramo(secuencia, largo)
+        return historial
+
+    def __len__(self) -> int:
+        return self._largo_tramos + len(self._propios)
+
+    def __getitem__(self, indice: Union[int, slice]):
+        if isinstance(indice, slice):
+            return [self[i] for i in range(*indice.indices(len(self)))]
+        if indice < 0:
+            indice += len(self)
+        if indice < 0 or indice >= len(self):
+            raise IndexError("[Error] Índice fuera del historial de eventos.")
+
+        if indice >= self._largo_tramos:
+            return self._propios[indice - self._largo_tramos]
+        j = bisect.bisect_right(self._inicios, indice) - 1
+        return self._tramos[j][0][indice - self._inicios[j]]
+
+    def __iter__(self) -> Iterator[Evento]:
+        for secuencia, largo in self._tramos:
+            yield from islice(secuencia, largo)
+        yield from self._propios
+
+    def iterar_desde(self, posicion: int) -> Iterator[Evento]:
+        """Recorre el historial desde [posicion], sin recorrer los eventos anteriores."""
+        if posicion < self._largo_tramos:
+            j = bisect.bisect_right(self._inicios, posicion) - 1
+            desde = posicion - self._inicios[j]
+            for secuencia, largo in self._tramos[j:]:
+                if desde == 0:
+                    yield from islice(secuencia, largo)
+                else:
+                    # Por índice, para no leer los eventos omitidos (como en [LectorRegistro]).
+                    for i in range(desde, largo):
+                        yield secuencia[i]
+                    desde = 0
+        yield from islice(
+            self._propios, max(0, posicion - self._largo_tramos), None
+        )
+
+    def __repr__(self) -> str:
+        return f"HistorialEventos({list(self)!r})"
+
+    def indice_hasta(self, fecha: dt.datetime) -> int:
+        """Entrega la cantidad de eventos que ocurrieron hasta [fecha] (inclusive),
+        utilizando búsqueda binaria."""
+        return bisect.bisect_right(self, fecha, key=attrgetter("ocurrencia"))
+
+    def crear_rama(self, largo: Optional[int] = None) -> "HistorialEventos":
+        """Crea un nuevo historial con los primeros [largo] eventos de éste (por defecto, todos),
+        compartiendo su memoria en vez de copiarlos."""
+        if largo is None:
+            largo = len(self)
+        rama = HistorialEventos(politica=self.politica)
+        rama._largo_retenido = min(self._largo_retenido, largo)
+
+        for (secuencia, largo_tramo), inicio in zip(self._tramos, self._inicios):
+            if inicio >= largo:
+                break
+            rama.__agregar_tramo(secuencia, min(largo_tramo, largo - inicio))
+
+        if largo > self._largo_tramos:
+            compartidos = largo - self._largo_tramos
+            rama.__agregar_tramo(self._propios, compartidos)
+            self._compartidos = max(self._compartidos, compartidos)
+        return rama
+
+    def copy(self) -> "HistorialEventos":
+        return self.crear_rama()
+
+    def __agregar_tramo(self, secuencia: Sequence, largo: int) -> None:
+        self._tramos.append((secuencia, largo))
+        self._inicios.append(self._largo_tramos)
+        self._largo_tramos += largo
+
+    def __propios_desde(self, posicion: int) -> int:
+        """Asegura que desde [posicion] en adelante el historial sea propio y no compartido,
+        copiando lo que sea necesario.
+
+        Returns
+        -------
+        Entrega la posición equivalente dentro de [self._propios].
+        """
+        if posicion < self._largo_retenido:
+            raise Exception(
+                "[Error] No se puede insertar un evento anterior a los que la política de "
+                "retención ya escribió a disco."
+            )
+        if posicion < self._largo_tramos:
+            j = bisect.bisect_right(self._inicios, posicion) - 1
+            propios: list[Evento] = []
+            for secuencia, largo in self._tramos[j:]:
+                propios.extend(islice(secuencia, largo))
+            propios.extend(self._propios)
+
+            self._propios = propios
+            self._compartidos = 0
+            self._largo_tramos = self._inicios[j]
+            del self._tramos[j:]
+            del self._inicios[j:]
+        elif posicion - self._largo_tramos < self._compartidos:
+            self._propios = self._propios.copy()
+            self._compartidos = 0
+        return posicion - self._largo_tramos
+
+    def insertar(self, evento: Evento) -> None:
+        """Inserta ordenadamente un evento. Si empata con otros eventos en fecha y prioridad,
+        queda antes de ellos."""
+        if not self or clave_orden(self[-1]) < clave_orden(evento):
+            self._propios.append(evento)
+        else:
+            posicion = bisect.bisect_left(self, clave_orden(evento), key=clave_orden)
+            desde = self.__propios_desde(posicion)
+            self._propios.insert(desde, evento)
+            self.inserciones_intermedias += 1
+            for seguidor in self.__seguidores:
+                seguidor.append(self._largo_tramos + desde)
+
+        if self.politica is not None:
+            self.__aplicar_retencion()
+
+    def insertar_varios(self, eventos: Iterable[Evento]) -> None:
+        """Inserta varios eventos, con el mismo resultado que llamar a [self.insertar]
+        con cada uno, pero en una sola pasada si los eventos vienen ordenados."""
+        nuevos = list(eventos)
+        if not nuevos:
+            return
+
+        # Al insertar de a uno, cada evento queda antes de aquellos con los que empata.
+        # Por eso, los grupos de empates quedan en orden inverso al de inserción.
+        ordenados = True
+        for i in range(1, len(nuevos)):
+            if clave_orden(nuevos[i]) < clave_orden(nuevos[i - 1]):
+                ordenados = False
+                break
+        if ordenados:
+            invertidos: list[Evento] = []
+            inicio_grupo = 0
+            for i in range(1, len(nuevos) + 1):
+                if i == len(nuevos) or clave_orden(nuevos[i]) != clave_orden(
+                    nuevos[inicio_grupo]
+                ):
+                    invertidos.extend(reversed(nuevos[inicio_grupo:i]))
+                    inicio_grupo = i
+            nuevos = invertidos
+        else:
+            nuevos = sorted(reversed(nuevos), key=clave_orden)
+
+        if not self or clave_orden(self[-1]) < clave_orden(nuevos[0]):
+            self._propios.extend(nuevos)
+        else:
+            # Sólo se mezcla la parte del historial posterior al primer evento nuevo.
+            # Ante empates, [heapq.merge] deja primero a los eventos nuevos.
+            posicion = bisect.bisect_left(self, clave_orden(nuevos[0]), key=clave_orden)
+            desde = self.__propios_desde(posicion)
+            self._propios[desde:] = list(
+                heapq.merge(nuevos, self._propios[desde:], key=clave_orden)
+            )
+            self.inserciones_intermedias += 1
+            if self.__seguidores:
+                ids_nuevos = set(map(id, nuevos))
+                posiciones = [
+                    self._largo_tramos + i
+                    for i in range(desde, len(self._propios))
+                    if id(self._propios[i]) in ids_nuevos
+                ]
+                for seguidor in self.__seguidores:
+                    seguidor.extend(posiciones)
+
+        if self.politica is not None:
+            self.__aplicar_retencion()
+
+    def __aplicar_retencion(self) -> None:
+        """Escribe a disco los eventos propios más antiguos, según [self.politica]."""
+        politica = self.politica
+        if politica is None:
+            return
+        propios = self._propios
+        if len(propios) < politica.tamano_segmento:
+            return
+
+        sobrantes = 0
+        if politica.max_eventos is not None:
+            sobrantes = len(propios) - politica.max_eventos
+        if politica.max_tiempo is not None:
+            limite = propios[-1].ocurrencia - politica.max_tiempo
+            antiguos = bisect.bisect_left(
+                propios, limite, key=attrgetter("ocurrencia")
+            )
+            sobrantes = max(sobrantes, antiguos)
+        if sobrantes < politica.tamano_segmento:
+            return
+
+        segmento = politica.escribir_segmento(islice(propios, sobrantes))
+        self.__agregar_tramo(segmento, sobrantes)
+        self._largo_retenido = self._largo_tramos
+        # Se crea una nueva lista, ya que la anterior puede estar compartida con ramas.
+        self._propios = propios[sobrantes:]
+        self._compartidos = 0
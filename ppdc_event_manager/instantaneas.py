@@ -0,0 +1,165 @@
+import bisect
+import copy
+import datetime as dt
+from itertools import islice
+from typing import Any, Callable, Optional
+
+from ppdc_event_manager.eventos import TipoEvento, Evento
+
+# Aplica un evento del historial sobre una copia del estado, como `aplicador(estado, evento)`.
+Aplicador = Callable[[Any, Evento], None]
+
+
+class Instantanea:
+    """Copia del estado de la simulación después de un lote de eventos."""
+
+    __slots__ = ("fecha", "posicion", "estado")
+
+    def __init__(self, fecha: dt.datetime, posicion: int, estado: Any) -> None:
+        self.fecha: dt.datetime = fecha
+        # Largo del historial al tomar la instantánea.
+        self.posicion: int = posicion
+        self.estado: Any = estado
+
+
+class Instantaneas:
+    """Instantáneas periódicas del estado de una [LineaDeEventos], para reconstruir el estado
+    en cualquier fecha pasada sin repetir todo el historial: se parte desde la instantánea más
+    cercana anterior a la fecha, y se aplican sólo los eventos siguientes (ver [self.rebobinar]).
+
+    Los handlers de la simulación no se vuelven a ejecutar, ya que modifican el estado en curso.
+    En su lugar, cada [TipoEvento] que modifique el estado necesita un [Aplicador] que repita
+    su efecto sobre una copia del estado. Los tipos sin aplicador se omiten.
+
+    Si se inserta un evento en el historial con una fecha ya cubierta por alguna instantánea
+    (por ejemplo, un MODIFICACION_SISTEMA en la fecha actual), esas instantáneas se descartan,
+    y se toma una nueva en la fecha actual.
+
+    Se crea con [LineaDeEventos.activar_instantaneas].
+    """
+
+    def __init__(
+        self,
+        linea: Any,
+        aplicadores: dict[TipoEvento, Aplicador],
+        cada_eventos: Optional[int] = None,
+        cada_tiempo: Optional[dt.timedelta] = None,
+        capturar: Optional[Callable[[Any], Any]] = None,
+        max_instantaneas: Optional[int] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        aplicadores: dict[TipoEvento, Aplicador]
+            Funciones que repiten el efecto de cada tipo de evento sobre una copia del estado.
+        cada_eventos: Optional[int] = None
+            Se toma una instantánea cada vez que ocurren al menos esta cantidad de eventos.
+        cada_tiempo: Optional[dt.timedelta] = None
+            Se toma una instantánea cada vez que avanza al menos este tiempo simulado.
+        capturar: Optional[Callable[[Any], Any]] = None
+            Crea una copia independiente del estado. Por defecto, utiliza [copy.deepcopy], sin
+            copiar la [LineaDeEventos] (las copias siguen apuntando a la línea en curso).
+        max_instantaneas: Optional[int] = None
+            Cantidad máxima de instantáneas guardadas. Al superarla, se descarta la más antigua.
+        """
+        if cada_eventos is None and cada_tiempo is None:
+            raise Exception(
+                "[Error] Las instantáneas necesitan [cada_eventos] o [cada_tiempo]."
+            )
+        self.linea = linea
+        self.aplicadores: dict[TipoEvento, Aplicador] = aplicadores
+        self.cada_eventos: Optional[int] = cada_eventos
+        self.cada_tiempo: Optional[dt.timedelta] = cada_tiempo
+        self.capturar: Callable[[Any], Any] = capturar or self.__copiar
+        self.max_instantaneas: Optional[int] = max_instantaneas
+
+        # Ordenadas por fecha.
+        self.instantaneas: list[Instantanea] = []
+        self.__eventos_desde_ultima: int = 0
+        # Fecha del último evento ingresado al historial desde que se activaron.
+        self.fecha_actual: dt.datetime = linea.fecha_actual
+        # Si es True, falta una instantánea en [self.fecha_actual] (ver [self.al_insertar]).
+        self.__pendiente: bool = False
+        self.tomar(self.fecha_actual)
+
+    def __copiar(self, estado: Any) -> Any:
+        return copy.deepcopy(estado, {id(self.linea): self.linea})
+
+    def tomar(self, fecha: dt.datetime) -> Instantanea:
+        """Toma una instantánea del estado actual, correspondiente a [fecha]."""
+        historial = self.linea.historial_eventos
+        instantanea = Instantanea(
+            fecha, len(historial), self.capturar(self.linea.estado_simulacion)
+        )
+        # Una nueva instantánea reemplaza a las que tengan la misma fecha o una posterior.
+        while self.instantaneas and self.instantaneas[-1].fecha >= fecha:
+            self.instantaneas.pop()
+        self.instantaneas.append(instantanea)
+        if self.max_instantaneas is not None and len(self.instantaneas) > self.max_instantaneas:
+            del self.instantaneas[0]
+        self.__eventos_desde_ultima = 0
+        self.__pendiente = False
+        return instantanea
+
+    def al_insertar(self, eventos: list[Evento]) -> None:
+        """Llamado por [LineaDeEventos] al insertar eventos en el historial. Descarta las
+        instantáneas tomadas en la fecha del primer evento o después, ya que no incluyen su
+        efecto, y sus posiciones en el historial dejan de ser válidas."""
+        fecha = min(evento.ocurrencia for evento in eventos)
+        self.fecha_actual = max(
+            self.fecha_actual, max(evento.ocurrencia for evento in eventos)
+        )
+        if not self.instantaneas or fecha > self.instantaneas[-1].fecha:
+            return
+        while self.instantaneas and self.instantaneas[-1].fecha >= fecha:
+            self.instantaneas.pop()
+        # La nueva instantánea se toma antes del próximo lote, al terminar el lote en curso,
+        # o al rebobinar, para no copiar el estado con cada inserción.
+        self.__pendiente = True
+
+    def antes_de_consumir(self) -> None:
+        """Llamado por [LineaDeEventos] antes de ejecutar cada lote."""
+        if self.__pendiente:
+            self.tomar(self.fecha_actual)
+
+    def al_consumir(self, eventos: list[Evento]) -> None:
+        """Observador de [LineaDeEventos]: decide si tomar una instantánea después de un lote."""
+        self.__eventos_desde_ultima += len(eventos)
+        fecha = self.fecha_actual = max(self.fecha_actual, eventos[-1].ocurrencia)
+        if self.__pendiente or (
+            self.cada_eventos is not None
+            and self.__eventos_desde_ultima >= self.cada_eventos
+        ) or (
+            self.cada_tiempo is not None
+            and fecha - self.instantaneas[-1].fecha >= self.cada_tiempo
+        ):
+            self.tomar(fecha)
+
+    def rebobinar(self, fecha: dt.datetime) -> Any:
+        """Reconstruye el estado de la simulación después de los eventos ocurridos hasta
+        [fecha] (inclusive). No modifica el estado en curso ni la línea.
+
+        Returns
+        -------
+        Entrega una nueva copia del estado.
+        """
+        if self.__pendiente:
+            self.tomar(self.fecha_actual)
+        fechas = [instantanea.fecha for instantanea in self.instantaneas]
+        i = bisect.bisect_right(fechas, fecha) - 1
+        if i < 0:
+            raise Exception(
+                f"[Error] No hay instantáneas anteriores a {fecha} para rebobinar."
+            )
+        instantanea = self.instantaneas[i]
+        estado = self.capturar(instantanea.estado)
+
+        historial = self.linea.historial_eventos
+        desde = instantanea.posicion
+        hasta = historial.indice_hasta(fecha)
+
+        for evento in islice(historial.iterar_desde(desde), max(0, hasta - desde)):
+            aplicador = self.aplicadores.get(evento.tipo)
+            if aplicador is not None:
+                aplicador(estado, evento)
+        return estado
@@ -1,8 +1,53 @@
+import copy
 import datetime as dt
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
 from enum import Enum
-from typing import Any, Callable, Dict, List, Optional, Iterable
+from typing import Any, Callable, Dict, Hashable, List, Optional, Iterable, Union
 
-from ppdc_event_manager.eventos import TipoEvento, Evento
+from ppdc_event_manager.eventos import TipoEvento, Evento, EventoRecurrente
+from ppdc_event_manager.colas import ColaEventos, MotorCola, crear_cola
+from ppdc_event_manager.coalescencia import (
+    COALESCENCIAS_POR_DEFECTO,
+    ClaveCoalescencia,
+    Coalescencia,
+    FusionarEventos,
+    MomentoCoalescencia,
+)
+from ppdc_event_manager.concurrencia import CAMPOS_CONFLICTO, agrupar_sin_conflictos
+from ppdc_event_manager.historial_eventos import HistorialEventos
+from ppdc_event_manager.historial_columnar import HistorialColumnar
+from ppdc_event_manager.exportacion import ExportadorHistorial, FormatoExportacion
+from ppdc_event_manager.instantaneas import Aplicador, Instantaneas
+from ppdc_event_manager.metricas import Metricas
+from ppdc_event_manager.retencion import PoliticaRetencion
+from ppdc_event_manager.registro_binario import (
+    RegistroBinario,
+    guardar_punto_control,
+    leer_punto_control,
+)
+
+
+class EstadisticasEjecucion:
+    """Resumen entregado por [LineaDeEventos.avanzar_hasta] y [LineaDeEventos.ejecutar]."""
+
+    def __init__(self, fecha_inicio: dt.datetime) -> None:
+        self.eventos: int = 0
+        # Cantidad de grupos de eventos que compartían fecha de ocurrencia.
+        self.lotes: int = 0
+        self.fecha_inicio: dt.datetime = fecha_inicio
+        self.fecha_final: dt.datetime = fecha_inicio
+        # Tiempo real (en segundos) que tomó la ejecución.
+        self.duracion: float = 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"EstadisticasEjecucion(eventos={self.eventos}, lotes={self.lotes}, "
+            f"fecha_inicio={self.fecha_inicio}, fecha_final={self.fecha_final}, "
+            f"duracion={self.duracion:.6f})"
+        )
 
 
 class LineaDeEventos:
@@ -13,71 +58,504 @@ class LineaDeEventos:
     tener acceso a todos los otros componentes que necesitemos.
     """
 
-    def __init__(self, estado_simulacion: Any, fecha_inicial: dt.datetime):
+    def __init__(
+        self,
+        estado_simulacion: Any,
+        fecha_inicial: dt.datetime,
+        motor: MotorCola = MotorCola.HEAP,
+        compactar_historial: bool = False,
+        retencion: Optional[PoliticaRetencion] = None,
+    ):
+        """
+        Parameters
+        ----------
+        motor: MotorCola = MotorCola.HEAP
+            Estructura utilizada para los eventos futuros. [MotorCola.LISTA] corresponde con
+            la lista ordenada original, y se mantiene para poder comparar los motores.
+            [MotorCola.CALENDARIO] conviene cuando los eventos caen en minutos exactos.
+        compactar_historial: bool = False
+            Si es True, los eventos que ingresan al historial se compactan con
+            [Evento.compactar]: su fecha se guarda como un desplazamiento desde
+            [fecha_inicial] y se libera su handler.
+        retencion: Optional[PoliticaRetencion] = None
+            Si se indica, sólo los eventos más recientes del historial se mantienen en
+            memoria, y el resto se escribe a disco (ver [PoliticaRetencion]).
+        """
         self.estado_simulacion: Any = estado_simulacion
         self.fecha_inicial = fecha_inicial
         self.fecha_actual = fecha_inicial
+        self.motor: MotorCola = motor
+        self.compactar_historial: bool = compactar_historial
 
-        self.eventos: list[Evento] = []
-        self.historial_eventos: list[Evento] = []
-
-    def __insertar_desde_final(self, lista_eventos: list[Evento], evento: Evento):
-        """Esta función utilitaria nos sirve para insertar ordenadamente eventos, que posiblemente
-        serán más actuales que los registrados.
-        La idea es que sólo se utilicen internamente (desde dentro de la clase), no expuesta al usuario."""
-        for i in range(len(lista_eventos) - 1, -1, -1):
-            ev_en_lista = lista_eventos[i]
-            if ev_en_lista.ocurrencia < evento.ocurrencia or (
-                ev_en_lista.ocurrencia == evento.ocurrencia
-                and ev_en_lista.prioridad < evento.prioridad
-            ):
-                lista_eventos.insert(i + 1, evento)
-                return
-        # Si no, lo ponemos al principio.
-        lista_eventos.insert(0, evento)
-
-    def __insertar_desde_inicio(self, lista_eventos: list[Evento], evento: Evento):
-        """Esta función utilitaria nos sirve para insertar ordenadamente eventos, que posiblemente
-        serán más próximos que los registrados.
-        La idea es que sólo se utilicen internamente (desde dentro de la clase), no expuesta al usuario."""
-        for i in range(len(lista_eventos)):
-            ev_en_lista = lista_eventos[i]
-
-            if ev_en_lista.ocurrencia > evento.ocurrencia or (
-                ev_en_lista.ocurrencia == evento.ocurrencia
-                and ev_en_lista.prioridad > evento.prioridad
-            ):
-                lista_eventos.insert(i, evento)
-                return
-        # Si no, lo ponemos al final.
-        lista_eventos.append(evento)
+        # Contador de ids propio de esta línea temporal (ver [self.crear_evento]), de manera
+        # que dos simulaciones independientes asignen los mismos ids.
+        self.next_id_evento: int = 0
+
+        self.eventos: ColaEventos = crear_cola(motor, fecha_inicial)
+        self.historial_eventos: HistorialEventos = HistorialEventos(politica=retencion)
+        self.__historial_columnar: Optional[HistorialColumnar] = None
+        # Exportadores del historial, por ruta, para las exportaciones incrementales.
+        self.__exportadores: dict[str, ExportadorHistorial] = dict()
+
+        # Handlers registrados por tipo, para eventos sin handler propio.
+        self.handlers: dict[TipoEvento, Callable] = dict()
+        self.__handlers_por_lote: set[TipoEvento] = set()
+
+        # Eventos recurrentes activos, por su id, y según el id de su instancia pendiente.
+        self.recurrentes: dict[int, EventoRecurrente] = dict()
+        self.__recurrente_por_evento: dict[int, EventoRecurrente] = dict()
+        self.__next_id_recurrente: int = 0
+
+        # Registro binario opcional, donde se escribe cada evento que entra al historial.
+        self.registro: Optional[RegistroBinario] = None
+
+        # Métricas de ejecución, desactivadas por defecto (ver [self.activar_metricas]).
+        self.metricas: Optional[Metricas] = None
+
+        # Ejecución concurrente de los lotes (ver [self.configurar_concurrencia]).
+        self.ejecutor: Optional[Executor] = None
+        self.campos_conflicto: dict[str, str] = CAMPOS_CONFLICTO
+        # Mientras se ejecutan grupos en paralelo, los eventos futuros que agenda cada grupo
+        # se acumulan en su propia lista ([__local.agendados]), cada grupo asigna ids de su
+        # propio rango ([__local.ids]), y el resto de los cambios a la línea se protegen con
+        # [__candado]. Cada hilo guarda también el evento que está ejecutando
+        # ([__local.evento_en_curso]), si [self.seguir_evento_en_curso].
+        self.__concurrente: bool = False
+        self.__local = threading.local()
+        self.__candado = threading.RLock()
+
+        # Si se define, recibe cada evento futuro antes de insertarlo. Si entrega True, el
+        # evento fue tomado por el enrutador (por ejemplo, para enviarlo a otra región de una
+        # [SimulacionParticionada]) y no se inserta en esta línea.
+        self.enrutador: Optional[Callable[[Evento], bool]] = None
+        # Si es True, se registra el evento en curso (ver [self.evento_en_curso]). Se activa
+        # sólo cuando se necesita (ej: en las regiones de una [SimulacionParticionada]), para no
+        # escribirlo con cada evento ejecutado.
+        self.seguir_evento_en_curso: bool = False
+
+        # Funciones llamadas con cada lote, después de insertarlo en el historial, y con
+        # cada grupo de eventos insertados en el historial (ver [self.agregar_observador]).
+        self.__observadores: list[Callable[[list[Evento]], None]] = []
+        self.__observadores_historial: list[Callable[[list[Evento]], None]] = []
+        self.instantaneas: Optional[Instantaneas] = None
+
+        # Fusión de eventos pendientes redundantes, por tipo (ver [self.registrar_coalescencia]).
+        self.coalescencias: dict[TipoEvento, Coalescencia] = dict()
+        self.__tipos_coalescencia_insercion: set[TipoEvento] = set()
+        self.__tipos_coalescencia_extraccion: set[TipoEvento] = set()
+        # Último evento pendiente de cada tipo y clave, para fusionarlo al insertar.
+        self.__pendiente_por_clave: dict[tuple[TipoEvento, Hashable], Evento] = dict()
+        # Cantidad de eventos que desaparecieron al fusionarse con otro.
+        self.eventos_coalescidos: int = 0
+
+    @property
+    def evento_en_curso(self) -> Optional[Evento]:
+        """Evento cuyo handler se está ejecutando en este hilo (con un handler por lote, el
+        primero del lote), o None fuera de los handlers. Al agendar la siguiente instancia de un
+        evento recurrente, después del lote, es la instancia que acaba de ocurrir.
+
+        Sólo se registra con [self.seguir_evento_en_curso]; si no, siempre es None."""
+        return getattr(self.__local, "evento_en_curso", None)
+
+    def nuevo_id_evento(self) -> int:
+        """Entrega un nuevo id de evento, utilizando el contador de esta línea."""
+        if self.__concurrente:
+            ids = getattr(self.__local, "ids", None)
+            if ids is not None:
+                id_evento = ids[0]
+                ids[0] += ids[1]
+                return id_evento
+            with self.__candado:
+                id_evento = self.next_id_evento
+                self.next_id_evento += 1
+            return id_evento
+        id_evento = self.next_id_evento
+        self.next_id_evento += 1
+        return id_evento
+
+    def crear_evento(
+        self,
+        tipo: TipoEvento,
+        ocurrencia: dt.datetime,
+        handler: Optional[Callable] = None,
+        prioridad: int = 0,
+        ha_ocurrido: bool = False,
+    ) -> Evento:
+        """Crea un [Evento] con un id de esta línea, en vez del contador global de [Evento].
+        Así los ids no dependen de otras simulaciones en el mismo proceso (por ejemplo, al
+        ejecutar réplicas). No inserta el evento."""
+        return Evento(
+            tipo, ocurrencia, handler, prioridad, ha_ocurrido, id=self.nuevo_id_evento()
+        )
 
     def insertar_evento_pasado(self, evento: Evento) -> None:
-        self.__insertar_desde_final(self.historial_eventos, evento)
+        if self.__concurrente:
+            with self.__candado:
+                self.__insertar_evento_pasado(evento)
+            return
+        self.__insertar_evento_pasado(evento)
+
+    def __insertar_evento_pasado(self, evento: Evento) -> None:
+        if self.compactar_historial and evento.ha_ocurrido:
+            evento.compactar(self.fecha_inicial)
+        self.historial_eventos.insertar(evento)
+        if self.registro is not None:
+            self.registro.escribir(evento)
+        for observador in self.__observadores_historial:
+            observador([evento])
 
     def insertar_eventos_pasados(self, eventos: Iterable[Evento]) -> None:
-        for e in eventos:
-            self.insertar_evento_pasado(e)
+        """Inserta varios eventos al historial, con el mismo resultado que llamar a
+        [self.insertar_evento_pasado] con cada uno, pero en una sola pasada si los eventos
+        vienen ordenados."""
+        nuevos = list(eventos)
+        if self.compactar_historial:
+            for evento in nuevos:
+                if evento.ha_ocurrido:
+                    evento.compactar(self.fecha_inicial)
+        self.historial_eventos.insertar_varios(nuevos)
+        if self.registro is not None:
+            self.registro.escribir_varios(nuevos)
+        if nuevos:
+            for observador in self.__observadores_historial:
+                observador(nuevos)
 
     def insertar_evento_futuro(self, evento: Evento) -> None:
-        self.__insertar_desde_inicio(self.eventos, evento)
+        if self.__concurrente:
+            self.__local.agendados.append(evento)
+            return
+        self.__agendar(evento)
+
+    def __agendar(self, evento: Evento) -> None:
+        """Entrega el evento al enrutador o, si no lo toma, lo inserta en la cola (con su
+        coalescencia y métricas)."""
+        if self.enrutador is not None and self.enrutador(evento):
+            return
+        if evento.id >= self.next_id_evento:
+            # Eventos creados sin [self.crear_evento]: evitamos repetir su id más adelante.
+            self.next_id_evento = evento.id + 1
+        self.__insertar_en_cola(evento)
+
+    def __insertar_en_cola(self, evento: Evento) -> None:
+        if evento.tipo in self.__tipos_coalescencia_insercion:
+            evento = self.__coalescer_al_insertar(evento)
+        metricas = self.metricas
+        if metricas is None:
+            self.eventos.insertar(evento)
+            return
+        inicio = time.perf_counter_ns()
+        self.eventos.insertar(evento)
+        metricas.insercion.registrar(time.perf_counter_ns() - inicio)
+
+    def insertar_eventos_futuros(self, eventos: Iterable[Evento]) -> None:
+        """Inserta varios eventos futuros a la vez. Para cargas grandes (como la demanda de
+        un día completo) es mucho más rápido que insertarlos de a uno."""
+        if self.__concurrente:
+            self.__local.agendados.extend(eventos)
+            return
+        if self.enrutador is not None:
+            nuevos = [e for e in eventos if not self.enrutador(e)]
+        else:
+            nuevos = list(eventos)
+        if not nuevos:
+            return
+        id_maximo = max(e.id for e in nuevos)
+        if id_maximo >= self.next_id_evento:
+            self.next_id_evento = id_maximo + 1
+
+        if self.__tipos_coalescencia_insercion:
+            # Se fusiona cada evento en su turno, como al insertarlos de a uno: el resultado
+            # de una fusión ocupa la posición del evento más reciente. Luego se insertan los
+            # que quedan, en su orden.
+            tipos = self.__tipos_coalescencia_insercion
+            por_insertar: dict[int, Evento] = dict()
+            for evento in nuevos:
+                if evento.tipo in tipos:
+                    evento = self.__coalescer_al_insertar(evento, por_insertar)
+                por_insertar[evento.id] = evento
+            nuevos = list(por_insertar.values())
+
+        metricas = self.metricas
+        if metricas is None:
+            self.eventos.insertar_varios(nuevos)
+            return
+        inicio = time.perf_counter_ns()
+        self.eventos.insertar_varios(nuevos)
+        duracion = time.perf_counter_ns() - inicio
+        metricas.insercion.registrar(duracion // len(nuevos), len(nuevos))
+
+    def agendar_recurrente(
+        self,
+        tipo: TipoEvento,
+        inicio: dt.datetime,
+        intervalo: dt.timedelta,
+        hasta: Optional[dt.datetime] = None,
+        handler: Optional[Callable] = None,
+        prioridad: int = 0,
+        datos: Optional[dict[str, Any]] = None,
+    ) -> EventoRecurrente:
+        """Agenda un evento que se repite cada [intervalo], desde [inicio] hasta [hasta].
+        Sólo la próxima instancia se mantiene en la cola: al ocurrir, se agenda la siguiente.
+        Ver [EventoRecurrente] para el detalle de los parámetros.
+
+        Returns
+        -------
+        Entrega el [EventoRecurrente], cuyo id permite cancelarlo con [self.cancelar_recurrente].
+        """
+        recurrente = EventoRecurrente(
+            self.__next_id_recurrente,
+            tipo,
+            inicio,
+            intervalo,
+            hasta,
+            handler,
+            prioridad,
+            datos,
+        )
+        self.__next_id_recurrente += 1
+        self.recurrentes[recurrente.id] = recurrente
+        self.__agendar_instancia(recurrente, inicio)
+        return recurrente
+
+    def __agendar_instancia(
+        self, recurrente: EventoRecurrente, ocurrencia: dt.datetime
+    ) -> None:
+        evento = recurrente.crear_instancia(ocurrencia, self.nuevo_id_evento())
+        if evento is None:
+            # Terminaron sus repeticiones.
+            recurrente.id_evento_pendiente = None
+            self.recurrentes.pop(recurrente.id, None)
+            return
+        recurrente.id_evento_pendiente = evento.id
+        self.__recurrente_por_evento[evento.id] = recurrente
+        self.insertar_evento_futuro(evento)
+
+    def cancelar_recurrente(self, id_recurrente: int) -> Optional[EventoRecurrente]:
+        """Detiene un evento recurrente, cancelando su instancia pendiente.
+
+        Returns
+        -------
+        Entrega el [EventoRecurrente] cancelado, o None si no estaba activo.
+        """
+        recurrente = self.recurrentes.pop(id_recurrente, None)
+        if recurrente is not None and recurrente.id_evento_pendiente is not None:
+            self.cancelar_evento(recurrente.id_evento_pendiente)
+        return recurrente
+
+    def buscar_evento(self, id_evento: int) -> Optional[Evento]:
+        """Entrega el evento futuro con el id indicado, o None si no está agendado."""
+        return self.eventos.buscar(id_evento)
+
+    def cancelar_evento(self, id_evento: int) -> Optional[Evento]:
+        """Quita un evento futuro utilizando su id, sin recorrer la lista de eventos.
+
+        Si el evento es una instancia de un [EventoRecurrente], éste también se detiene.
+
+        Returns
+        -------
+        Entrega el evento cancelado, o None si no estaba agendado.
+        """
+        if self.__concurrente:
+            # El evento pudo ser agendado por el mismo grupo, y aún no estar en la cola.
+            agendados = self.__local.agendados
+            for i, evento in enumerate(agendados):
+                if evento.id == id_evento:
+                    return agendados.pop(i)
+            with self.__candado:
+                return self.__cancelar_evento(id_evento)
+        return self.__cancelar_evento(id_evento)
+
+    def __cancelar_evento(self, id_evento: int) -> Optional[Evento]:
+        recurrente = self.__recurrente_por_evento.pop(id_evento, None)
+        if recurrente is not None:
+            recurrente.id_evento_pendiente = None
+            self.recurrentes.pop(recurrente.id, None)
+        return self.eventos.eliminar(id_evento)
+
+    def reprogramar_evento(
+        self,
+        id_evento: int,
+        nueva_ocurrencia: dt.datetime,
+        prioridad: Optional[int] = None,
+    ) -> Evento:
+        """Cambia la fecha de ocurrencia de un evento futuro, manteniendo su id.
+        Por ejemplo, al cambiar el destino de un tren podemos mover su llegada sin crear un
+        nuevo evento, de manera que `Tren.id_evento_siguiente` sigue siendo válido.
+
+        Parameters
+        ----------
+        prioridad: Optional[int] = None
+            Si se indica, también reemplaza la prioridad del evento.
+        """
+        if self.__concurrente:
+            # Durante un lote concurrente, el evento se reinsertará al terminar el lote.
+            agendados = self.__local.agendados
+            evento = next((e for e in agendados if e.id == id_evento), None)
+            if evento is None:
+                with self.__candado:
+                    evento = self.eventos.eliminar(id_evento)
+                if evento is not None:
+                    agendados.append(evento)
+        else:
+            evento = self.eventos.eliminar(id_evento)
+        if evento is None:
+            raise Exception(
+                f"[Error] No existe un evento futuro con id {id_evento} para reprogramar."
+            )
+        evento.ocurrencia = nueva_ocurrencia
+        if prioridad is not None:
+            evento.prioridad = prioridad
+        if not self.__concurrente:
+            # Como un evento nuevo: pasa por el enrutador, la coalescencia y las métricas.
+            self.__agendar(evento)
+        return evento
 
     def obtener_proximos(self, eliminar: bool = True) -> list[Evento]:
         """Devolveremos los eventos sin ejecutar sus handlers,
         ni tampoco añadirlo al historial.
         Por defecto, también los eliminaremos de su lista.
+
+        Al eliminarlos, se fusionan los eventos registrados con
+        [MomentoCoalescencia.EXTRACCION] (ver [self.registrar_coalescencia]).
         """
-        if not self.eventos:
-            return []
-        out = [self.eventos[0]]
-        fecha_proxima = out[0].ocurrencia
-        i = 1
-        while i < len(self.eventos) and self.eventos[i].ocurrencia == fecha_proxima:
-            out.append(self.eventos[i])
-            i += 1
-        if eliminar:
-            self.eventos = self.eventos[len(out) :]
-        return out
+        eventos = self.eventos.obtener_proximos(eliminar)
+        if eliminar and self.__tipos_coalescencia_extraccion:
+            eventos = self.__coalescer_lote(eventos)
+        return eventos
+
+    def registrar_coalescencia(
+        self,
+        tipo: TipoEvento,
+        clave: Optional[ClaveCoalescencia] = None,
+        fusionar: Optional[FusionarEventos] = None,
+        momento: MomentoCoalescencia = MomentoCoalescencia.INSERCION,
+    ) -> None:
+        """Fusiona los eventos pendientes de [tipo] que comparten [clave], utilizando
+        [fusionar], para que la cola no acumule eventos redundantes:
+        - Con [MomentoCoalescencia.INSERCION], cada evento nuevo se fusiona con el último
+          evento pendiente de su clave, que se quita de la cola.
+        - Con [MomentoCoalescencia.EXTRACCION], se fusionan los eventos de un mismo lote
+          (ver [self.obtener_proximos]), antes de ejecutarlos.
+        Los eventos que desaparecen al fusionarse no se ejecutan ni entran al historial.
+        No se fusionan las instancias de eventos recurrentes.
+
+        Sin [clave] ni [fusionar], se utilizan los de [COALESCENCIAS_POR_DEFECTO]: ventanas
+        contiguas de GENERACION_DEMANDA por `id_estacion`, y llegadas de TREN_LLEGADA
+        reemplazadas por una más reciente del mismo `id_tren`.
+        """
+        if clave is None and fusionar is None:
+            if tipo not in COALESCENCIAS_POR_DEFECTO:
+                raise Exception(f"[Error] No hay una coalescencia por defecto para {tipo}.")
+            clave, fusionar = COALESCENCIAS_POR_DEFECTO[tipo]
+        elif clave is None or fusionar is None:
+            raise Exception("[Error] La coalescencia necesita [clave] y [fusionar].")
+
+        self.quitar_coalescencia(tipo)
+        self.coalescencias[tipo] = Coalescencia(clave, fusionar, momento)
+        if momento is MomentoCoalescencia.INSERCION:
+            self.__tipos_coalescencia_insercion.add(tipo)
+            self.__indexar_pendientes(tipo)
+        else:
+            self.__tipos_coalescencia_extraccion.add(tipo)
+
+    def quitar_coalescencia(self, tipo: TipoEvento) -> Optional[Coalescencia]:
+        self.__tipos_coalescencia_insercion.discard(tipo)
+        self.__tipos_coalescencia_extraccion.discard(tipo)
+        for indice in [i for i in self.__pendiente_por_clave if i[0] == tipo]:
+            del self.__pendiente_por_clave[indice]
+        return self.coalescencias.pop(tipo, None)
+
+    def __indexar_pendientes(self, tipo: TipoEvento) -> None:
+        """Registra, por clave, el último evento pendiente de [tipo] que ya estaba en la cola."""
+        clave = self.coalescencias[tipo].clave
+        for evento in self.eventos:
+            if evento.tipo is not tipo:
+                continue
+            valor = clave(evento)
+            if valor is None:
+                continue
+            previo = self.__pendiente_por_clave.get((tipo, valor))
+            if previo is None or (previo.ocurrencia, previo.id) < (
+                evento.ocurrencia,
+                evento.id,
+            ):
+                self.__pendiente_por_clave[(tipo, valor)] = evento
+
+    def __coalescer_al_insertar(
+        self, evento: Evento, por_insertar: Optional[dict[int, Evento]] = None
+    ) -> Evento:
+        """Fusiona [evento] con el último evento pendiente de su clave, si aún está en la cola
+        o en [por_insertar] (los eventos de una misma inserción en bloque, por id, que aún no
+        entran a la cola). El evento fusionado sale de donde esté.
+
+        Returns
+        -------
+        Entrega el evento a insertar.
+        """
+        coalescencia = self.coalescencias[evento.tipo]
+        valor = coalescencia.clave(evento)
+        if valor is None or evento.id in self.__recurrente_por_evento:
+            return evento
+        indice = (evento.tipo, valor)
+        previo = self.__pendiente_por_clave.get(indice)
+        en_bloque = por_insertar is not None and previo is not None and previo.id in por_insertar
+        if (
+            previo is not None
+            and previo is not evento
+            and (en_bloque or previo.id in self.eventos)
+            and previo.id not in self.__recurrente_por_evento
+        ):
+            fusionado = coalescencia.fusionar(previo, evento)
+            if fusionado is not None:
+                if por_insertar is not None and en_bloque:
+                    del por_insertar[previo.id]
+                else:
+                    self.eventos.eliminar(previo.id)
+                self.eventos_coalescidos += 1
+                evento = fusionado
+        self.__pendiente_por_clave[indice] = evento
+        return evento
+
+    def __coalescer_lote(self, eventos: list[Evento]) -> list[Evento]:
+        """Fusiona los eventos del lote que comparten tipo y clave. Cada evento fusionado
+        ocupa la posición del primero de ellos en el lote."""
+        resultado: list[Evento] = []
+        posiciones: dict[tuple[TipoEvento, Hashable], int] = dict()
+        for evento in eventos:
+            if evento.tipo in self.__tipos_coalescencia_extraccion:
+                coalescencia = self.coalescencias[evento.tipo]
+                valor = coalescencia.clave(evento)
+                if valor is not None and evento.id not in self.__recurrente_por_evento:
+                    indice = (evento.tipo, valor)
+                    i = posiciones.get(indice)
+                    if i is not None:
+                        fusionado = coalescencia.fusionar(resultado[i], evento)
+                        if fusionado is not None:
+                            resultado[i] = fusionado
+                            self.eventos_coalescidos += 1
+                            continue
+                    posiciones[indice] = len(resultado)
+            resultado.append(evento)
+        return resultado
+
+    def registrar_handler(
+        self, tipo: TipoEvento, handler: Callable, por_lote: bool = False
+    ) -> None:
+        """Registra el handler que se utilizará para los eventos de [tipo] que no tengan
+        handler propio. Así no es necesario crear una función (lambda) por cada evento.
+
+        Parameters
+        ----------
+        handler: Callable
+            Si [por_lote] es False, se llama como `handler(evento)` para cada evento.
+            Si [por_lote] es True, se llama una sola vez como `handler(eventos)`, con todos los
+            eventos de [tipo] que comparten la misma fecha de ocurrencia.
+        """
+        self.handlers[tipo] = handler
+        if por_lote:
+            self.__handlers_por_lote.add(tipo)
+        else:
+            self.__handlers_por_lote.discard(tipo)
 
     def consumir_eventos(
         self, eventos: list[Evento], historial: bool = True
@@ -85,6 +563,15 @@ class LineaDeEventos:
         """Los eventos deben ingresarse en orden ascendente. Por lo mismo,
         es recomendable que los consigan utilizando [self.obtener_proximos].
 
+        Los eventos sin handler propio se ejecutan con el handler registrado para su tipo
+        (ver [self.registrar_handler]).
+
+        Con [historial], los eventos se insertan en [self.historial_eventos] todos juntos,
+        después de ejecutar el lote completo. Por lo tanto, mientras se ejecuta un handler, el
+        historial aún no contiene los eventos anteriores del mismo lote (ni el evento en
+        curso); un handler que los necesite debe recibirlos por lote (ver
+        [self.registrar_handler] con `por_lote=True`).
+
         Returns
         -------
         Entrega la fecha del evento más reciente.
@@ -95,29 +582,553 @@ class LineaDeEventos:
         for e in eventos:
             assert e.ocurrencia >= fecha_proxima_previa
             assert not e.ha_ocurrido
-
-            e.ejecutar()
             fecha_proxima_previa = e.ocurrencia
 
-            if historial:
-                self.insertar_evento_pasado(e)
+        if self.instantaneas is not None:
+            self.instantaneas.antes_de_consumir()
+        metricas = self.metricas
+        if metricas is not None:
+            inicio = time.perf_counter_ns()
+        if self.ejecutor is None or len(eventos) == 1:
+            self.__despachar(eventos, metricas)
+        else:
+            self.__despachar_concurrente(eventos, self.ejecutor, metricas)
+
+        if self.__recurrente_por_evento:
+            seguir = self.seguir_evento_en_curso
+            for e in eventos:
+                recurrente = self.__recurrente_por_evento.pop(e.id, None)
+                if recurrente is not None:
+                    if seguir:
+                        self.__local.evento_en_curso = e
+                    self.__agendar_instancia(recurrente, e.ocurrencia + recurrente.intervalo)
+            if seguir:
+                self.__local.evento_en_curso = None
+
+        if historial:
+            self.insertar_eventos_pasados(eventos)
+
+        if metricas is not None:
+            metricas.registrar_lote(
+                eventos,
+                time.perf_counter_ns() - inicio,
+                fecha_proxima_previa,
+                len(self.eventos),
+                len(self.historial_eventos),
+            )
+        for observador in self.__observadores:
+            observador(eventos)
         return fecha_proxima_previa
 
+    def __despachar(
+        self, eventos: list[Evento], metricas: Optional[Metricas] = None
+    ) -> None:
+        """Ejecuta los eventos en orden. Para los handlers registrados por lote, el handler se
+        llama al llegar al primer evento de su tipo, con todos los eventos de ese tipo.
+
+        Con [metricas], se mide el tiempo de cada tramo de eventos consecutivos del mismo tipo."""
+        tipos_despachados: Optional[set[TipoEvento]] = None
+        tipo_tramo: Optional[TipoEvento] = None
+        inicio_tramo = 0
+        largo_tramo = 0
+        # Local, para no consultar el atributo con cada evento.
+        seguir = self.seguir_evento_en_curso
+        local = self.__local
+        for e in eventos:
+            if seguir:
+                local.evento_en_curso = e
+            if metricas is not None:
+                if e.tipo is not tipo_tramo:
+                    ahora = time.perf_counter_ns()
+                    if tipo_tramo is not None:
+                        metricas.registrar_tramo(
+                            tipo_tramo, ahora - inicio_tramo, largo_tramo
+                        )
+                    tipo_tramo = e.tipo
+                    inicio_tramo = ahora
+                    largo_tramo = 0
+                largo_tramo += 1
+
+            if e.handler is not None:
+                e.ejecutar()
+                continue
+
+            handler = self.handlers.get(e.tipo)
+            if handler is None:
+                # Sin handler registrado, [Evento.ejecutar] informa el error.
+                e.ejecutar()
+            elif e.tipo not in self.__handlers_por_lote:
+                handler(e)
+                e.ha_ocurrido = True
+            elif tipos_despachados is None or e.tipo not in tipos_despachados:
+                lote = [x for x in eventos if x.tipo == e.tipo and x.handler is None]
+                handler(lote)
+                for x in lote:
+                    x.ha_ocurrido = True
+                if tipos_despachados is None:
+                    tipos_despachados = set()
+                tipos_despachados.add(e.tipo)
+        if seguir:
+            local.evento_en_curso = None
+
+        if metricas is not None and tipo_tramo is not None:
+            metricas.registrar_tramo(
+                tipo_tramo, time.perf_counter_ns() - inicio_tramo, largo_tramo
+            )
+
+    def configurar_concurrencia(
+        self,
+        ejecutor: Optional[Executor],
+        campos: Optional[dict[str, str]] = None,
+    ) -> None:
+        """Permite ejecutar en paralelo los eventos de un mismo lote que no comparten entidades
+        (ver [agrupar_sin_conflictos]), utilizando [ejecutor] (por ejemplo, un
+        [ThreadPoolExecutor]). Con None, se vuelve a la ejecución secuencial.
+
+        Dentro de cada grupo de eventos en conflicto se mantiene el orden del lote (por
+        prioridad). Los eventos futuros que agenden los handlers se insertan al terminar el lote,
+        en el orden de los grupos, y cada grupo asigna los ids de sus nuevos eventos desde su
+        propio rango, por lo que el resultado no depende del orden en que terminen los hilos.
+        Los handlers por lote reciben los eventos de su tipo dentro de cada grupo.
+
+        Los handlers deben poder ejecutarse en paralelo si modifican entidades distintas. No se
+        permite un [ProcessPoolExecutor], ya que los handlers modifican objetos de este proceso.
+
+        Parameters
+        ----------
+        campos: Optional[dict[str, str]] = None
+            Campos de `datos` que identifican entidades, y el tipo de cada entidad.
+            Por defecto, [CAMPOS_CONFLICTO].
+        """
+        if isinstance(ejecutor, ProcessPoolExecutor):
+            raise Exception(
+                "[Error] La ejecución concurrente requiere un ejecutor que comparta memoria, "
+                "como ThreadPoolExecutor."
+            )
+        self.ejecutor = ejecutor
+        self.campos_conflicto = campos if campos is not None else CAMPOS_CONFLICTO
+
+    def __despachar_concurrente(
+        self, eventos: list[Evento], ejecutor: Executor, metricas: Optional[Metricas]
+    ) -> None:
+        """Ejecuta el lote por segmentos (ver [agrupar_sin_conflictos]). Los grupos que se
+        ejecutan en paralelo no registran el tiempo de sus handlers en [metricas].
+
+        En un segmento de `n` grupos, el grupo `i` asigna los ids `base + i`, `base + i + n`,
+        `base + i + 2n`, etc., con `base` el siguiente id de la línea al comenzar el segmento."""
+        for grupos in agrupar_sin_conflictos(eventos, self.campos_conflicto):
+            if len(grupos) == 1:
+                self.__despachar(grupos[0], metricas)
+                continue
+
+            agendados: list[list[Evento]] = [[] for _ in grupos]
+            # Siguiente id de cada grupo, y la separación entre sus ids.
+            base = self.next_id_evento
+            ids = [[base + i, len(grupos)] for i in range(len(grupos))]
+            self.__concurrente = True
+            try:
+                futuros = [
+                    ejecutor.submit(self.__despachar_grupo, grupo, agendados_grupo, ids_grupo)
+                    for grupo, agendados_grupo, ids_grupo in zip(grupos, agendados, ids)
+                ]
+                errores = [futuro.exception() for futuro in futuros]
+            finally:
+                self.__concurrente = False
+            # El siguiente id queda después del mayor id asignado por algún grupo.
+            self.next_id_evento = max(
+                self.next_id_evento,
+                max(siguiente - paso + 1 for siguiente, paso in ids),
+            )
+
+            for agendados_grupo in agendados:
+                for evento in agendados_grupo:
+                    self.insertar_evento_futuro(evento)
+            for error in errores:
+                if error is not None:
+                    raise error
+
+    def __despachar_grupo(
+        self, grupo: list[Evento], agendados: list[Evento], ids: list[int]
+    ) -> None:
+        self.__local.agendados = agendados
+        self.__local.ids = ids
+        try:
+            self.__despachar(grupo)
+        finally:
+            self.__local.agendados = None
+            self.__local.ids = None
+
+    def activar_metricas(self, capacidad_muestras: int = 1024) -> Metricas:
+        """Comienza a registrar métricas de ejecución: eventos por segundo, tiempo de los
+        handlers por [TipoEvento], largo de la cola, latencia de inserción y extracción, y
+        largo del historial. Ver [Metricas.snapshot]."""
+        self.metricas = Metricas(capacidad_muestras)
+        return self.metricas
+
+    def desactivar_metricas(self) -> Optional[Metricas]:
+        """Deja de registrar métricas, y entrega las registradas hasta ahora."""
+        metricas, self.metricas = self.metricas, None
+        return metricas
+
+    def agregar_observador(
+        self, observador: Callable[[list[Evento]], None], historial: bool = False
+    ) -> None:
+        """Registra una función que recibe cada lote de eventos consumidos, después de
+        ejecutarlos e insertarlos en el historial.
+
+        Parameters
+        ----------
+        historial: bool = False
+            Si es True, en cambio, recibe los eventos cada vez que se insertan en el historial,
+            incluyendo los insertados directamente (ver [self.insertar_evento_pasado]).
+        """
+        if historial:
+            self.__observadores_historial.append(observador)
+        else:
+            self.__observadores.append(observador)
+
+    def quitar_observador(
+        self, observador: Callable[[list[Evento]], None], historial: bool = False
+    ) -> None:
+        if historial:
+            self.__observadores_historial.remove(observador)
+        else:
+            self.__observadores.remove(observador)
+
+    def activar_instantaneas(
+        self,
+        aplicadores: dict[TipoEvento, Aplicador],
+        cada_eventos: Optional[int] = None,
+        cada_tiempo: Optional[dt.timedelta] = None,
+        capturar: Optional[Callable[[Any], Any]] = None,
+        max_instantaneas: Optional[int] = None,
+    ) -> Instantaneas:
+        """Comienza a tomar instantáneas periódicas de [self.estado_simulacion], cada
+        [cada_eventos] eventos o cada [cada_tiempo] de tiempo simulado, para poder
+        reconstruir el estado en una fecha pasada con [self.rebobinar].
+        Se toma una primera instantánea al activarlas. Ver [Instantaneas]."""
+        self.desactivar_instantaneas()
+        self.instantaneas = Instantaneas(
+            self, aplicadores, cada_eventos, cada_tiempo, capturar, max_instantaneas
+        )
+        self.agregar_observador(self.instantaneas.al_insertar, historial=True)
+        self.agregar_observador(self.instantaneas.al_consumir)
+        return self.instantaneas
+
+    def desactivar_instantaneas(self) -> Optional[Instantaneas]:
+        instantaneas, self.instantaneas = self.instantaneas, None
+        if instantaneas is not None:
+            self.quitar_observador(instantaneas.al_insertar, historial=True)
+            self.quitar_observador(instantaneas.al_consumir)
+        return instantaneas
+
+    def rebobinar(self, fecha: dt.datetime) -> Any:
+        """Entrega una copia del estado de la simulación tal como estaba después de los
+        eventos ocurridos hasta [fecha], partiendo desde la instantánea más cercana.
+        No modifica la simulación en curso."""
+        if self.instantaneas is None:
+            raise Exception(
+                "[Error] Para rebobinar se deben activar las instantáneas "
+                "([activar_instantaneas])."
+            )
+        return self.instantaneas.rebobinar(fecha)
+
+    def historial_columnar(self) -> HistorialColumnar:
+        """Entrega el índice columnar del historial, actualizado con los últimos eventos.
+        Se crea la primera vez que se solicita, y luego sólo se le agregan los eventos nuevos."""
+        if (
+            self.__historial_columnar is None
+            or self.__historial_columnar.historial is not self.historial_eventos
+        ):
+            self.__historial_columnar = HistorialColumnar(
+                self.historial_eventos, self.fecha_inicial
+            )
+        self.__historial_columnar.actualizar()
+        return self.__historial_columnar
+
+    def consultar_historial(
+        self,
+        desde: Optional[dt.datetime] = None,
+        hasta: Optional[dt.datetime] = None,
+        tipo: Optional[TipoEvento] = None,
+        **entidades: int,
+    ) -> list[Evento]:
+        """Busca eventos del historial por rango de fechas, tipo y entidades, utilizando
+        el índice columnar (ver [HistorialColumnar.consultar]).
+
+        Ejemplo: `linea.consultar_historial(t_8, t_10, TipoEvento.TREN_LLEGADA, id_tren=42)`.
+        """
+        return self.historial_columnar().eventos(desde, hasta, tipo, **entidades)
+
+    def exportar_historial(
+        self,
+        ruta: Union[str, os.PathLike],
+        formato: FormatoExportacion = FormatoExportacion.CSV,
+        incremental: bool = False,
+        tamano_bloque: int = 10_000,
+    ) -> int:
+        """Exporta el historial a [ruta], por bloques de [tamano_bloque] eventos, por lo que la
+        memoria utilizada no depende del largo del historial. Ver [exportacion] para el detalle
+        de las columnas y los formatos.
+
+        Parameters
+        ----------
+        incremental: bool = False
+            Si es True y el historial ya se exportó a [ruta] desde esta línea, sólo se agregan
+            al archivo los eventos nuevos. Si no, el archivo se reemplaza.
+
+        Returns
+        -------
+        Entrega la cantidad de eventos exportados.
+        """
+        clave = os.fspath(ruta)
+        exportador = self.__exportadores.get(clave)
+        if (
+            not incremental
+            or exportador is None
+            or exportador.formato != formato
+            or exportador.historial is not self.historial_eventos
+        ):
+            if exportador is not None:
+                exportador.cerrar()
+            exportador = ExportadorHistorial(
+                self.historial_eventos, ruta, formato, tamano_bloque
+            )
+            self.__exportadores[clave] = exportador
+        exportador.tamano_bloque = tamano_bloque
+        return exportador.exportar()
+
+    def avanzar_hasta(
+        self, fecha: dt.datetime, historial: bool = True
+    ) -> EstadisticasEjecucion:
+        """Ejecuta, en orden, todos los eventos futuros que ocurren hasta [fecha] (inclusive),
+        y deja [self.fecha_actual] en [fecha].
+        Los eventos que agenden los handlers también se ejecutan, si ocurren antes de [fecha].
+
+        Returns
+        -------
+        Entrega las [EstadisticasEjecucion] de esta llamada.
+        """
+        estadisticas = self.__ejecutar_lotes(fecha, None, historial)
+        if fecha > self.fecha_actual:
+            self.fecha_actual = fecha
+        estadisticas.fecha_final = self.fecha_actual
+        return estadisticas
+
+    def ejecutar(
+        self,
+        max_eventos: Optional[int] = None,
+        hasta: Optional[dt.datetime] = None,
+        historial: bool = True,
+    ) -> EstadisticasEjecucion:
+        """Ejecuta eventos futuros hasta que la cola quede vacía, se ejecuten al menos
+        [max_eventos] eventos, o el próximo evento ocurra después de [hasta].
+        Los eventos que comparten fecha se ejecutan siempre juntos, por lo que se pueden
+        ejecutar algunos eventos más que [max_eventos].
+
+        Returns
+        -------
+        Entrega las [EstadisticasEjecucion] de esta llamada.
+        """
+        return self.__ejecutar_lotes(hasta, max_eventos, historial)
+
+    def __ejecutar_lotes(
+        self,
+        hasta: Optional[dt.datetime],
+        max_eventos: Optional[int],
+        historial: bool,
+    ) -> EstadisticasEjecucion:
+        estadisticas = EstadisticasEjecucion(self.fecha_actual)
+        inicio = time.perf_counter()
+
+        while max_eventos is None or estadisticas.eventos < max_eventos:
+            fecha_proxima = self.eventos.proxima_fecha()
+            if fecha_proxima is None or (hasta is not None and fecha_proxima > hasta):
+                break
+            eventos = self.ejecutar_proximo_lote(historial)
+            estadisticas.eventos += len(eventos)
+            estadisticas.lotes += 1
+
+        estadisticas.fecha_final = self.fecha_actual
+        estadisticas.duracion = time.perf_counter() - inicio
+        return estadisticas
+
+    def ejecutar_proximo_lote(self, historial: bool = True) -> list[Evento]:
+        """Obtiene y consume los próximos eventos (los que comparten la fecha más cercana),
+        y avanza [self.fecha_actual] hasta su fecha.
+
+        Returns
+        -------
+        Entrega los eventos consumidos (ninguno, si la cola está vacía).
+        """
+        if not self.eventos:
+            return []
+        if self.metricas is None:
+            eventos = self.obtener_proximos()
+        else:
+            inicio_extraccion = time.perf_counter_ns()
+            eventos = self.obtener_proximos()
+            self.metricas.extraccion.registrar(
+                (time.perf_counter_ns() - inicio_extraccion) // len(eventos),
+                len(eventos),
+            )
+        self.fecha_actual = self.consumir_eventos(eventos, historial)
+        return eventos
+
+    def activar_registro(self, ruta: Union[str, os.PathLike]) -> RegistroBinario:
+        """Desde ahora, cada evento que entre al historial (con [self.insertar_evento_pasado],
+        [self.insertar_eventos_pasados] o [self.consumir_eventos]) se agrega a un
+        [RegistroBinario] en [ruta]. Se puede leer con [LectorRegistro]."""
+        if self.registro is not None:
+            self.registro.cerrar()
+        self.registro = RegistroBinario(ruta)
+        return self.registro
+
+    def guardar(self, ruta: Union[str, os.PathLike]) -> None:
+        """Guarda un punto de control de la línea: historial, eventos pendientes y eventos
+        recurrentes. Los handlers no se guardan; al cargar, se utilizan los handlers
+        registrados por [TipoEvento]."""
+        metadatos = {
+            "fecha_inicial": self.fecha_inicial,
+            "fecha_actual": self.fecha_actual,
+            "motor": self.motor.value,
+            "compactar_historial": self.compactar_historial,
+            "next_id_evento": self.next_id_evento,
+            "next_id_recurrente": self.__next_id_recurrente,
+            "recurrentes": [
+                (
+                    r.id,
+                    r.tipo.value,
+                    r.inicio,
+                    r.intervalo,
+                    r.hasta,
+                    r.prioridad,
+                    r.datos,
+                    r.id_evento_pendiente,
+                )
+                for r in self.recurrentes.values()
+            ],
+        }
+        guardar_punto_control(ruta, metadatos, self.historial_eventos, self.eventos)
+
+    @classmethod
+    def cargar(
+        cls,
+        ruta: Union[str, os.PathLike],
+        estado_simulacion: Any,
+        handlers: Optional[dict[TipoEvento, Callable]] = None,
+        tipos_por_lote: Iterable[TipoEvento] = (),
+    ) -> "LineaDeEventos":
+        """Carga una línea guardada con [self.guardar].
+
+        El historial no se lee completo: se accede al archivo con [mmap], y cada evento se
+        decodifica sólo cuando se utiliza. Los eventos pendientes sí se cargan a la cola.
+
+        Parameters
+        ----------
+        handlers: Optional[dict[TipoEvento, Callable]] = None
+            Handlers a registrar por tipo (ver [self.registrar_handler]), ya que los eventos
+            cargados no tienen handler propio.
+        tipos_por_lote: Iterable[TipoEvento] = ()
+            Tipos cuyos handlers se registran por lote.
+        """
+        metadatos, historial, pendientes = leer_punto_control(ruta)
+        # Los pendientes se cargan completos, por lo que su lector se cierra de inmediato.
+        with pendientes:
+            eventos_pendientes = list(pendientes)
+
+        linea = cls(
+            estado_simulacion,
+            metadatos["fecha_inicial"],
+            motor=MotorCola(metadatos["motor"]),
+            compactar_historial=metadatos["compactar_historial"],
+        )
+        linea.fecha_actual = metadatos["fecha_actual"]
+        linea.next_id_evento = metadatos["next_id_evento"]
+        linea.historial_eventos = HistorialEventos.desde_secuencia(historial)
+        linea.eventos.insertar_varios(eventos_pendientes)
+
+        tipos_por_lote = set(tipos_por_lote)
+        for tipo, handler in (handlers or dict()).items():
+            linea.registrar_handler(tipo, handler, por_lote=tipo in tipos_por_lote)
+
+        for (
+            id_recurrente,
+            tipo,
+            inicio,
+            intervalo,
+            hasta,
+            prioridad,
+            datos,
+            id_evento_pendiente,
+        ) in metadatos["recurrentes"]:
+            recurrente = EventoRecurrente(
+                id_recurrente,
+                TipoEvento(tipo),
+                inicio,
+                intervalo,
+                hasta,
+                None,
+                prioridad,
+                datos,
+            )
+            recurrente.id_evento_pendiente = id_evento_pendiente
+            linea.recurrentes[recurrente.id] = recurrente
+            if id_evento_pendiente is not None:
+                linea.__recurrente_por_evento[id_evento_pendiente] = recurrente
+        linea.__next_id_recurrente = metadatos["next_id_recurrente"]
+
+        # Evitamos que los nuevos eventos creados sin id repitan ids de los eventos cargados.
+        Evento.next_id_evento = max(Evento.next_id_evento, metadatos["next_id_evento"])
+        return linea
+
     def crear_variante(self, fecha_hasta: Optional[dt.datetime]) -> "LineaDeEventos":
-        nueva_linea = LineaDeEventos(self.estado_simulacion, self.fecha_inicial)
+        """Crea una nueva línea temporal a partir de ésta.
+        El historial de la variante comparte memoria con el de esta línea, por lo que crearla
+        no copia los eventos ya ocurridos.
+
+        Parameters
+        ----------
+        fecha_hasta: Optional[dt.datetime]
+            Si es None, la variante conserva todos los eventos (pasados y futuros).
+            Si no, sólo conserva los eventos ocurridos hasta esa fecha, y ningún evento futuro.
+        """
+        nueva_linea = LineaDeEventos(
+            self.estado_simulacion,
+            self.fecha_inicial,
+            motor=self.motor,
+            compactar_historial=self.compactar_historial,
+            retencion=self.historial_eventos.politica,
+        )
+        nueva_linea.next_id_evento = self.next_id_evento
+        nueva_linea.handlers = self.handlers.copy()
+        nueva_linea.__handlers_por_lote = self.__handlers_por_lote.copy()
 
         if fecha_hasta is None:
             # Tomar todos los eventos
-            nueva_linea.historial_eventos = self.historial_eventos.copy()
-            nueva_linea.eventos = self.eventos.copy()
+            nueva_linea.historial_eventos = self.historial_eventos.crear_rama()
+            # Los eventos futuros se copian: si no, ejecutarlos en una línea los marcaría
+            # como ocurridos en la otra.
+            nueva_linea.eventos.insertar_varios(e.copiar() for e in self.eventos)
             nueva_linea.fecha_actual = self.fecha_actual
+            # Los recurrentes se copian, ya que cada línea avanza sus instancias por separado.
+            for recurrente in self.recurrentes.values():
+                copia = copy.copy(recurrente)
+                nueva_linea.recurrentes[copia.id] = copia
+                if copia.id_evento_pendiente is not None:
+                    nueva_linea.__recurrente_por_evento[copia.id_evento_pendiente] = copia
+            nueva_linea.__next_id_recurrente = self.__next_id_recurrente
         else:
-            # Tomar parcialmente los eventos
-            nueva_linea.historial_eventos = [
-                ev for ev in self.historial_eventos if ev.ocurrencia <= fecha_hasta
-            ]
+            # Tomar parcialmente los eventos, buscando el corte con búsqueda binaria.
+            corte = self.historial_eventos.indice_hasta(fecha_hasta)
+            nueva_linea.historial_eventos = self.historial_eventos.crear_rama(corte)
             nueva_linea.fecha_actual = fecha_hasta
             # Los eventos futuros se descartan (nueva línea temporal)
-            nueva_linea.eventos = []
+            nueva_linea.eventos = crear_cola(self.motor, self.fecha_inicial)
 
+        # Después de copiar los eventos futuros, para indexar los pendientes de la variante.
+        for tipo, coalescencia in self.coalescencias.items():
+            nueva_linea.registrar_coalescencia(
+                tipo, coalescencia.clave, coalescencia.fusionar, coalescencia.momento
+            )
         return nueva_linea
@@ -0,0 +1,137 @@
+import time
+from collections import deque
+from typing import Any, Callable
+
+from ppdc_event_manager.eventos import TipoEvento, Evento
+
+# Cantidad de cubetas de los histogramas: la cubeta k cuenta duraciones menores a 2**k ns.
+CUBETAS_HISTOGRAMA = 64
+
+
+class Histograma:
+    """Histograma de duraciones (en nanosegundos) con cubetas en potencias de 2.
+    Registrar una duración no crea objetos: sólo incrementa contadores."""
+
+    __slots__ = ("cubetas", "cantidad", "total_ns")
+
+    def __init__(self) -> None:
+        self.cubetas: list[int] = [0] * CUBETAS_HISTOGRAMA
+        self.cantidad: int = 0
+        self.total_ns: int = 0
+
+    def registrar(self, duracion_ns: int, cantidad: int = 1) -> None:
+        """Registra [cantidad] mediciones de [duracion_ns] cada una."""
+        self.cubetas[min(duracion_ns.bit_length(), CUBETAS_HISTOGRAMA - 1)] += cantidad
+        self.cantidad += cantidad
+        self.total_ns += duracion_ns * cantidad
+
+    def percentil(self, p: float) -> int:
+        """Entrega una cota superior (en ns) del percentil [p] (entre 0 y 100)."""
+        if self.cantidad == 0:
+            return 0
+        objetivo = self.cantidad * p / 100
+        acumulado = 0
+        for k, cantidad in enumerate(self.cubetas):
+            acumulado += cantidad
+            if acumulado >= objetivo:
+                return 2**k
+        return 2 ** (CUBETAS_HISTOGRAMA - 1)
+
+    def resumen(self) -> dict[str, Any]:
+        return {
+            "cantidad": self.cantidad,
+            "total_ns": self.total_ns,
+            "promedio_ns": self.total_ns / self.cantidad if self.cantidad else 0.0,
+            "p50_ns": self.percentil(50),
+            "p99_ns": self.percentil(99),
+            # Sólo las cubetas con mediciones, por su cota superior en ns.
+            "cubetas": {2**k: c for k, c in enumerate(self.cubetas) if c},
+        }
+
+
+class Metricas:
+    """Métricas de ejecución de una [LineaDeEventos]. Se activan con
+    [LineaDeEventos.activar_metricas]; mientras están desactivadas, la línea sólo revisa una
+    vez por lote si existen.
+
+    Para no medir cada evento por separado, el tiempo de los handlers se mide por tramos de
+    eventos consecutivos del mismo [TipoEvento] dentro de un lote, y se registra en el
+    histograma de ese tipo como el promedio del tramo, una vez por cada evento.
+
+    Ejemplo:
+        metricas = linea.activar_metricas()
+        metricas.agregar_hook(lambda eventos, duracion_ns: print(len(eventos), duracion_ns))
+        linea.ejecutar()
+        print(metricas.snapshot())
+    """
+
+    def __init__(self, capacidad_muestras: int = 1024) -> None:
+        """
+        Parameters
+        ----------
+        capacidad_muestras: int = 1024
+            Cantidad de lotes recientes para los que se guarda el largo de la cola.
+        """
+        self.eventos: int = 0
+        self.lotes: int = 0
+        # Tiempo real (en ns) utilizado en consumir lotes de eventos.
+        self.tiempo_lotes_ns: int = 0
+
+        self.handlers: dict[TipoEvento, Histograma] = {
+            tipo: Histograma() for tipo in TipoEvento
+        }
+        self.insercion: Histograma = Histograma()
+        self.extraccion: Histograma = Histograma()
+
+        # Muestras (fecha de simulación, eventos pendientes), una por lote.
+        self.profundidad_cola: deque = deque(maxlen=capacidad_muestras)
+        self.largo_historial: int = 0
+
+        self.__hooks: list[Callable[[list[Evento], int], None]] = []
+        self.__inicio: float = time.perf_counter()
+
+    def agregar_hook(self, hook: Callable[[list[Evento], int], None]) -> None:
+        """Registra una función que se llama como `hook(eventos, duracion_ns)` después de
+        consumir cada lote de eventos."""
+        self.__hooks.append(hook)
+
+    def quitar_hook(self, hook: Callable[[list[Evento], int], None]) -> None:
+        self.__hooks.remove(hook)
+
+    def registrar_tramo(self, tipo: TipoEvento, duracion_ns: int, cantidad: int) -> None:
+        self.handlers[tipo].registrar(duracion_ns // cantidad, cantidad)
+
+    def registrar_lote(
+        self,
+        eventos: list[Evento],
+        duracion_ns: int,
+        fecha: Any,
+        pendientes: int,
+        largo_historial: int,
+    ) -> None:
+        self.eventos += len(eventos)
+        self.lotes += 1
+        self.tiempo_lotes_ns += duracion_ns
+        self.profundidad_cola.append((fecha, pendientes))
+        self.largo_historial = largo_historial
+        for hook in self.__hooks:
+            hook(eventos, duracion_ns)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Entrega un resumen de las métricas, como un diccionario."""
+        segundos = self.tiempo_lotes_ns / 1e9
+        return {
+            "eventos": self.eventos,
+            "lotes": self.lotes,
+            "eventos_por_segundo": self.eventos / segundos if segundos else 0.0,
+            "segundos_activas": time.perf_counter() - self.__inicio,
+            "handlers": {
+                tipo.value: histograma.resumen()
+                for tipo, histograma in self.handlers.items()
+                if histograma.cantidad
+            },
+            "insercion": self.insercion.resumen(),
+            "extraccion": self.extraccion.resumen(),
+            "profundidad_cola": list(self.profundidad_cola),
+            "largo_historial": self.largo_historial,
+        }
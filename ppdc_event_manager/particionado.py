@@ -0,0 +1,483 @@
+import datetime as dt
+import heapq
+import multiprocessing
+import traceback
+from collections import deque
+from typing import Any, Callable, Iterable, Optional, Union
+
+from ppdc_event_manager.eventos import TipoEvento, Evento
+from ppdc_event_manager.colas.cola_eventos import clave_orden
+from ppdc_event_manager.historial_eventos import HistorialEventos
+from ppdc_event_manager.linea_de_eventos import LineaDeEventos
+
+# Crea la línea de una región, como `fabrica(region, ids_estacion)`, agendando sólo los eventos
+# de sus estaciones. Debe ser una función definida a nivel de módulo, para enviarla a otro
+# proceso.
+FabricaRegion = Callable[[int, frozenset[int]], LineaDeEventos]
+
+_MICROSEGUNDO = dt.timedelta(microseconds=1)
+
+# Los eventos que crea cada región durante la simulación reciben ids desde
+# `(region + 1) * _IDS_POR_REGION`, para que no se repitan entre regiones.
+_IDS_POR_REGION = 1 << 40
+
+# Quién agendó un evento: (región, id del evento en curso, fase, orden), donde la fase es 0 si
+# se agendó durante su handler, o 1 si se agendó después del lote (la siguiente instancia de
+# un evento recurrente), y el orden cuenta los eventos agendados por el mismo evento y fase.
+# Es None para los eventos agendados por la fábrica.
+Origen = Optional[tuple[int, int, int, int]]
+
+
+def particionar_estaciones(
+    aristas: Iterable[tuple[int, int, dt.timedelta]], cantidad_regiones: int
+) -> dict[int, int]:
+    """Reparte las estaciones en [cantidad_regiones] regiones de tamaño similar, recorriendo
+    el grafo a lo ancho (BFS), de manera que cada región quede formada por estaciones cercanas.
+
+    Returns
+    -------
+    Entrega la región de cada estación.
+    """
+    vecinos: dict[int, list[int]] = dict()
+    for a, b, _ in aristas:
+        vecinos.setdefault(a, []).append(b)
+        vecinos.setdefault(b, []).append(a)
+
+    orden: list[int] = []
+    visitadas: set[int] = set()
+    for inicio in sorted(vecinos):
+        if inicio in visitadas:
+            continue
+        visitadas.add(inicio)
+        cola = deque([inicio])
+        while cola:
+            estacion = cola.popleft()
+            orden.append(estacion)
+            for vecina in sorted(vecinos[estacion]):
+                if vecina not in visitadas:
+                    visitadas.add(vecina)
+                    cola.append(vecina)
+
+    tamano = -(-len(orden) // cantidad_regiones)
+    return {estacion: i // tamano for i, estacion in enumerate(orden)}
+
+
+def _sin_handler(evento: Evento) -> Evento:
+    """Copia del evento que se puede enviar a otro proceso (los handlers no se envían)."""
+    return Evento.restaurar(
+        evento.tipo,
+        evento.ocurrencia,
+        evento.prioridad,
+        evento.id,
+        evento.ha_ocurrido,
+        evento._datos,
+    )
+
+
+def _ordenar_como_secuencial(historiales: list[list[tuple[Evento, Origen]]]) -> list[Evento]:
+    """Ordena los eventos ocurridos en las regiones como quedarían en el historial de una
+    simulación secuencial.
+
+    En la simulación secuencial, los eventos que empatan en fecha y prioridad se ejecutan en
+    el orden en que se agendaron, y cada uno queda en el historial antes de los anteriores
+    (ver [HistorialEventos.insertar]). Ese orden se reconstruye repitiendo la cola de la
+    simulación secuencial con el [Origen] de cada evento: los eventos de la fábrica se agendan
+    primero (por id), y cada lote agenda los eventos de sus handlers y luego los de después del
+    lote, en orden.
+
+    Parameters
+    ----------
+    historiales: list[list[tuple[Evento, Origen]]]
+        Eventos del historial de cada región, con su [Origen].
+    """
+    # Los eventos se identifican por (región en que ocurrieron, id).
+    ocurridos: set[tuple[int, int]] = set()
+    for region, historial in enumerate(historiales):
+        ocurridos.update((region, evento.id) for evento, _ in historial)
+
+    iniciales: list[tuple[int, int, Evento]] = []
+    por_origen: dict[tuple[int, int, int], list[tuple[int, int, Evento]]] = dict()
+    for region, historial in enumerate(historiales):
+        for evento, origen in historial:
+            # Los eventos cuyo origen no está en el historial se tratan como iniciales.
+            if origen is None or origen[:2] not in ocurridos:
+                iniciales.append((evento.id, region, evento))
+            else:
+                region_origen, id_origen, fase, orden = origen
+                por_origen.setdefault((region_origen, id_origen, fase), []).append(
+                    (orden, region, evento)
+                )
+    for agendados in por_origen.values():
+        agendados.sort(key=lambda agendado: agendado[0])
+
+    cola: list[tuple[dt.datetime, int, int, int, Evento]] = []
+    secuencia = 0
+    for _, region, evento in sorted(iniciales, key=lambda inicial: inicial[:2]):
+        cola.append((evento.ocurrencia, evento.prioridad, secuencia, region, evento))
+        secuencia += 1
+    heapq.heapify(cola)
+
+    # Posición de cada evento en el orden de ejecución de la simulación secuencial.
+    ejecucion: dict[tuple[int, int], int] = dict()
+    while cola:
+        fecha = cola[0][0]
+        lote = []
+        while cola and cola[0][0] == fecha:
+            _, _, _, region, evento = heapq.heappop(cola)
+            ejecucion[(region, evento.id)] = len(ejecucion)
+            lote.append((region, evento.id))
+        for fase in (0, 1):
+            for region, id_evento in lote:
+                for _, region_agendado, agendado in por_origen.get(
+                    (region, id_evento, fase), ()
+                ):
+                    heapq.heappush(
+                        cola,
+                        (
+                            agendado.ocurrencia,
+                            agendado.prioridad,
+                            secuencia,
+                            region_agendado,
+                            agendado,
+                        ),
+                    )
+                    secuencia += 1
+
+    return [
+        evento
+        for _, _, evento in sorted(
+            (
+                (clave_orden(evento), -ejecucion[(region, evento.id)], evento)
+                for region, historial in enumerate(historiales)
+                for evento, _ in historial
+            ),
+            key=lambda ordenado: ordenado[:2],
+        )
+    ]
+
+
+class _Region:
+    """Línea de una región, junto con los eventos que debe enviar a otras regiones, y el
+    [Origen] de sus eventos."""
+
+    def __init__(
+        self, fabrica: FabricaRegion, region: int, regiones: dict[int, int]
+    ) -> None:
+        self.region = region
+        self.regiones = regiones
+        self.salientes: list[tuple[int, Evento, Origen]] = []
+        self.limite: Optional[dt.datetime] = None
+        # Origen de los eventos agendados en esta región (ver [Origen]).
+        self.origenes: dict[int, Origen] = dict()
+        # Último evento en curso que agendó eventos, con su fase, y cuántos lleva agendados.
+        self.__agendando: Optional[tuple[int, int]] = None
+        self.__agendados: int = 0
+
+        estaciones = frozenset(e for e, r in regiones.items() if r == region)
+        self.linea = fabrica(region, estaciones)
+        if self.linea.ejecutor is not None:
+            raise Exception(
+                "[Error] Las regiones de una SimulacionParticionada no pueden ejecutar sus "
+                "lotes en paralelo: se perdería qué evento agendó a cada uno."
+            )
+        self.linea.next_id_evento = max(
+            self.linea.next_id_evento, (region + 1) * _IDS_POR_REGION
+        )
+        self.linea.enrutador = self.__enrutar
+        # [self.__origen] necesita saber qué evento agendó a cada uno.
+        self.linea.seguir_evento_en_curso = True
+        # Los eventos que la fábrica agendó hacia otras regiones también se envían.
+        for evento in list(self.linea.eventos):
+            if self.__enrutar(evento):
+                self.linea.eventos.eliminar(evento.id)
+
+    def __origen(self, evento: Evento) -> Origen:
+        """Registra (si no se conocía) quién agendó el evento, según el evento en curso."""
+        if evento.id in self.origenes:
+            return self.origenes[evento.id]
+        en_curso = self.linea.evento_en_curso
+        origen: Origen = None
+        if en_curso is not None:
+            # Después del lote, el evento en curso ya está marcado como ocurrido.
+            agendando = (en_curso.id, 1 if en_curso.ha_ocurrido else 0)
+            if agendando != self.__agendando:
+                self.__agendando = agendando
+                self.__agendados = 0
+            origen = (self.region, *agendando, self.__agendados)
+            self.__agendados += 1
+        self.origenes[evento.id] = origen
+        return origen
+
+    def __enrutar(self, evento: Evento) -> bool:
+        origen = self.__origen(evento)
+        if evento.tipo != TipoEvento.TREN_LLEGADA:
+            return False
+        destino = self.regiones.get(evento.obtener_dato("id_estacion_destino"))
+        if destino is None or destino == self.region:
+            return False
+        if self.limite is not None and evento.ocurrencia <= self.limite:
+            raise Exception(
+                f"[Error] La llegada {evento.id} a la región {destino} ocurre antes del fin "
+                "de la ventana: el viaje entre regiones es menor al lookahead."
+            )
+        self.salientes.append((destino, _sin_handler(evento), origen))
+        del self.origenes[evento.id]
+        return True
+
+    def avanzar(
+        self, hasta: dt.datetime, mensajes: list[tuple[Evento, Origen]]
+    ) -> tuple[list[tuple[int, Evento, Origen]], Optional[dt.datetime]]:
+        """Recibe las llegadas desde otras regiones, y ejecuta los eventos hasta [hasta].
+
+        Returns
+        -------
+        Entrega las llegadas que deben enviarse a otras regiones, y la fecha del próximo
+        evento de esta región.
+        """
+        linea = self.linea
+        # Los mensajes conservan su id y su origen. Sus ids pertenecen al rango de otra región,
+        # así que no deben adelantar el contador de esta línea.
+        siguiente_id = linea.next_id_evento
+        for evento, origen in mensajes:
+            if evento.id in linea.eventos or evento.id in self.origenes:
+                raise Exception(
+                    f"[Error] El id {evento.id} se repite entre regiones: los eventos "
+                    "iniciales de cada región deben tener ids distintos."
+                )
+            self.origenes[evento.id] = origen
+            linea.insertar_evento_futuro(evento)
+        linea.next_id_evento = siguiente_id
+
+        self.limite = hasta
+        linea.ejecutar(hasta=hasta)
+        return self.estado()
+
+    def estado(self) -> tuple[list[tuple[int, Evento, Origen]], Optional[dt.datetime]]:
+        """Entrega (y olvida) las llegadas que deben enviarse a otras regiones, junto con la
+        fecha del próximo evento de esta región."""
+        salientes, self.salientes = self.salientes, []
+        return salientes, self.linea.eventos.proxima_fecha()
+
+    def historial(self) -> list[tuple[Evento, Origen]]:
+        origenes = self.origenes
+        return [(_sin_handler(e), origenes.get(e.id)) for e in self.linea.historial_eventos]
+
+
+def _trabajador(conexion: Any, fabrica: FabricaRegion, region: int, regiones: dict) -> None:
+    """Ejecuta una región en su propio proceso, respondiendo los mensajes del coordinador."""
+    try:
+        estado = _Region(fabrica, region, regiones)
+        conexion.send(("listo", estado.estado()))
+        while True:
+            orden, *argumentos = conexion.recv()
+            if orden == "avanzar":
+                conexion.send(("listo", estado.avanzar(*argumentos)))
+            elif orden == "historial":
+                conexion.send(("listo", estado.historial()))
+            else:
+                break
+    except Exception:
+        # El error puede no ser serializable, así que se envía su traza como texto.
+        conexion.send(("error", traceback.format_exc()))
+    finally:
+        conexion.close()
+
+
+class SimulacionParticionada:
+    """Simulación repartida en regiones de la red, cada una con su propia [LineaDeEventos] en
+    su propio proceso.
+
+    Las llegadas de trenes (TREN_LLEGADA) hacia estaciones de otra región se envían como
+    mensajes a esa región. Las regiones se sincronizan de forma conservadora, por ventanas:
+    si el próximo evento de todas las regiones ocurre en T, ninguna región puede recibir un
+    mensaje antes de T + lookahead, donde lookahead es el menor tiempo de viaje entre
+    estaciones de regiones distintas. Así, en cada ventana todas las regiones ejecutan sus
+    eventos anteriores a T + lookahead en paralelo, y luego intercambian sus mensajes.
+
+    Para obtener el mismo resultado que una simulación secuencial, los handlers sólo deben
+    depender de las entidades de su evento (por ejemplo, con un generador aleatorio por tren).
+    El historial combinado queda en el mismo orden que el secuencial, también entre eventos que
+    empatan en fecha y prioridad (ver [_ordenar_como_secuencial]), si además:
+    - La fábrica da a los eventos iniciales los mismos ids que en la simulación secuencial, y
+      los agenda en orden de id (por ejemplo, con ids explícitos).
+    - Los eventos se agendan desde handlers por evento: un handler por lote sólo recibe los
+      eventos de su región, y lo que agenda se atribuye al primero de ellos.
+
+    Los mensajes conservan su id, y los eventos creados durante la simulación reciben ids del
+    rango de su región, por lo que no coinciden con los de la simulación secuencial.
+    """
+
+    def __init__(
+        self,
+        fabrica: FabricaRegion,
+        aristas: Iterable[tuple[int, int, dt.timedelta]],
+        regiones: Union[int, dict[int, int]],
+        en_procesos: bool = True,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        fabrica: FabricaRegion
+            Crea la línea de cada región (ver [FabricaRegion]).
+        aristas: Iterable[tuple[int, int, dt.timedelta]]
+            Vías de la red: (id_estacion_a, id_estacion_b, tiempo mínimo de viaje).
+        regiones: Union[int, dict[int, int]]
+            Cantidad de regiones (ver [particionar_estaciones]), o la región de cada estación.
+        en_procesos: bool = True
+            Si es False, las regiones se ejecutan en este proceso, una tras otra. Sirve para
+            depurar los handlers, ya que se obtiene el mismo resultado.
+        """
+        aristas = list(aristas)
+        if isinstance(regiones, int):
+            regiones = particionar_estaciones(aristas, regiones)
+        self.fabrica: FabricaRegion = fabrica
+        self.regiones: dict[int, int] = regiones
+        self.cantidad_regiones: int = max(regiones.values()) + 1 if regiones else 0
+        self.en_procesos: bool = en_procesos
+
+        # Menor tiempo de viaje entre regiones distintas. Si no hay vías entre regiones,
+        # cada región puede avanzar hasta el final sin sincronizarse.
+        cruces = [t for a, b, t in aristas if regiones.get(a) != regiones.get(b)]
+        self.lookahead: Optional[dt.timedelta] = min(cruces) if cruces else None
+        if self.lookahead is not None and self.lookahead <= dt.timedelta(0):
+            raise Exception("[Error] El tiempo de viaje entre regiones debe ser positivo.")
+
+        self.rondas: int = 0
+        self.mensajes: int = 0
+
+    def ejecutar(self, hasta: dt.datetime) -> HistorialEventos:
+        """Ejecuta todas las regiones hasta [hasta] (inclusive).
+
+        Returns
+        -------
+        Entrega el historial combinado de todas las regiones.
+        """
+        regiones: Union[_RegionesLocales, _RegionesEnProcesos]
+        if self.en_procesos:
+            regiones = _RegionesEnProcesos(self)
+        else:
+            regiones = _RegionesLocales(self)
+        try:
+            proximas, pendientes = self.__repartir(regiones.iniciar())
+            while True:
+                fechas = [f for f in proximas if f is not None]
+                fechas += [m.ocurrencia for mensajes in pendientes for m, _ in mensajes]
+                if not fechas or min(fechas) > hasta:
+                    break
+                fin_ventana = hasta
+                if self.lookahead is not None:
+                    fin_ventana = min(hasta, min(fechas) + self.lookahead - _MICROSEGUNDO)
+
+                proximas, pendientes = self.__repartir(
+                    regiones.avanzar(fin_ventana, pendientes)
+                )
+                self.rondas += 1
+
+            historiales = regiones.historiales()
+        finally:
+            regiones.cerrar()
+
+        return HistorialEventos(
+            _ordenar_como_secuencial(historiales)
+        )
+
+    def __repartir(
+        self,
+        respuestas: list[tuple[list[tuple[int, Evento, Origen]], Optional[dt.datetime]]],
+    ) -> tuple[list[Optional[dt.datetime]], list[list[tuple[Evento, Origen]]]]:
+        """Separa las respuestas de las regiones en sus próximas fechas y en los mensajes
+        para cada región. Los mensajes se ordenan por fecha, prioridad, región de origen y
+        orden de envío, por lo que no dependen de los procesos."""
+        proximas = []
+        enviados: list[list[tuple]] = [[] for _ in range(self.cantidad_regiones)]
+        for origen, (salientes, proxima) in enumerate(respuestas):
+            proximas.append(proxima)
+            for orden, (destino, evento, origen_evento) in enumerate(salientes):
+                enviados[destino].append(
+                    (clave_orden(evento), origen, orden, (evento, origen_evento))
+                )
+        self.mensajes += sum(len(mensajes) for mensajes in enviados)
+
+        pendientes = []
+        for mensajes in enviados:
+            mensajes.sort(key=lambda m: m[:3])
+            pendientes.append([m[-1] for m in mensajes])
+        return proximas, pendientes
+
+
+class _RegionesLocales:
+    def __init__(self, simulacion: SimulacionParticionada) -> None:
+        self.simulacion = simulacion
+        self.regiones: list[_Region] = []
+
+    def iniciar(self) -> list[tuple]:
+        self.regiones = [
+            _Region(self.simulacion.fabrica, r, self.simulacion.regiones)
+            for r in range(self.simulacion.cantidad_regiones)
+        ]
+        return [r.estado() for r in self.regiones]
+
+    def avanzar(
+        self, hasta: dt.datetime, pendientes: list[list[tuple[Evento, Origen]]]
+    ) -> list[tuple]:
+        return [r.avanzar(hasta, m) for r, m in zip(self.regiones, pendientes)]
+
+    def historiales(self) -> list[list[tuple[Evento, Origen]]]:
+        return [r.historial() for r in self.regiones]
+
+    def cerrar(self) -> None:
+        pass
+
+
+class _RegionesEnProcesos:
+    def __init__(self, simulacion: SimulacionParticionada) -> None:
+        self.simulacion = simulacion
+        self.procesos: list[Any] = []
+        self.conexiones: list[Any] = []
+
+    def __recibir(self) -> list[Any]:
+        respuestas = []
+        for region, conexion in enumerate(self.conexiones):
+            estado, valor = conexion.recv()
+            if estado == "error":
+                raise Exception(f"[Error] Falló la región {region}:\n{valor}")
+            respuestas.append(valor)
+        return respuestas
+
+    def iniciar(self) -> list[tuple]:
+        for region in range(self.simulacion.cantidad_regiones):
+            local, remota = multiprocessing.Pipe()
+            proceso = multiprocessing.Process(
+                target=_trabajador,
+                args=(remota, self.simulacion.fabrica, region, self.simulacion.regiones),
+                daemon=True,
+            )
+            proceso.start()
+            remota.close()
+            self.procesos.append(proceso)
+            self.conexiones.append(local)
+        return self.__recibir()
+
+    def avanzar(
+        self, hasta: dt.datetime, pendientes: list[list[tuple[Evento, Origen]]]
+    ) -> list[tuple]:
+        for conexion, mensajes in zip(self.conexiones, pendientes):
+            conexion.send(("avanzar", hasta, mensajes))
+        return self.__recibir()
+
+    def historiales(self) -> list[list[tuple[Evento, Origen]]]:
+        for conexion in self.conexiones:
+            conexion.send(("historial",))
+        return self.__recibir()
+
+    def cerrar(self) -> None:
+        for conexion in self.conexiones:
+            try:
+                conexion.send(("terminar",))
+            except (BrokenPipeError, OSError):
+                pass
+            conexion.close()
+        for proceso in self.procesos:
+            proceso.join(timeout=5)
+            if proceso.is_alive():
+                proceso.terminate()
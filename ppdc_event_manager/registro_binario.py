@@ -0,0 +1,400 @@
+"""Formato binario de eventos.
+
+Un registro comienza con una cabecera:
+    MAGIA (8 bytes) | cantidad de tipos (uint16) | por cada tipo: largo (uint8) + valor (utf-8)
+La tabla de tipos permite leer registros antiguos aunque el orden de [TipoEvento] cambie.
+
+Luego vienen los eventos, uno tras otro:
+    largo (uint32) | tipo (uint8) | ocurrencia (int64) | prioridad (int64) | id (int64)
+    | ha_ocurrido (uint8) | datos (pickle, opcional)
+donde [largo] cuenta los bytes que siguen, y la ocurrencia se guarda en microsegundos desde
+el 1 de enero de 1970.
+
+Los datos se guardan con [pickle], por lo que sólo deben leerse registros de fuentes confiables.
+"""
+
+import datetime as dt
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+from array import array
+from collections.abc import Sequence
+from typing import Any, BinaryIO, Iterable, Iterator, Optional, Union
+
+from ppdc_event_manager.eventos import TipoEvento, Evento
+
+
+MAGIA = b"PPDCLOG1"
+MAGIA_PUNTO_CONTROL = b"PPDCCHK1"
+_POSICION = struct.Struct("<Q")
+_LARGO = struct.Struct("<I")
+_EVENTO = struct.Struct("<BqqqB")
+_CANTIDAD_TIPOS = struct.Struct("<H")
+
+_EPOCA = dt.datetime(1970, 1, 1)
+_MICROSEGUNDO = dt.timedelta(microseconds=1)
+
+
+def _cabecera() -> bytes:
+    partes = [MAGIA, _CANTIDAD_TIPOS.pack(len(TipoEvento))]
+    for tipo in TipoEvento:
+        valor = tipo.value.encode("utf-8")
+        partes.append(bytes([len(valor)]) + valor)
+    return b"".join(partes)
+
+
+def _leer_cabecera(buffer: Any, inicio: int) -> tuple[list[TipoEvento], int]:
+    """Entrega la tabla de tipos de la cabecera, y la posición del primer evento."""
+    if bytes(buffer[inicio : inicio + len(MAGIA)]) != MAGIA:
+        raise Exception("[Error] El archivo no es un registro binario de eventos.")
+    posicion = inicio + len(MAGIA)
+    (cantidad,) = _CANTIDAD_TIPOS.unpack_from(buffer, posicion)
+    posicion += _CANTIDAD_TIPOS.size
+    tipos = []
+    for _ in range(cantidad):
+        largo = buffer[posicion]
+        valor = bytes(buffer[posicion + 1 : posicion + 1 + largo]).decode("utf-8")
+        tipos.append(TipoEvento(valor))
+        posicion += 1 + largo
+    return tipos, posicion
+
+
+# Código numérico de cada [TipoEvento], para guardarlo en un arreglo de bytes. También lo
+# utiliza [HistorialColumnar].
+CODIGOS_TIPO: dict[TipoEvento, int] = {tipo: i for i, tipo in enumerate(TipoEvento)}
+
+
+def codificar_evento(
+    evento: Evento, codigos: dict[TipoEvento, int] = CODIGOS_TIPO
+) -> bytes:
+    """Entrega los bytes de un evento, incluyendo su largo inicial.
+    [codigos] corresponde con la tabla de tipos de la cabecera del registro."""
+    cuerpo = _EVENTO.pack(
+        codigos[evento.tipo],
+        (evento.ocurrencia - _EPOCA) // _MICROSEGUNDO,
+        evento.prioridad,
+        evento.id,
+        evento.ha_ocurrido,
+    )
+    # Se lee [_datos] directamente para no crear el diccionario si el evento no tiene datos.
+    if evento._datos:
+        cuerpo += pickle.dumps(evento._datos, protocol=pickle.HIGHEST_PROTOCOL)
+    return _LARGO.pack(len(cuerpo)) + cuerpo
+
+
+def decodificar_evento(
+    buffer: Any, posicion: int, tipos: list[TipoEvento]
+) -> tuple[Evento, int]:
+    """Lee el evento que comienza en [posicion].
+
+    Returns
+    -------
+    Entrega el [Evento] (sin handler) y la posición del siguiente evento.
+    """
+    (largo,) = _LARGO.unpack_from(buffer, posicion)
+    inicio = posicion + _LARGO.size
+    codigo, micros, prioridad, id_evento, ha_ocurrido = _EVENTO.unpack_from(buffer, inicio)
+    datos = None
+    if largo > _EVENTO.size:
+        datos = pickle.loads(buffer[inicio + _EVENTO.size : inicio + largo])
+    evento = Evento.restaurar(
+        tipos[codigo],
+        _EPOCA + dt.timedelta(microseconds=micros),
+        prioridad,
+        id_evento,
+        bool(ha_ocurrido),
+        datos,
+    )
+    return evento, inicio + largo
+
+
+class RegistroBinario:
+    """Registro binario de eventos, en el que sólo se agregan eventos al final del archivo.
+    Si el archivo ya existe, los nuevos eventos se agregan después de los que tenía, con los
+    códigos de tipo de su cabecera. Si a esa cabecera le falta algún [TipoEvento] actual, no
+    se puede agregar al registro.
+
+    Ver [LineaDeEventos.activar_registro] para registrar automáticamente el historial.
+    """
+
+    def __init__(self, ruta: Union[str, os.PathLike]) -> None:
+        self.ruta = ruta
+        existe = os.path.exists(ruta) and os.path.getsize(ruta) > 0
+        self.__codigos: dict[TipoEvento, int] = CODIGOS_TIPO
+        if existe:
+            self.__codigos = self.__leer_codigos(ruta)
+        self.__archivo: BinaryIO = open(ruta, "ab")
+        if not existe:
+            self.__archivo.write(_cabecera())
+
+    @staticmethod
+    def __leer_codigos(ruta: Union[str, os.PathLike]) -> dict[TipoEvento, int]:
+        """Lee la tabla de tipos de la cabecera de un registro existente."""
+        with open(ruta, "rb") as archivo:
+            inicio = archivo.read(len(MAGIA) + _CANTIDAD_TIPOS.size)
+            if len(inicio) < len(MAGIA) + _CANTIDAD_TIPOS.size or inicio[: len(MAGIA)] != MAGIA:
+                raise Exception(f"[Error] {ruta} no es un registro binario de eventos.")
+            (cantidad,) = _CANTIDAD_TIPOS.unpack_from(inicio, len(MAGIA))
+            # Cada tipo ocupa a lo más 256 bytes (largo + valor).
+            cabecera = inicio + archivo.read(cantidad * 256)
+        try:
+            tipos, _ = _leer_cabecera(cabecera, 0)
+        except ValueError:
+            tipos = []
+        faltantes = set(TipoEvento) - set(tipos)
+        if faltantes or len(tipos) != cantidad:
+            raise Exception(
+                f"[Error] La cabecera de {ruta} no corresponde con los tipos de evento "
+                "actuales, por lo que no se le pueden agregar eventos."
+            )
+        return {tipo: i for i, tipo in enumerate(tipos)}
+
+    def escribir(self, evento: Evento) -> None:
+        self.__archivo.write(codificar_evento(evento, self.__codigos))
+
+    def escribir_varios(self, eventos: Iterable[Evento]) -> None:
+        self.__archivo.write(
+            b"".join(codificar_evento(e, self.__codigos) for e in eventos)
+        )
+
+    def flush(self) -> None:
+        self.__archivo.flush()
+
+    def cerrar(self) -> None:
+        self.__archivo.close()
+
+    def __enter__(self) -> "RegistroBinario":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.cerrar()
+
+
+class LectorRegistro(Sequence):
+    """Lectura de un registro binario utilizando [mmap]: el archivo no se carga completo en
+    memoria, y cada evento se decodifica recién cuando se accede a él.
+
+    Para el acceso por índice se necesita la posición de cada evento. Si no se entregan
+    ([desplazamientos]), ni están en el mismo archivo ([posicion_indice]), se calculan a medida
+    que se necesitan, leyendo sólo los largos. Los eventos accedidos por índice se leen con
+    [os.pread] (si existe), para que las páginas leídas no queden en la memoria del proceso.
+    """
+
+    def __init__(
+        self,
+        ruta: Union[str, os.PathLike],
+        inicio: int = 0,
+        fin: Optional[int] = None,
+        desplazamientos: Optional[array] = None,
+        posicion_indice: Optional[int] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        inicio: int = 0
+            Posición del archivo en la que comienza el registro (su cabecera).
+        fin: Optional[int] = None
+            Posición en la que termina el registro. Por defecto, el final del archivo.
+        desplazamientos: Optional[array] = None
+            Posición de cada evento, si ya se conocen.
+        posicion_indice: Optional[int] = None
+            Posición del archivo desde la que, hasta el final, está la posición de cada
+            evento (uint64), como la escribe [escribir_segmento]. Se lee desde el archivo,
+            sin guardarla en memoria.
+        """
+        self.ruta = ruta
+        with open(ruta, "rb") as archivo:
+            self.__mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        self.__descriptor = os.open(ruta, os.O_RDONLY) if hasattr(os, "pread") else None
+        self.__fin = fin if fin is not None else len(self.__mapa)
+        self.tipos, self.__primer_evento = _leer_cabecera(self.__mapa, inicio)
+
+        self.__desplazamientos = array("q")
+        self.__posicion_indice = posicion_indice
+        self.__completo = posicion_indice is not None
+        if desplazamientos is not None:
+            self.__desplazamientos = desplazamientos
+            self.__completo = True
+
+    def __leer(self, posicion: int, largo: int) -> bytes:
+        if self.__descriptor is None:
+            return self.__mapa[posicion : posicion + largo]
+        return os.pread(self.__descriptor, largo, posicion)
+
+    def __indexar_hasta(self, indice: Optional[int]) -> None:
+        """Calcula las posiciones de los eventos hasta [indice] (o todos, si es None)."""
+        if self.__completo:
+            return
+        desplazamientos = self.__desplazamientos
+        if desplazamientos:
+            (largo,) = _LARGO.unpack_from(self.__mapa, desplazamientos[-1])
+            posicion = desplazamientos[-1] + _LARGO.size + largo
+        else:
+            posicion = self.__primer_evento
+        while indice is None or len(desplazamientos) <= indice:
+            if posicion + _LARGO.size > self.__fin:
+                self.__completo = True
+                return
+            desplazamientos.append(posicion)
+            (largo,) = _LARGO.unpack_from(self.__mapa, posicion)
+            posicion += _LARGO.size + largo
+
+    def __len__(self) -> int:
+        if self.__posicion_indice is not None:
+            return (len(self.__mapa) - self.__posicion_indice) // _POSICION.size
+        self.__indexar_hasta(None)
+        return len(self.__desplazamientos)
+
+    def __desplazamiento(self, indice: int) -> int:
+        if self.__posicion_indice is None:
+            return self.__desplazamientos[indice]
+        posicion = self.__posicion_indice + indice * _POSICION.size
+        return _POSICION.unpack(self.__leer(posicion, _POSICION.size))[0]
+
+    def __getitem__(self, indice: Union[int, slice]):
+        if isinstance(indice, slice):
+            return [self[i] for i in range(*indice.indices(len(self)))]
+        if indice < 0:
+            indice += len(self)
+        self.__indexar_hasta(indice)
+        if indice < 0 or indice >= len(self):
+            raise IndexError("[Error] Índice fuera del registro de eventos.")
+        posicion = self.__desplazamiento(indice)
+        (largo,) = _LARGO.unpack(self.__leer(posicion, _LARGO.size))
+        datos = self.__leer(posicion, _LARGO.size + largo)
+        return decodificar_evento(datos, 0, self.tipos)[0]
+
+    def __iter__(self) -> Iterator[Evento]:
+        posicion = self.__primer_evento
+        try:
+            while posicion + _LARGO.size <= self.__fin:
+                evento, posicion = decodificar_evento(self.__mapa, posicion, self.tipos)
+                yield evento
+        finally:
+            self.__liberar_paginas(posicion)
+
+    def __liberar_paginas(self, hasta: int) -> None:
+        """Avisa al sistema que las páginas ya recorridas no se volverán a necesitar pronto,
+        para que un recorrido completo (ej: al exportar) no deje el archivo entero en memoria.
+        """
+        if not hasattr(mmap, "MADV_DONTNEED") or self.__mapa.closed:
+            return
+        largo = hasta - hasta % mmap.PAGESIZE
+        if largo > 0:
+            self.__mapa.madvise(mmap.MADV_DONTNEED, 0, largo)
+
+    def cerrar(self) -> None:
+        if self.__descriptor is not None:
+            os.close(self.__descriptor)
+            self.__descriptor = None
+        self.__mapa.close()
+
+    def __enter__(self) -> "LectorRegistro":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.cerrar()
+
+
+def escribir_segmento(
+    ruta: Union[str, os.PathLike], eventos: Iterable[Evento]
+) -> LectorRegistro:
+    """Escribe los eventos en un nuevo registro binario, seguido de la posición de cada
+    evento, y entrega su lector. Así, el lector no necesita guardar las posiciones en memoria."""
+    cabecera = _cabecera()
+    posicion = len(cabecera)
+    desplazamientos = array("q")
+    with open(ruta, "wb") as archivo:
+        archivo.write(cabecera)
+        for evento in eventos:
+            datos = codificar_evento(evento)
+            desplazamientos.append(posicion)
+            archivo.write(datos)
+            posicion += len(datos)
+        archivo.write(b"".join(_POSICION.pack(d) for d in desplazamientos))
+    return LectorRegistro(ruta, 0, posicion, posicion_indice=posicion)
+
+
+def guardar_punto_control(
+    ruta: Union[str, os.PathLike],
+    metadatos: dict[str, Any],
+    historial: Iterable[Evento],
+    pendientes: Iterable[Evento],
+) -> None:
+    """Guarda un punto de control: el historial y los eventos pendientes, cada uno como un
+    registro binario, seguidos de los [metadatos] (con las posiciones de cada evento del
+    historial, para poder leerlo sin recorrerlo).
+
+    Formato:
+        MAGIA_PUNTO_CONTROL | posición de los metadatos (uint64)
+        | registro del historial | registro de pendientes | metadatos (pickle)
+
+    El archivo se escribe primero con otro nombre, en la misma carpeta, y luego reemplaza a
+    [ruta]. Así, se puede guardar sobre el punto de control desde el que se cargó la línea,
+    aunque su historial aún se lea (con [mmap]) desde el archivo anterior.
+    """
+    descriptor, ruta_temporal = tempfile.mkstemp(
+        prefix=".punto_control_", dir=os.path.dirname(os.path.abspath(ruta))
+    )
+    try:
+        with os.fdopen(descriptor, "wb") as archivo:
+            _escribir_punto_control(archivo, metadatos, historial, pendientes)
+        os.replace(ruta_temporal, ruta)
+    except BaseException:
+        os.remove(ruta_temporal)
+        raise
+
+
+def _escribir_punto_control(
+    archivo: BinaryIO,
+    metadatos: dict[str, Any],
+    historial: Iterable[Evento],
+    pendientes: Iterable[Evento],
+) -> None:
+    archivo.write(MAGIA_PUNTO_CONTROL + _POSICION.pack(0))
+    secciones = dict()
+    for nombre, eventos in (("historial", historial), ("pendientes", pendientes)):
+        inicio = archivo.tell()
+        cabecera = _cabecera()
+        archivo.write(cabecera)
+        posicion = inicio + len(cabecera)
+        desplazamientos = array("q")
+        for evento in eventos:
+            datos = codificar_evento(evento)
+            desplazamientos.append(posicion)
+            archivo.write(datos)
+            posicion += len(datos)
+        secciones[nombre] = (inicio, posicion, desplazamientos.tobytes())
+
+    posicion_metadatos = archivo.tell()
+    metadatos = dict(metadatos, secciones=secciones)
+    archivo.write(pickle.dumps(metadatos, protocol=pickle.HIGHEST_PROTOCOL))
+    archivo.seek(len(MAGIA_PUNTO_CONTROL))
+    archivo.write(_POSICION.pack(posicion_metadatos))
+
+
+def leer_punto_control(
+    ruta: Union[str, os.PathLike],
+) -> tuple[dict[str, Any], LectorRegistro, LectorRegistro]:
+    """Lee un punto de control creado con [guardar_punto_control].
+
+    Returns
+    -------
+    Entrega los metadatos, y los lectores (con [mmap]) del historial y de los pendientes.
+    """
+    with open(ruta, "rb") as archivo:
+        if archivo.read(len(MAGIA_PUNTO_CONTROL)) != MAGIA_PUNTO_CONTROL:
+            raise Exception(f"[Error] {ruta} no es un punto de control de eventos.")
+        (posicion_metadatos,) = _POSICION.unpack(archivo.read(_POSICION.size))
+        archivo.seek(posicion_metadatos)
+        metadatos = pickle.loads(archivo.read())
+
+    lectores = []
+    for nombre in ("historial", "pendientes"):
+        inicio, fin, desplazamientos = metadatos["secciones"][nombre]
+        indice = array("q")
+        indice.frombytes(desplazamientos)
+        lectores.append(LectorRegistro(ruta, inicio, fin, indice))
+    return metadatos, lectores[0], lectores[1]
@@ -0,0 +1,262 @@
+import datetime as dt
+import math
+import random
+import statistics
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Iterator, Optional
+
+from ppdc_event_manager.linea_de_eventos import EstadisticasEjecucion, LineaDeEventos
+
+# Crea la línea de una réplica a partir de su semilla. Debe poder enviarse a otro proceso
+# (con [pickle]), por lo que debe ser una función definida a nivel de módulo.
+FabricaEscenario = Callable[[int], LineaDeEventos]
+# Resume una réplica ya ejecutada como un diccionario de valores numéricos.
+ResumirReplica = Callable[[LineaDeEventos, EstadisticasEjecucion], dict[str, float]]
+# Grados de libertad hasta los que [cuantil_t] utiliza la distribución exacta.
+_MAX_GRADOS_EXACTOS = 1000
+
+
+def cuantil_t(probabilidad: float, grados_libertad: int) -> float:
+    """Cuantil de la distribución t de Student. Hasta [_MAX_GRADOS_EXACTOS] grados de libertad
+    se obtiene invirtiendo (con el método de Newton) la distribución acumulada exacta; con más
+    grados, se utiliza la expansión de Cornish-Fisher desde la distribución normal, cuyo error
+    ya es menor a 1e-10."""
+    if probabilidad < 0.5:
+        return -cuantil_t(1 - probabilidad, grados_libertad)
+    if grados_libertad == 1:
+        return math.tan(math.pi * (probabilidad - 0.5))
+    if grados_libertad == 2:
+        return (2 * probabilidad - 1) / math.sqrt(2 * probabilidad * (1 - probabilidad))
+    z = statistics.NormalDist().inv_cdf(probabilidad)
+    g = grados_libertad
+    t = (
+        z
+        + (z**3 + z) / (4 * g)
+        + (5 * z**5 + 16 * z**3 + 3 * z) / (96 * g**2)
+        + (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / (384 * g**3)
+    )
+    if g > _MAX_GRADOS_EXACTOS:
+        return t
+
+    # Constante de la densidad: Γ((g + 1) / 2) / (√(g π) Γ(g / 2)).
+    constante = math.exp(
+        math.lgamma((g + 1) / 2) - math.lgamma(g / 2) - 0.5 * math.log(g * math.pi)
+    )
+    for _ in range(50):
+        densidad = constante * (1 + t * t / g) ** (-(g + 1) / 2)
+        paso = (_distribucion_t(t, g) - probabilidad) / densidad
+        t -= paso
+        if abs(paso) <= 1e-12 * max(1.0, abs(t)):
+            break
+    return t
+
+
+def _distribucion_t(t: float, grados_libertad: int) -> float:
+    """Probabilidad acumulada de la distribución t de Student con grados de libertad enteros,
+    utilizando su forma cerrada como suma finita (Abramowitz y Stegun, 26.7.3 y 26.7.4)."""
+    g = grados_libertad
+    theta = math.atan(t / math.sqrt(g))
+    seno, coseno = math.sin(theta), math.cos(theta)
+    coseno2 = coseno * coseno
+    if g % 2 == 1:
+        # (2 / π) (θ + sen θ (cos θ + 2/3 cos³ θ + ... + 2·4···(g-3) / 1·3···(g-2) cos^(g-2) θ))
+        termino, suma = coseno, 0.0
+        for k in range(1, (g - 1) // 2 + 1):
+            suma += termino
+            termino *= coseno2 * (2 * k) / (2 * k + 1)
+        a = 2 / math.pi * (theta + seno * suma)
+    else:
+        # sen θ (1 + 1/2 cos² θ + ... + 1·3···(g-3) / 2·4···(g-2) cos^(g-2) θ)
+        termino, suma = 1.0, 0.0
+        for k in range(1, g // 2 + 1):
+            suma += termino
+            termino *= coseno2 * (2 * k - 1) / (2 * k)
+        a = seno * suma
+    # [a] es la probabilidad de que |T| < |t|, con el signo de [t].
+    return 0.5 + a / 2
+
+
+class EstadisticaIncremental:
+    """Media y varianza de una serie de valores, actualizadas con cada nuevo valor
+    (algoritmo de Welford), sin guardar los valores."""
+
+    def __init__(self) -> None:
+        self.cantidad: int = 0
+        self.media: float = 0.0
+        self.__m2: float = 0.0
+        self.minimo: float = math.inf
+        self.maximo: float = -math.inf
+
+    def agregar(self, valor: float) -> None:
+        self.cantidad += 1
+        delta = valor - self.media
+        self.media += delta / self.cantidad
+        self.__m2 += delta * (valor - self.media)
+        self.minimo = min(self.minimo, valor)
+        self.maximo = max(self.maximo, valor)
+
+    @property
+    def varianza(self) -> float:
+        """Varianza muestral (con n - 1)."""
+        if self.cantidad < 2:
+            return 0.0
+        return self.__m2 / (self.cantidad - 1)
+
+    @property
+    def desviacion(self) -> float:
+        return math.sqrt(self.varianza)
+
+    def intervalo_confianza(self, nivel: float = 0.95) -> tuple[float, float]:
+        """Intervalo de confianza para la media, utilizando la distribución t de Student.
+        Con menos de dos valores, el intervalo es infinito."""
+        if self.cantidad < 2:
+            return (-math.inf, math.inf)
+        t = cuantil_t(1 - (1 - nivel) / 2, self.cantidad - 1)
+        margen = t * self.desviacion / math.sqrt(self.cantidad)
+        return (self.media - margen, self.media + margen)
+
+    def resumen(self, nivel: float = 0.95) -> dict[str, Any]:
+        return {
+            "cantidad": self.cantidad,
+            "media": self.media,
+            "desviacion": self.desviacion,
+            "minimo": self.minimo,
+            "maximo": self.maximo,
+            "intervalo_confianza": self.intervalo_confianza(nivel),
+        }
+
+
+def resumen_basico(
+    linea: LineaDeEventos, estadisticas: EstadisticasEjecucion
+) -> dict[str, float]:
+    """Resumen por defecto de una réplica."""
+    return {
+        "eventos": estadisticas.eventos,
+        "lotes": estadisticas.lotes,
+        "duracion": estadisticas.duracion,
+        "largo_historial": len(linea.historial_eventos),
+    }
+
+
+def semilla_replica(semilla: int, indice: int) -> int:
+    """Semilla de la réplica [indice]. Depende sólo de [semilla] y del índice, por lo que
+    los resultados no dependen del proceso en que se ejecute cada réplica."""
+    return random.Random(f"{semilla}:{indice}").getrandbits(63)
+
+
+def _ejecutar_replica(
+    fabrica: FabricaEscenario,
+    resumir: ResumirReplica,
+    indice: int,
+    semilla: int,
+    hasta: Optional[dt.datetime],
+    max_eventos: Optional[int],
+) -> tuple[int, dict[str, float]]:
+    linea = fabrica(semilla)
+    estadisticas = linea.ejecutar(max_eventos=max_eventos, hasta=hasta)
+    return indice, resumir(linea, estadisticas)
+
+
+class Replicaciones:
+    """Ejecuta varias réplicas independientes de un escenario (una [LineaDeEventos] por
+    réplica, creada por [fabrica] con su propia semilla), repartidas en un grupo de procesos.
+
+    Cada réplica entrega un resumen (un diccionario de valores numéricos), que se agrega en
+    [self.estadisticas] a medida que las réplicas terminan.
+
+    Las réplicas no comparten estado: cada [LineaDeEventos] asigna los ids de sus eventos con su
+    propio contador (ver [LineaDeEventos.crear_evento]).
+
+    Ejemplo:
+        def escenario(semilla: int) -> LineaDeEventos:
+            estado = EstadoSintetico(fecha, 100, 1_000, semilla=semilla)
+            estado.agendar_viajes_iniciales()
+            return estado.admin_eventos
+
+        replicas = Replicaciones(escenario, hasta=fecha + dt.timedelta(hours=12))
+        for indice, resumen in replicas.ejecutar(100, semilla=42):
+            print(indice, resumen["eventos"])
+        print(replicas.resumen())
+    """
+
+    def __init__(
+        self,
+        fabrica: FabricaEscenario,
+        resumir: ResumirReplica = resumen_basico,
+        hasta: Optional[dt.datetime] = None,
+        max_eventos: Optional[int] = None,
+        max_procesos: Optional[int] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        fabrica: FabricaEscenario
+            Función (a nivel de módulo) que crea la línea de una réplica a partir de su semilla.
+        resumir: ResumirReplica = resumen_basico
+            Función (a nivel de módulo) que resume una réplica al terminar su ejecución.
+        hasta: Optional[dt.datetime] = None
+            Fecha hasta la que se ejecuta cada réplica (ver [LineaDeEventos.ejecutar]).
+        max_eventos: Optional[int] = None
+            Cantidad máxima de eventos por réplica.
+        max_procesos: Optional[int] = None
+            Procesos a utilizar. Por defecto, uno por núcleo. Con 1, las réplicas se ejecutan
+            en este mismo proceso.
+        """
+        if hasta is None and max_eventos is None:
+            raise Exception(
+                "[Error] Las réplicas necesitan un límite: [hasta] o [max_eventos]."
+            )
+        self.fabrica: FabricaEscenario = fabrica
+        self.resumir: ResumirReplica = resumir
+        self.hasta: Optional[dt.datetime] = hasta
+        self.max_eventos: Optional[int] = max_eventos
+        self.max_procesos: Optional[int] = max_procesos
+
+        self.estadisticas: dict[str, EstadisticaIncremental] = dict()
+
+    def __agregar(self, resumen: dict[str, float]) -> None:
+        for clave, valor in resumen.items():
+            estadistica = self.estadisticas.get(clave)
+            if estadistica is None:
+                estadistica = self.estadisticas[clave] = EstadisticaIncremental()
+            estadistica.agregar(valor)
+
+    def ejecutar(
+        self, replicas: int, semilla: int = 0
+    ) -> Iterator[tuple[int, dict[str, float]]]:
+        """Ejecuta [replicas] réplicas, entregando `(indice, resumen)` de cada una a medida
+        que terminan (no necesariamente en orden). Cada resumen se agrega a
+        [self.estadisticas] antes de entregarlo."""
+        argumentos = [
+            (
+                self.fabrica,
+                self.resumir,
+                indice,
+                semilla_replica(semilla, indice),
+                self.hasta,
+                self.max_eventos,
+            )
+            for indice in range(replicas)
+        ]
+
+        if self.max_procesos == 1:
+            for args in argumentos:
+                indice, resumen = _ejecutar_replica(*args)
+                self.__agregar(resumen)
+                yield indice, resumen
+            return
+
+        with ProcessPoolExecutor(max_workers=self.max_procesos) as ejecutor:
+            futuros = [ejecutor.submit(_ejecutar_replica, *args) for args in argumentos]
+            for futuro in as_completed(futuros):
+                indice, resumen = futuro.result()
+                self.__agregar(resumen)
+                yield indice, resumen
+
+    def resumen(self, nivel: float = 0.95) -> dict[str, dict[str, Any]]:
+        """Entrega, para cada valor de los resúmenes, su media, desviación, mínimo, máximo e
+        intervalo de confianza al [nivel] indicado."""
+        return {
+            clave: estadistica.resumen(nivel)
+            for clave, estadistica in self.estadisticas.items()
+        }
@@ -0,0 +1,98 @@
+import datetime as dt
+import os
+import tempfile
+from typing import Any, Iterable, Optional, Union
+
+from ppdc_event_manager.eventos import Evento
+from ppdc_event_manager.registro_binario import LectorRegistro, escribir_segmento
+
+
+class PoliticaRetencion:
+    """Indica cuánto del historial se mantiene en memoria. Los eventos más antiguos se
+    escriben a segmentos en disco (registros binarios, ver [LectorRegistro]), y el historial
+    los sigue entregando de forma transparente, leyéndolos desde el disco cuando se necesitan.
+
+    Los eventos se escriben a disco en bloques de al menos [tamano_segmento] eventos, por lo
+    que en memoria pueden quedar hasta [max_eventos] + [tamano_segmento] eventos. Los eventos
+    escritos a disco no se vuelven a cargar en memoria, por lo que insertar un evento anterior
+    a ellos (ej: con [LineaDeEventos.insertar_evento_pasado]) lanza un error.
+
+    Los eventos leídos desde disco son nuevas instancias de [Evento] (sin handler), por lo que
+    no se debe comparar su identidad con `is`.
+
+    Los segmentos se mantienen abiertos (con [mmap]) mientras el historial los necesite. Al
+    terminar, [self.cerrar] (o usar la política con `with`) los cierra y borra sus archivos; la
+    carpeta temporal, si se creó una, también se borra al terminar el programa.
+    """
+
+    def __init__(
+        self,
+        max_eventos: Optional[int] = None,
+        max_tiempo: Optional[dt.timedelta] = None,
+        directorio: Optional[Union[str, os.PathLike]] = None,
+        tamano_segmento: int = 10_000,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        max_eventos: Optional[int] = None
+            Cantidad de eventos más recientes que se mantienen en memoria.
+        max_tiempo: Optional[dt.timedelta] = None
+            Se mantienen en memoria los eventos ocurridos dentro de este tiempo, contado
+            desde el último evento del historial.
+        directorio: Optional[str] = None
+            Carpeta para los segmentos. Si es None, se crea una carpeta temporal.
+        tamano_segmento: int = 10_000
+            Cantidad mínima de eventos que se escriben juntos en un segmento.
+        """
+        if max_eventos is None and max_tiempo is None:
+            raise Exception(
+                "[Error] La política de retención necesita max_eventos o max_tiempo."
+            )
+        self.max_eventos: Optional[int] = max_eventos
+        self.max_tiempo: Optional[dt.timedelta] = max_tiempo
+        self.tamano_segmento: int = max(1, tamano_segmento)
+        self.__directorio = directorio
+        self.__temporal: Optional[tempfile.TemporaryDirectory] = None
+        # Segmentos escritos con esta política, compartidos por todas las ramas del historial.
+        self.segmentos: list[LectorRegistro] = []
+
+    @property
+    def directorio(self) -> Union[str, os.PathLike]:
+        if self.__directorio is None:
+            self.__temporal = tempfile.TemporaryDirectory(prefix="ppdc_historial_")
+            self.__directorio = self.__temporal.name
+        return self.__directorio
+
+    def nueva_ruta_segmento(self) -> str:
+        """Entrega la ruta de un archivo nuevo (y único) para un segmento."""
+        descriptor, ruta = tempfile.mkstemp(
+            prefix="segmento_", suffix=".bin", dir=self.directorio
+        )
+        os.close(descriptor)
+        return ruta
+
+    def escribir_segmento(self, eventos: Iterable[Evento]) -> LectorRegistro:
+        """Escribe los eventos en un nuevo segmento, y entrega su lector."""
+        segmento = escribir_segmento(self.nueva_ruta_segmento(), eventos)
+        self.segmentos.append(segmento)
+        return segmento
+
+    def cerrar(self) -> None:
+        """Cierra y borra los segmentos escritos, y la carpeta temporal si se creó una.
+        Los historiales que utilizan esta política ya no pueden leer sus eventos antiguos."""
+        for segmento in self.segmentos:
+            segmento.cerrar()
+            if os.path.exists(segmento.ruta):
+                os.remove(segmento.ruta)
+        self.segmentos = []
+        if self.__temporal is not None:
+            self.__temporal.cleanup()
+            self.__temporal = None
+            self.__directorio = None
+
+    def __enter__(self) -> "PoliticaRetencion":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.cerrar()
@@ -0,0 +1,367 @@
+import heapq
+import math
+from array import array
+from collections import OrderedDict
+from typing import Any, Optional
+
+from ppdc_event_manager.eventos import TipoEvento, Evento
+
+# Tiempo de viaje (en minutos) de las vías que no lo indican.
+MINUTOS_POR_DEFECTO = 60.0
+
+# Valor de [_Arbol.vias_previas] para los nodos sin vía previa (el origen, o inalcanzables),
+# y de [Topologia.ids_via] para las vías quitadas.
+SIN_VIA = -1
+
+# Los arreglos CSR de [Topologia] se reconstruyen cuando las vías quitadas y las adicionales
+# superan esta fracción de las vías (o [_MIN_COMPACTAR]).
+FRACCION_COMPACTAR = 0.125
+_MIN_COMPACTAR = 64
+
+
+class _Arbol:
+    """Caminos mínimos desde un origen (Dijkstra), por índice de nodo."""
+
+    __slots__ = ("distancias", "vias_previas")
+
+    def __init__(self, distancias: array, vias_previas: array) -> None:
+        self.distancias: array = distancias
+        self.vias_previas: array = vias_previas
+
+    def distancia(self, nodo: int) -> float:
+        # Los nodos agregados después de calcular el árbol no son alcanzables desde él,
+        # salvo que una nueva vía los conecte (lo que invalida el árbol).
+        if nodo >= len(self.distancias):
+            return math.inf
+        return self.distancias[nodo]
+
+    def usa_via(self, id_via: int, nodo_a: int, nodo_b: int) -> bool:
+        for nodo in (nodo_a, nodo_b):
+            if nodo < len(self.vias_previas) and self.vias_previas[nodo] == id_via:
+                return True
+        return False
+
+
+class Topologia:
+    """Red de estaciones y vías, con tiempos de viaje por vía, y un oráculo de tiempos de
+    viaje mínimos entre estaciones.
+
+    Las vías se guardan en formato CSR (módulo [array]): los vecinos del nodo `i` son
+    `destinos[inicios[i]:inicios[i + 1]]`, con sus tiempos en [tiempos] y sus ids de vía en
+    [ids_via]. Cada estación corresponde con un nodo (ver [self.indices]).
+
+    Los cambios no reconstruyen los arreglos: el tiempo de una vía se actualiza en su lugar,
+    una vía quitada queda marcada (id [SIN_VIA] y tiempo infinito), y las vías y estaciones
+    nuevas se agregan a listas de adyacencia adicionales. Los arreglos se reconstruyen sólo
+    cuando las marcas y vías adicionales superan una fracción de la red
+    ([FRACCION_COMPACTAR]), antes de la siguiente consulta.
+
+    Los caminos mínimos se calculan (Dijkstra) una vez por estación de origen, y se guardan.
+    Al cambiar la red, sólo se descartan los orígenes cuyos caminos podrían cambiar: al agregar
+    una vía o reducir su tiempo, los que mejoran pasando por ella; al quitarla o aumentar su
+    tiempo, los que la utilizaban.
+
+    La red se puede mantener con los eventos MODIFICACION_SISTEMA del historial de una
+    [LineaDeEventos] (ver [self.observar] y [self.aplicar_evento]).
+    """
+
+    def __init__(
+        self,
+        minutos_por_defecto: float = MINUTOS_POR_DEFECTO,
+        max_origenes: Optional[int] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        minutos_por_defecto: float = MINUTOS_POR_DEFECTO
+            Tiempo de viaje de las vías creadas sin indicarlo.
+        max_origenes: Optional[int] = None
+            Cantidad máxima de orígenes con caminos guardados. Al superarla, se descarta el
+            utilizado hace más tiempo.
+        """
+        self.minutos_por_defecto: float = minutos_por_defecto
+        self.max_origenes: Optional[int] = max_origenes
+
+        # Índice de nodo de cada estación, y estación de cada nodo.
+        self.indices: dict[int, int] = dict()
+        self.estaciones: list[int] = []
+        # Vías por id: (nodo_a, nodo_b, minutos).
+        self.vias: dict[int, tuple[int, int, float]] = dict()
+
+        self.inicios = array("q", [0])
+        self.destinos = array("q")
+        self.tiempos = array("d")
+        self.ids_via = array("q")
+        # Posiciones en los arreglos CSR de cada vía: (de a hacia b, de b hacia a).
+        self.__posiciones: dict[int, tuple[int, int]] = dict()
+        # Vías agregadas desde la última reconstrucción: nodo -> [(vecino, minutos, id_via)].
+        self.__adicionales: dict[int, list[tuple[int, float, int]]] = dict()
+        # Vías quitadas de los arreglos más vías adicionales, desde la última reconstrucción.
+        self.__cambios: int = 0
+
+        self.__arboles: OrderedDict[int, _Arbol] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.estaciones)
+
+    def agregar_estacion(self, id_estacion: int) -> int:
+        """Agrega una estación (sin vías), si no existía.
+
+        Returns
+        -------
+        Entrega el índice de su nodo.
+        """
+        nodo = self.indices.get(id_estacion)
+        if nodo is None:
+            nodo = self.indices[id_estacion] = len(self.estaciones)
+            self.estaciones.append(id_estacion)
+            # El nuevo nodo no tiene vías en los arreglos.
+            self.inicios.append(self.inicios[-1])
+        return nodo
+
+    def agregar_via(
+        self,
+        id_via: int,
+        id_estacion_a: int,
+        id_estacion_b: int,
+        minutos: Optional[float] = None,
+    ) -> None:
+        """Agrega una vía bidireccional entre dos estaciones. Si la vía ya existía, se
+        actualizan sus estaciones y su tiempo de viaje."""
+        if minutos is None:
+            minutos = self.minutos_por_defecto
+        if minutos < 0:
+            raise Exception("[Error] El tiempo de viaje de una vía no puede ser negativo.")
+
+        previa = self.vias.get(id_via)
+        nodo_a = self.agregar_estacion(id_estacion_a)
+        nodo_b = self.agregar_estacion(id_estacion_b)
+        if previa is not None and previa[:2] == (nodo_a, nodo_b):
+            # Sólo cambia el tiempo: si se redujo, basta revisar si mejora algún camino; si
+            # aumentó, sólo cambian los caminos que la utilizaban.
+            if minutos <= previa[2]:
+                self.__invalidar_por_mejora(nodo_a, nodo_b, minutos)
+            else:
+                self.__invalidar_por_uso(id_via, nodo_a, nodo_b)
+            self.vias[id_via] = (nodo_a, nodo_b, minutos)
+            self.__cambiar_tiempo(id_via, nodo_a, nodo_b, minutos)
+            return
+        if previa is not None:
+            self.quitar_via(id_via)
+
+        self.vias[id_via] = (nodo_a, nodo_b, minutos)
+        self.__invalidar_por_mejora(nodo_a, nodo_b, minutos)
+        self.__adicionales.setdefault(nodo_a, []).append((nodo_b, minutos, id_via))
+        self.__adicionales.setdefault(nodo_b, []).append((nodo_a, minutos, id_via))
+        self.__cambios += 1
+
+    def quitar_via(self, id_via: int) -> None:
+        via = self.vias.pop(id_via, None)
+        if via is None:
+            return
+        nodo_a, nodo_b, _ = via
+        self.__invalidar_por_uso(id_via, nodo_a, nodo_b)
+
+        posiciones = self.__posiciones.pop(id_via, None)
+        if posiciones is not None:
+            for k in posiciones:
+                self.tiempos[k] = math.inf
+                self.ids_via[k] = SIN_VIA
+            self.__cambios += 1
+            return
+        for nodo in {nodo_a, nodo_b}:
+            self.__adicionales[nodo] = [v for v in self.__adicionales[nodo] if v[2] != id_via]
+        self.__cambios -= 1
+
+    def __cambiar_tiempo(self, id_via: int, nodo_a: int, nodo_b: int, minutos: float) -> None:
+        posiciones = self.__posiciones.get(id_via)
+        if posiciones is not None:
+            for k in posiciones:
+                self.tiempos[k] = minutos
+            return
+        for nodo in {nodo_a, nodo_b}:
+            self.__adicionales[nodo] = [
+                (vecino, minutos if id_adicional == id_via else tiempo, id_adicional)
+                for vecino, tiempo, id_adicional in self.__adicionales[nodo]
+            ]
+
+    def __invalidar_por_uso(self, id_via: int, nodo_a: int, nodo_b: int) -> None:
+        """Descarta los árboles cuyos caminos utilizan la vía."""
+        for origen in [
+            origen
+            for origen, arbol in self.__arboles.items()
+            if arbol.usa_via(id_via, nodo_a, nodo_b)
+        ]:
+            del self.__arboles[origen]
+
+    def __invalidar_por_mejora(self, nodo_a: int, nodo_b: int, minutos: float) -> None:
+        """Descarta los árboles en que una vía (nueva o más rápida) acorta algún camino."""
+        for origen in [
+            origen
+            for origen, arbol in self.__arboles.items()
+            if arbol.distancia(nodo_a) + minutos < arbol.distancia(nodo_b)
+            or arbol.distancia(nodo_b) + minutos < arbol.distancia(nodo_a)
+        ]:
+            del self.__arboles[origen]
+
+    def __compactar_si_conviene(self) -> None:
+        if self.__cambios > max(_MIN_COMPACTAR, FRACCION_COMPACTAR * len(self.vias)):
+            self.__compilar()
+
+    def __compilar(self) -> None:
+        """Reconstruye los arreglos CSR desde [self.vias] (ordenamiento por conteo), sin vías
+        quitadas ni adicionales."""
+        n = len(self.estaciones)
+        grados = [0] * (n + 1)
+        for nodo_a, nodo_b, _ in self.vias.values():
+            grados[nodo_a + 1] += 1
+            grados[nodo_b + 1] += 1
+        for i in range(n):
+            grados[i + 1] += grados[i]
+
+        m = grados[n]
+        destinos = array("q", bytes(8 * m))
+        tiempos = array("d", bytes(8 * m))
+        ids_via = array("q", bytes(8 * m))
+        siguiente = grados[:n]
+        posiciones = dict()
+        for id_via, (nodo_a, nodo_b, minutos) in self.vias.items():
+            for desde, hasta in ((nodo_a, nodo_b), (nodo_b, nodo_a)):
+                k = siguiente[desde]
+                destinos[k] = hasta
+                tiempos[k] = minutos
+                ids_via[k] = id_via
+                siguiente[desde] = k + 1
+            # Con [siguiente] ya avanzado (si la vía une un nodo consigo mismo, ocupa dos
+            # posiciones seguidas del mismo nodo).
+            if nodo_a == nodo_b:
+                posiciones[id_via] = (siguiente[nodo_a] - 2, siguiente[nodo_a] - 1)
+            else:
+                posiciones[id_via] = (siguiente[nodo_a] - 1, siguiente[nodo_b] - 1)
+
+        self.inicios = array("q", grados)
+        self.destinos, self.tiempos, self.ids_via = destinos, tiempos, ids_via
+        self.__posiciones = posiciones
+        self.__adicionales = dict()
+        self.__cambios = 0
+
+    def vecinos(self, id_estacion: int) -> list[tuple[int, float]]:
+        """Entrega las estaciones conectadas directamente, con el tiempo de viaje de cada vía."""
+        self.__compactar_si_conviene()
+        nodo = self.indices[id_estacion]
+        vecinos = [
+            (self.estaciones[self.destinos[k]], self.tiempos[k])
+            for k in range(self.inicios[nodo], self.inicios[nodo + 1])
+            if self.ids_via[k] != SIN_VIA
+        ]
+        for vecino, minutos, _ in self.__adicionales.get(nodo, ()):
+            vecinos.append((self.estaciones[vecino], minutos))
+        return vecinos
+
+    def __arbol(self, id_origen: int) -> _Arbol:
+        origen = self.indices[id_origen]
+        arbol = self.__arboles.get(origen)
+        if arbol is not None:
+            self.__arboles.move_to_end(origen)
+            return arbol
+
+        self.__compactar_si_conviene()
+        n = len(self.estaciones)
+        distancias = array("d", [math.inf]) * n
+        vias_previas = array("q", [SIN_VIA]) * n
+        inicios, destinos, tiempos, ids_via = (
+            self.inicios,
+            self.destinos,
+            self.tiempos,
+            self.ids_via,
+        )
+        adicionales = self.__adicionales
+        distancias[origen] = 0.0
+        pendientes = [(0.0, origen)]
+        while pendientes:
+            distancia, nodo = heapq.heappop(pendientes)
+            if distancia > distancias[nodo]:
+                continue
+            # Las vías quitadas tienen tiempo infinito, por lo que nunca mejoran un camino.
+            for k in range(inicios[nodo], inicios[nodo + 1]):
+                vecino = destinos[k]
+                nueva = distancia + tiempos[k]
+                if nueva < distancias[vecino]:
+                    distancias[vecino] = nueva
+                    vias_previas[vecino] = ids_via[k]
+                    heapq.heappush(pendientes, (nueva, vecino))
+            if adicionales:
+                for vecino, minutos, id_via in adicionales.get(nodo, ()):
+                    nueva = distancia + minutos
+                    if nueva < distancias[vecino]:
+                        distancias[vecino] = nueva
+                        vias_previas[vecino] = id_via
+                        heapq.heappush(pendientes, (nueva, vecino))
+
+        arbol = self.__arboles[origen] = _Arbol(distancias, vias_previas)
+        if self.max_origenes is not None and len(self.__arboles) > self.max_origenes:
+            self.__arboles.popitem(last=False)
+        return arbol
+
+    def tiempo_viaje(self, id_origen: int, id_destino: int) -> Optional[float]:
+        """Tiempo de viaje mínimo (en minutos) entre dos estaciones.
+
+        Returns
+        -------
+        Entrega None si no hay un camino entre ellas.
+        """
+        distancia = self.__arbol(id_origen).distancia(self.indices[id_destino])
+        return None if distancia == math.inf else distancia
+
+    def ruta(self, id_origen: int, id_destino: int) -> Optional[list[int]]:
+        """Estaciones del camino más rápido entre dos estaciones, incluyendo ambas.
+
+        Returns
+        -------
+        Entrega None si no hay un camino entre ellas.
+        """
+        arbol = self.__arbol(id_origen)
+        nodo = self.indices[id_destino]
+        if arbol.distancia(nodo) == math.inf:
+            return None
+        ruta = [nodo]
+        while arbol.vias_previas[nodo] != SIN_VIA:
+            nodo_a, nodo_b, _ = self.vias[arbol.vias_previas[nodo]]
+            nodo = nodo_a if nodo == nodo_b else nodo_b
+            ruta.append(nodo)
+        return [self.estaciones[nodo] for nodo in reversed(ruta)]
+
+    def aplicar_evento(self, evento: Evento) -> None:
+        """Actualiza la red según un evento MODIFICACION_SISTEMA:
+        - `entidad` "Estacion", con su `id`: agrega la estación.
+        - `entidad` "Via", con su `id`, `estacion_a_id`, `estacion_b_id` y, opcionalmente,
+          `minutos`: agrega o actualiza la vía. Con `eliminar` en True, la quita.
+        Los demás eventos se ignoran."""
+        if evento.tipo is not TipoEvento.MODIFICACION_SISTEMA:
+            return
+        entidad = evento.obtener_dato("entidad")
+        if entidad == "Estacion":
+            self.agregar_estacion(evento.obtener_dato("id"))
+        elif entidad == "Via":
+            if evento.obtener_dato("eliminar"):
+                self.quitar_via(evento.obtener_dato("id"))
+            else:
+                self.agregar_via(
+                    evento.obtener_dato("id"),
+                    evento.obtener_dato("estacion_a_id"),
+                    evento.obtener_dato("estacion_b_id"),
+                    evento.obtener_dato("minutos"),
+                )
+
+    def aplicar_eventos(self, eventos: list[Evento]) -> None:
+        for evento in eventos:
+            self.aplicar_evento(evento)
+
+    def observar(self, linea: Any) -> None:
+        """Mantiene la red actualizada con cada evento MODIFICACION_SISTEMA que ingrese al
+        historial de [linea] (ver [LineaDeEventos.agregar_observador]). Los eventos que ya
+        estaban en el historial se aplican de inmediato."""
+        self.aplicar_eventos(
+            [e for e in linea.historial_eventos if e.tipo is TipoEvento.MODIFICACION_SISTEMA]
+        )
+        linea.agregar_observador(self.aplicar_eventos, historial=True)
@@ -4,4 +4,8 @@ setup(
     name="ppdc-event-manager",
     version="1.0.0",
     packages=find_packages(),
+    extras_require={
+        # Necesario para [DemandaVectorizada].
+        "numpy": ["numpy"],
+    },
 )
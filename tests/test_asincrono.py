@@ -0,0 +1,53 @@
+import asyncio
+import datetime as dt
+
+from ppdc_event_manager import EjecucionAsincrona, LineaDeEventos, PoliticaDesborde, TipoEvento
+
+F = dt.datetime(2025, 1, 1)
+
+
+def _linea(eventos: int) -> LineaDeEventos:
+    linea = LineaDeEventos(None, F)
+    linea.registrar_handler(TipoEvento.TREN_LLEGADA, lambda evento: None)
+    for i in range(eventos):
+        linea.insertar_evento_futuro(
+            linea.crear_evento(TipoEvento.TREN_LLEGADA, F + dt.timedelta(seconds=i))
+        )
+    return linea
+
+
+def test_detener_con_suscripcion_llena():
+    async def principal():
+        ejecucion = EjecucionAsincrona(_linea(100))
+        suscripcion = ejecucion.suscribir(capacidad=2, politica=PoliticaDesborde.BLOQUEAR)
+        tarea = asyncio.ensure_future(ejecucion.ejecutar())
+        # Nadie consume la suscripción: la ejecución queda esperando espacio en la cola.
+        while len(suscripcion) < suscripcion.capacidad:
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)
+        assert not tarea.done()
+
+        ejecucion.detener()
+        estadisticas = await asyncio.wait_for(tarea, timeout=1)
+        lotes = [lote async for lote in suscripcion]
+        assert len(lotes) == 2
+        assert estadisticas.eventos < 100
+
+    asyncio.run(principal())
+
+
+def test_bloquear_entrega_todos_los_lotes():
+    async def principal():
+        ejecucion = EjecucionAsincrona(_linea(50))
+        suscripcion = ejecucion.suscribir(capacidad=1)
+        recibidos = []
+
+        async def consumir():
+            async for lote in suscripcion:
+                await asyncio.sleep(0)
+                recibidos.extend(lote)
+
+        estadisticas, _ = await asyncio.gather(ejecucion.ejecutar(), consumir())
+        assert estadisticas.eventos == len(recibidos) == 50
+
+    asyncio.run(principal())
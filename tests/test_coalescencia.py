@@ -0,0 +1,127 @@
+import datetime as dt
+import random
+
+import pytest
+
+from ppdc_event_manager import LineaDeEventos, MomentoCoalescencia, MotorCola, TipoEvento
+
+F = dt.datetime(2025, 1, 1)
+
+
+def _minuto(minutos: int) -> dt.datetime:
+    return F + dt.timedelta(minutes=minutos)
+
+
+def _ejecutar(motor: MotorCola, momento: MomentoCoalescencia, en_bloque: bool) -> tuple:
+    """Inserta llegadas y ventanas de demanda al azar (en bloque o de a una), cuyos handlers
+    agendan más eventos, y entrega lo ejecutado y el historial."""
+    linea = LineaDeEventos(None, F, motor=motor)
+    rng = random.Random(7)
+    ejecutados: list = []
+
+    def llegada(evento):
+        ejecutados.append(("L", evento.datos["id_tren"], evento.ocurrencia))
+        if rng.random() < 0.5:
+            linea.insertar_evento_futuro(
+                _llegada(evento.datos["id_tren"], evento.ocurrencia + dt.timedelta(minutes=3))
+            )
+
+    def demanda(evento):
+        ejecutados.append(
+            ("D", evento.datos["id_estacion"], evento.datos["fecha_previa"], evento.ocurrencia)
+        )
+
+    def _llegada(tren, ocurrencia):
+        evento = linea.crear_evento(TipoEvento.TREN_LLEGADA, ocurrencia, prioridad=tren % 2)
+        evento.datos["id_tren"] = tren
+        return evento
+
+    def _demanda(estacion, desde, hasta):
+        evento = linea.crear_evento(TipoEvento.GENERACION_DEMANDA, _minuto(hasta))
+        evento.datos.update(
+            id_estacion=estacion, fecha_previa=_minuto(desde), fecha_actual=_minuto(hasta)
+        )
+        return evento
+
+    linea.registrar_handler(TipoEvento.TREN_LLEGADA, llegada)
+    linea.registrar_handler(TipoEvento.GENERACION_DEMANDA, demanda)
+    linea.registrar_coalescencia(TipoEvento.TREN_LLEGADA, momento=momento)
+    linea.registrar_coalescencia(TipoEvento.GENERACION_DEMANDA, momento=momento)
+
+    for ronda in range(20):
+        nuevos = []
+        for _ in range(15):
+            if rng.random() < 0.6:
+                nuevos.append(_llegada(rng.randrange(5), _minuto(ronda * 10 + rng.randrange(15))))
+            else:
+                desde = ronda * 10 + rng.randrange(3) * 5
+                nuevos.append(_demanda(rng.randrange(3), desde, desde + 5))
+        if en_bloque:
+            linea.insertar_eventos_futuros(nuevos)
+        else:
+            for evento in nuevos:
+                linea.insertar_evento_futuro(evento)
+        linea.avanzar_hasta(_minuto(ronda * 10 + 5))
+    linea.ejecutar()
+
+    historial = [(e.id, e.tipo, e.ocurrencia, e.prioridad) for e in linea.historial_eventos]
+    return ejecutados, historial, linea.eventos_coalescidos
+
+
+@pytest.mark.parametrize("momento", list(MomentoCoalescencia))
+@pytest.mark.parametrize("en_bloque", [False, True])
+def test_coalescencia_igual_en_todos_los_motores(momento, en_bloque):
+    referencia = _ejecutar(MotorCola.LISTA, momento, en_bloque)
+    assert referencia[2] > 0
+    for motor in MotorCola:
+        assert _ejecutar(motor, momento, en_bloque) == referencia
+
+
+@pytest.mark.parametrize("motor", list(MotorCola))
+def test_coalescencia_en_bloque_igual_que_de_a_uno(motor):
+    momento = MomentoCoalescencia.INSERCION
+    assert _ejecutar(motor, momento, True) == _ejecutar(motor, momento, False)
+
+
+def test_coalescencia_al_insertar():
+    linea = LineaDeEventos(None, F)
+    ejecutados = []
+    linea.registrar_handler(
+        TipoEvento.TREN_LLEGADA,
+        lambda e: ejecutados.append(("L", e.datos["id_tren"], e.ocurrencia)),
+    )
+    linea.registrar_handler(
+        TipoEvento.GENERACION_DEMANDA,
+        lambda e: ejecutados.append(("D", e.datos["id_estacion"], e.datos["fecha_previa"])),
+    )
+    linea.registrar_coalescencia(TipoEvento.TREN_LLEGADA)
+    linea.registrar_coalescencia(TipoEvento.GENERACION_DEMANDA)
+
+    def llegada(tren, minutos):
+        evento = linea.crear_evento(TipoEvento.TREN_LLEGADA, _minuto(minutos))
+        evento.datos["id_tren"] = tren
+        return evento
+
+    def demanda(estacion, desde, hasta):
+        evento = linea.crear_evento(TipoEvento.GENERACION_DEMANDA, _minuto(hasta))
+        evento.datos.update(
+            id_estacion=estacion, fecha_previa=_minuto(desde), fecha_actual=_minuto(hasta)
+        )
+        return evento
+
+    for minutos in (50, 30, 70):
+        linea.insertar_evento_futuro(llegada(1, minutos))
+    linea.insertar_evento_futuro(llegada(2, 40))
+    linea.insertar_eventos_futuros(
+        [demanda(0, 0, 10), demanda(0, 10, 20), demanda(1, 0, 10), llegada(2, 45)]
+    )
+    assert len(linea.eventos) == 4
+    assert linea.eventos_coalescidos == 4
+
+    linea.ejecutar()
+    assert ejecutados == [
+        ("D", 1, _minuto(0)),
+        ("D", 0, _minuto(0)),
+        ("L", 2, _minuto(45)),
+        ("L", 1, _minuto(70)),
+    ]
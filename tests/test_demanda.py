@@ -0,0 +1,47 @@
+import datetime as dt
+
+import pytest
+
+from ppdc_event_manager import Evento, TipoEvento
+
+np = pytest.importorskip("numpy")
+
+from ppdc_event_manager.demanda import DemandaVectorizada  # noqa: E402
+
+F = dt.datetime(2025, 1, 1)
+
+
+def _demanda() -> DemandaVectorizada:
+    return DemandaVectorizada(
+        ids_estacion=[30, 10, 20],
+        poblaciones=[1000, 2000, 3000],
+        horas_inicio=[dt.time(6), dt.time(20), dt.time(0)],
+        horas_final=[dt.time(22), dt.time(2), dt.time(12)],
+        semilla=1,
+    )
+
+
+def test_minutos_activos_de_algunas_estaciones():
+    demanda = _demanda()
+    desde, hasta = F + dt.timedelta(hours=5), F + dt.timedelta(days=1, hours=1, minutes=30)
+    todos = demanda.minutos_activos(desde, hasta)
+    for indices in ([0], [2, 1], [1, 0, 2]):
+        assert np.array_equal(demanda.minutos_activos(desde, hasta, indices), todos[indices])
+
+
+def test_evento_de_una_estacion():
+    demanda = _demanda()
+    evento = Evento(TipoEvento.GENERACION_DEMANDA, F + dt.timedelta(hours=1))
+    evento.datos.update(
+        id_estacion=10, fecha_previa=F, fecha_actual=F + dt.timedelta(hours=1)
+    )
+    demanda.procesar(evento)
+    assert evento.datos["clientes"].shape == (1,)
+
+    # Una estación que no existe no se confunde con otra.
+    for id_estacion in (15, 40, 0):
+        evento.datos["id_estacion"] = id_estacion
+        with pytest.raises(KeyError):
+            demanda.procesar(evento)
+    with pytest.raises(KeyError):
+        demanda.generar([10, 25], np.ones(2))
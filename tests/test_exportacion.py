@@ -0,0 +1,111 @@
+import csv
+import datetime as dt
+import json
+
+from ppdc_event_manager import FormatoExportacion, LineaDeEventos, PoliticaRetencion, TipoEvento
+from ppdc_event_manager.exportacion import leer_columnar
+
+F = dt.datetime(2025, 1, 1)
+
+
+def _linea(retencion=None) -> LineaDeEventos:
+    linea = LineaDeEventos(None, F, retencion=retencion)
+
+    def llegada(evento):
+        siguiente = linea.crear_evento(
+            TipoEvento.TREN_LLEGADA, evento.ocurrencia + dt.timedelta(minutes=1)
+        )
+        siguiente.datos.update(id_tren=evento.datos["id_tren"], nombre_tren='T,"x')
+        linea.insertar_evento_futuro(siguiente)
+        if evento.id % 7 == 0:
+            # Eventos que llegan atrasados: quedan en medio de lo ya exportado.
+            modificacion = linea.crear_evento(
+                TipoEvento.MODIFICACION_SISTEMA,
+                evento.ocurrencia - dt.timedelta(minutes=3),
+                ha_ocurrido=True,
+            )
+            modificacion.datos.update(entidad="Estacion", poblacion=evento.id)
+            linea.insertar_evento_pasado(modificacion)
+
+    linea.registrar_handler(TipoEvento.TREN_LLEGADA, llegada)
+    for t in range(3):
+        evento = linea.crear_evento(TipoEvento.TREN_LLEGADA, F)
+        evento.datos.update(id_tren=t)
+        linea.insertar_evento_futuro(evento)
+    return linea
+
+
+def _ids_exportados(ruta, formato: FormatoExportacion) -> list[int]:
+    if formato == FormatoExportacion.CSV:
+        with open(ruta, newline="") as archivo:
+            return [int(fila["id"]) for fila in csv.DictReader(archivo)]
+    if formato == FormatoExportacion.JSONL:
+        with open(ruta) as archivo:
+            return [json.loads(linea)["id"] for linea in archivo]
+    return [i for grupo in leer_columnar(ruta) for i in grupo["id"]]
+
+
+def test_exportacion_completa(tmp_path):
+    linea = _linea()
+    linea.ejecutar(max_eventos=200)
+    esperados = [e.id for e in linea.historial_eventos]
+    for formato in FormatoExportacion:
+        ruta = tmp_path / f"historial.{formato.value}"
+        assert linea.exportar_historial(ruta, formato, tamano_bloque=7) == len(esperados)
+        assert _ids_exportados(ruta, formato) == esperados
+
+    ocurrencias = [e.ocurrencia for e in linea.historial_eventos]
+    with open(tmp_path / "historial.csv", newline="") as archivo:
+        filas = list(csv.DictReader(archivo))
+    assert [fila["ocurrencia"] for fila in filas] == [o.isoformat() for o in ocurrencias]
+    assert filas[-1]["nombre_tren"] == 'T,"x'
+    grupos = list(leer_columnar(tmp_path / "historial.columnar"))
+    assert [o for grupo in grupos for o in grupo["ocurrencia"]] == ocurrencias
+
+
+def test_exportacion_incremental_con_retencion(tmp_path):
+    with PoliticaRetencion(max_eventos=40, directorio=tmp_path, tamano_segmento=10) as politica:
+        linea = _linea(politica)
+        for _ in range(5):
+            linea.ejecutar(max_eventos=60)
+            for formato in FormatoExportacion:
+                ruta = tmp_path / f"historial.{formato.value}"
+                linea.exportar_historial(ruta, formato, incremental=True, tamano_bloque=7)
+
+        # Los eventos atrasados se exportan después, pero ninguno falta ni se repite.
+        esperados = sorted(e.id for e in linea.historial_eventos)
+        for formato in FormatoExportacion:
+            exportados = _ids_exportados(tmp_path / f"historial.{formato.value}", formato)
+            assert sorted(exportados) == esperados
+
+
+def test_valores_de_otro_tipo_van_en_otros_datos(tmp_path):
+    linea = LineaDeEventos(None, F)
+    valores = [
+        ("id_tren", "x"),
+        ("id_tren", 2**70),
+        ("fecha_previa", "ayer"),
+        ("minutos", 5),
+        ("id_tren", 3),
+    ]
+    for i, (clave, valor) in enumerate(valores):
+        evento = linea.crear_evento(
+            TipoEvento.MODIFICACION_SISTEMA, F + dt.timedelta(seconds=i), ha_ocurrido=True
+        )
+        evento.datos[clave] = valor
+        linea.insertar_evento_pasado(evento)
+
+    for formato in FormatoExportacion:
+        ruta = tmp_path / f"historial.{formato.value}"
+        assert linea.exportar_historial(ruta, formato) == len(valores)
+
+    grupo = next(leer_columnar(tmp_path / "historial.columnar"))
+    assert grupo["id_tren"] == [None, None, None, None, 3]
+    otros = [json.loads(texto) if texto else None for texto in grupo["otros_datos"]]
+    assert otros == [
+        {"id_tren": "x"},
+        {"id_tren": 2**70},
+        {"fecha_previa": "ayer"},
+        {"minutos": 5},
+        None,
+    ]
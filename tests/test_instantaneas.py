@@ -0,0 +1,89 @@
+import copy
+import datetime as dt
+import random
+
+import pytest
+
+from ppdc_event_manager import LineaDeEventos, TipoEvento
+
+F = dt.datetime(2025, 1, 1)
+
+
+def _aplicar_llegada(estado: dict, evento) -> None:
+    estado["posiciones"][evento.datos["id_tren"]] = evento.datos["id_estacion_destino"]
+    estado["llegadas"] += 1
+
+
+def _aplicar_modificacion(estado: dict, evento) -> None:
+    estado["poblacion"][evento.datos["id_estacion"]] = evento.datos["poblacion"]
+
+
+APLICADORES = {
+    TipoEvento.TREN_LLEGADA: _aplicar_llegada,
+    TipoEvento.MODIFICACION_SISTEMA: _aplicar_modificacion,
+}
+
+
+def _estado_inicial() -> dict:
+    return {"posiciones": {}, "poblacion": {}, "llegadas": 0}
+
+
+def _repetir(linea: LineaDeEventos, fecha: dt.datetime) -> dict:
+    """Estado en [fecha], aplicando todo el historial desde el inicio."""
+    estado = _estado_inicial()
+    for evento in linea.historial_eventos:
+        if evento.ocurrencia > fecha:
+            break
+        APLICADORES[evento.tipo](estado, evento)
+    return estado
+
+
+@pytest.mark.parametrize(
+    "cada", [{"cada_eventos": 7}, {"cada_tiempo": dt.timedelta(minutes=45)}]
+)
+def test_rebobinar_igual_que_repetir_el_historial(cada):
+    linea = LineaDeEventos(_estado_inicial(), F)
+    rng = random.Random(3)
+
+    def llegada(evento):
+        _aplicar_llegada(linea.estado_simulacion, evento)
+        ocurrencia = evento.ocurrencia + dt.timedelta(minutes=rng.randint(1, 30))
+        siguiente = linea.crear_evento(TipoEvento.TREN_LLEGADA, ocurrencia)
+        siguiente.datos.update(
+            id_tren=evento.datos["id_tren"], id_estacion_destino=rng.randrange(5)
+        )
+        linea.insertar_evento_futuro(siguiente)
+
+    linea.registrar_handler(TipoEvento.TREN_LLEGADA, llegada)
+    linea.activar_instantaneas(APLICADORES, **cada)
+    for tren in range(6):
+        evento = linea.crear_evento(TipoEvento.TREN_LLEGADA, F + dt.timedelta(minutes=tren))
+        evento.datos.update(id_tren=tren, id_estacion_destino=tren % 5)
+        linea.insertar_evento_futuro(evento)
+
+    fechas = [F]
+    for paso in range(1, 40):
+        fecha = F + dt.timedelta(minutes=10 * paso)
+        linea.avanzar_hasta(fecha)
+        fechas.append(fecha)
+        if paso % 6 == 0:
+            # Un cambio que llega atrasado invalida las instantáneas posteriores a él.
+            modificacion = linea.crear_evento(
+                TipoEvento.MODIFICACION_SISTEMA,
+                fecha - dt.timedelta(minutes=25),
+                ha_ocurrido=True,
+            )
+            modificacion.datos.update(id_estacion=paso % 5, poblacion=paso)
+            _aplicar_modificacion(linea.estado_simulacion, modificacion)
+            linea.insertar_evento_pasado(modificacion)
+
+    assert len(linea.instantaneas.instantaneas) > 5
+    estado_en_curso = copy.deepcopy(linea.estado_simulacion)
+    for fecha in fechas + [fecha + dt.timedelta(minutes=3) for fecha in fechas]:
+        assert linea.rebobinar(fecha) == _repetir(linea, fecha)
+    assert linea.rebobinar(linea.fecha_actual) == linea.estado_simulacion
+    # Rebobinar no modifica el estado en curso.
+    assert linea.estado_simulacion == estado_en_curso
+
+    with pytest.raises(Exception, match=r"\[Error\]"):
+        linea.rebobinar(F - dt.timedelta(minutes=1))
@@ -0,0 +1,99 @@
+import datetime as dt
+import random
+
+import pytest
+
+from ppdc_event_manager import Evento, LineaDeEventos, SimulacionParticionada, TipoEvento
+
+F = dt.datetime(2025, 1, 1)
+N = 24
+
+
+def _tiempo(a: int, b: int) -> dt.timedelta:
+    return dt.timedelta(minutes=10 + ((a * 31 + b * 17) % 3) * 10)
+
+
+# Red en anillo.
+ARISTAS = [(i, (i + 1) % N, _tiempo(i, (i + 1) % N)) for i in range(N)]
+VECINOS: dict[int, list[tuple[int, dt.timedelta]]] = {}
+for _a, _b, _t in ARISTAS:
+    VECINOS.setdefault(_a, []).append((_b, _t))
+    VECINOS.setdefault(_b, []).append((_a, _t))
+
+
+def fabrica(region: int, estaciones: frozenset[int]) -> LineaDeEventos:
+    """Trenes que recorren la red al azar (con semillas fijas por tren y paso). Algunas
+    llegadas agendan una demanda en la misma fecha, que a su vez puede agendar otra; así hay
+    empates de fecha y prioridad entre eventos de distintas regiones."""
+    linea = LineaDeEventos(None, F)
+
+    def llegada(evento):
+        tren, estacion, paso = (
+            evento.datos["id_tren"],
+            evento.datos["id_estacion_destino"],
+            evento.datos["paso"],
+        )
+        destino, tiempo = random.Random(tren * 100003 + paso).choice(VECINOS[estacion])
+        if paso % 3 == 0:
+            demanda = linea.crear_evento(TipoEvento.GENERACION_DEMANDA, evento.ocurrencia)
+            demanda.datos.update(id_tren=tren, id_estacion_destino=estacion, paso=paso)
+            linea.insertar_evento_futuro(demanda)
+        siguiente = linea.crear_evento(
+            TipoEvento.TREN_LLEGADA, evento.ocurrencia + tiempo, prioridad=1 + tren % 2
+        )
+        siguiente.datos.update(
+            id_tren=tren, id_estacion_origen=estacion, id_estacion_destino=destino, paso=paso + 1
+        )
+        linea.insertar_evento_futuro(siguiente)
+
+    def demanda(evento):
+        if evento.datos["paso"] % 2 == 0:
+            otra = linea.crear_evento(
+                TipoEvento.GENERACION_DEMANDA, evento.ocurrencia + dt.timedelta(minutes=10)
+            )
+            otra.datos.update(
+                id_tren=evento.datos["id_tren"],
+                id_estacion_destino=evento.datos["id_estacion_destino"],
+                paso=-1,
+            )
+            linea.insertar_evento_futuro(otra)
+
+    linea.registrar_handler(TipoEvento.TREN_LLEGADA, llegada)
+    linea.registrar_handler(TipoEvento.GENERACION_DEMANDA, demanda)
+    for tren in range(120):
+        estacion = tren % N
+        if estacion in estaciones:
+            destino, tiempo = VECINOS[estacion][tren % len(VECINOS[estacion])]
+            evento = Evento(TipoEvento.TREN_LLEGADA, F + tiempo, prioridad=1 + tren % 2, id=tren)
+            evento.datos.update(
+                id_tren=tren, id_estacion_origen=estacion, id_estacion_destino=destino, paso=0
+            )
+            linea.insertar_evento_futuro(evento)
+    return linea
+
+
+def _clave(evento: Evento) -> tuple:
+    datos = evento.datos
+    return (
+        evento.ocurrencia,
+        evento.prioridad,
+        evento.tipo,
+        datos["id_tren"],
+        datos["id_estacion_destino"],
+        datos["paso"],
+    )
+
+
+@pytest.mark.parametrize("en_procesos", [False, True])
+def test_particionado_igual_que_secuencial(en_procesos):
+    hasta = F + dt.timedelta(hours=12)
+    secuencial = fabrica(0, frozenset(range(N)))
+    secuencial.ejecutar(hasta=hasta)
+    esperado = [_clave(e) for e in secuencial.historial_eventos]
+
+    simulacion = SimulacionParticionada(fabrica, ARISTAS, 4, en_procesos=en_procesos)
+    historial = simulacion.ejecutar(hasta)
+    assert simulacion.mensajes > 0
+    assert [_clave(e) for e in historial] == esperado
+    ids = [e.id for e in historial]
+    assert len(set(ids)) == len(ids)
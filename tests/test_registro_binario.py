@@ -0,0 +1,126 @@
+import datetime as dt
+
+import pytest
+
+from ppdc_event_manager import (
+    Evento,
+    LectorRegistro,
+    LineaDeEventos,
+    MotorCola,
+    RegistroBinario,
+    TipoEvento,
+)
+
+F = dt.datetime(2025, 1, 1)
+
+
+def _clave(evento: Evento) -> tuple:
+    return (evento.id, evento.tipo, evento.ocurrencia, evento.prioridad, evento._datos)
+
+
+class _Simulacion:
+    """Trenes que se reagendan y una demanda recurrente. Anota lo que ejecutan sus handlers, y
+    los nuevos eventos van a [self.linea] (que se reemplaza al cargar un punto de control)."""
+
+    def __init__(self, motor: MotorCola) -> None:
+        self.ejecutados: list = []
+        self.linea = LineaDeEventos(None, F, motor=motor)
+        for tipo, handler in self.handlers().items():
+            self.linea.registrar_handler(tipo, handler)
+        for i in range(100):
+            evento = self.linea.crear_evento(
+                TipoEvento.TREN_LLEGADA, F + dt.timedelta(minutes=i % 37), prioridad=i % 3
+            )
+            evento.datos.update(id_tren=i, nombre_tren=f"T{i}")
+            self.linea.insertar_evento_futuro(evento)
+        self.linea.agendar_recurrente(
+            TipoEvento.GENERACION_DEMANDA, F, dt.timedelta(minutes=5), datos={"id_estacion": 1}
+        )
+
+    def handlers(self) -> dict:
+        return {
+            TipoEvento.TREN_LLEGADA: self.llegada,
+            TipoEvento.GENERACION_DEMANDA: self.demanda,
+        }
+
+    def llegada(self, evento: Evento) -> None:
+        self.ejecutados.append(evento.id)
+        if evento.datos["id_tren"] % 4 == 0:
+            siguiente = self.linea.crear_evento(
+                TipoEvento.TREN_LLEGADA, evento.ocurrencia + dt.timedelta(minutes=17)
+            )
+            siguiente.datos.update(id_tren=evento.datos["id_tren"] + 1, minutos=[1.5, 2.0])
+            self.linea.insertar_evento_futuro(siguiente)
+
+    def demanda(self, evento: Evento) -> None:
+        self.ejecutados.append(("demanda", evento.ocurrencia))
+
+
+def test_registro_binario(tmp_path):
+    ruta = tmp_path / "registro.bin"
+    linea = _Simulacion(MotorCola.HEAP).linea
+    registro = linea.activar_registro(ruta)
+    linea.avanzar_hasta(F + dt.timedelta(minutes=40))
+    registro.flush()
+
+    lector = LectorRegistro(ruta)
+    try:
+        esperados = sorted(map(_clave, linea.historial_eventos), key=lambda c: c[0])
+        assert sorted(map(_clave, lector), key=lambda c: c[0]) == esperados
+        assert len(lector) == len(esperados)
+        assert [_clave(lector[i]) for i in range(len(lector))] == list(map(_clave, lector))
+        assert _clave(lector[-1]) == _clave(list(lector)[-1])
+        with pytest.raises(IndexError):
+            lector[len(lector)]
+    finally:
+        lector.cerrar()
+        registro.cerrar()
+
+
+def test_registro_binario_agrega_al_final(tmp_path):
+    ruta = tmp_path / "registro.bin"
+    eventos = [Evento(TipoEvento.TREN_LLEGADA, F, id=i) for i in range(5)]
+    with RegistroBinario(ruta) as registro:
+        registro.escribir_varios(eventos[:3])
+    with RegistroBinario(ruta) as registro:
+        registro.escribir_varios(eventos[3:])
+    lector = LectorRegistro(ruta)
+    assert [e.id for e in lector] == list(range(5))
+    lector.cerrar()
+
+
+@pytest.mark.parametrize("motor", list(MotorCola))
+def test_punto_de_control(tmp_path, motor):
+    ruta = tmp_path / "punto_control.bin"
+    hasta = F + dt.timedelta(hours=2)
+
+    # Referencia: la misma simulación, sin interrumpir.
+    referencia = _Simulacion(motor)
+    referencia.linea.avanzar_hasta(hasta)
+
+    simulacion = _Simulacion(motor)
+    linea = simulacion.linea
+    linea.avanzar_hasta(F + dt.timedelta(minutes=20))
+    linea.guardar(ruta)
+
+    cargada = LineaDeEventos.cargar(ruta, None, handlers=simulacion.handlers())
+    simulacion.linea = cargada
+    assert list(map(_clave, cargada.historial_eventos)) == list(
+        map(_clave, linea.historial_eventos)
+    )
+    assert cargada.fecha_actual == linea.fecha_actual
+    assert cargada.next_id_evento == linea.next_id_evento
+    assert sorted(map(_clave, cargada.eventos)) == sorted(map(_clave, linea.eventos))
+
+    cargada.avanzar_hasta(hasta)
+    assert simulacion.ejecutados == referencia.ejecutados
+    assert list(map(_clave, cargada.historial_eventos)) == list(
+        map(_clave, referencia.linea.historial_eventos)
+    )
+
+    # Se puede guardar sobre el mismo archivo desde el que se cargó.
+    cargada.guardar(ruta)
+    otra = LineaDeEventos.cargar(ruta, None)
+    assert list(map(_clave, otra.historial_eventos)) == list(
+        map(_clave, cargada.historial_eventos)
+    )
@@ -0,0 +1,23 @@
+import pytest
+
+from ppdc_event_manager.replicaciones import cuantil_t
+
+# Valores de tablas de la distribución t de Student.
+CUANTILES = [
+    (0.975, 1, 12.7062),
+    (0.975, 2, 4.3027),
+    (0.975, 3, 3.1824),
+    (0.995, 3, 5.8409),
+    (0.95, 4, 2.1318),
+    (0.995, 5, 4.0321),
+    (0.975, 10, 2.2281),
+    (0.975, 30, 2.0423),
+    (0.975, 120, 1.9799),
+    (0.995, 5000, 2.5768),
+]
+
+
+@pytest.mark.parametrize("probabilidad, grados_libertad, esperado", CUANTILES)
+def test_cuantil_t(probabilidad, grados_libertad, esperado):
+    assert cuantil_t(probabilidad, grados_libertad) == pytest.approx(esperado, abs=5e-5)
+    assert cuantil_t(1 - probabilidad, grados_libertad) == pytest.approx(-esperado, abs=5e-5)
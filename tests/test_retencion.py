@@ -0,0 +1,64 @@
+import datetime as dt
+import random
+
+import pytest
+
+from ppdc_event_manager import Evento, HistorialEventos, PoliticaRetencion, TipoEvento
+
+F = dt.datetime(2025, 1, 1)
+
+
+def _evento(minutos: int, prioridad: int = 0) -> Evento:
+    return Evento(
+        TipoEvento.TREN_LLEGADA,
+        F + dt.timedelta(minutes=minutos),
+        prioridad=prioridad,
+        ha_ocurrido=True,
+    )
+
+
+def _ids(historial) -> list[int]:
+    return [e.id for e in historial]
+
+
+def test_retencion_igual_que_sin_retencion(tmp_path):
+    rng = random.Random(1)
+    with PoliticaRetencion(max_eventos=50, directorio=tmp_path, tamano_segmento=20) as politica:
+        historial = HistorialEventos(politica=politica)
+        referencia = HistorialEventos()
+        for i in range(1000):
+            # Algunos eventos llegan atrasados, pero después de lo ya escrito a disco.
+            e = _evento(i + rng.choice([0, 0, 0, -30, -40]), rng.randint(0, 2))
+            historial.insertar(e)
+            referencia.insertar(e)
+            if i == 500:
+                rama, rama_referencia = historial.crear_rama(), referencia.crear_rama()
+            assert len(historial._propios) <= 50 + 20
+
+        assert len(politica.segmentos) > 0
+        assert _ids(historial) == _ids(referencia)
+        assert [historial[i].id for i in range(len(historial))] == _ids(referencia)
+        assert _ids(historial.iterar_desde(123)) == _ids(referencia)[123:]
+        assert _ids(rama) == _ids(rama_referencia)
+        fecha = F + dt.timedelta(minutes=300)
+        assert historial.indice_hasta(fecha) == referencia.indice_hasta(fecha)
+
+
+def test_insercion_anterior_al_disco_no_recarga_segmentos(tmp_path):
+    with PoliticaRetencion(max_eventos=50, directorio=tmp_path, tamano_segmento=20) as politica:
+        historial = HistorialEventos(politica=politica)
+        for i in range(200):
+            historial.insertar(_evento(i))
+        antes = _ids(historial)
+
+        with pytest.raises(Exception, match=r"\[Error\]"):
+            historial.insertar(_evento(5))
+        with pytest.raises(Exception, match=r"\[Error\]"):
+            historial.insertar_varios([_evento(5), _evento(199)])
+        assert _ids(historial) == antes
+        assert len(historial._propios) <= 50 + 20
+
+        # Después de lo escrito a disco, se inserta en orden.
+        e = _evento(180)
+        historial.insertar(e)
+        assert historial[180].id == e.id
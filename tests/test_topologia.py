@@ -0,0 +1,64 @@
+import math
+import random
+
+import pytest
+
+from ppdc_event_manager import topologia
+from ppdc_event_manager.topologia import Topologia
+
+
+def _floyd(n: int, vias: dict) -> list[list[float]]:
+    distancias = [[0.0 if i == j else math.inf for j in range(n)] for i in range(n)]
+    for a, b, minutos in vias.values():
+        distancias[a][b] = distancias[b][a] = min(distancias[a][b], minutos)
+    for k in range(n):
+        for i in range(n):
+            for j in range(n):
+                distancias[i][j] = min(distancias[i][j], distancias[i][k] + distancias[k][j])
+    return distancias
+
+
+@pytest.mark.parametrize("min_compactar", [2, 64])
+@pytest.mark.parametrize("max_origenes", [None, 3])
+def test_cambios_incrementales_igual_que_floyd(monkeypatch, min_compactar, max_origenes):
+    # Con un mínimo bajo, los arreglos se reconstruyen seguido entre los cambios.
+    monkeypatch.setattr(topologia, "_MIN_COMPACTAR", min_compactar)
+    rng = random.Random(3)
+    red = Topologia(max_origenes=max_origenes)
+    vias: dict[int, tuple[int, int, int]] = dict()
+    n = 0
+    for paso in range(300):
+        operacion = rng.random()
+        if operacion < 0.1 or n < 2:
+            red.agregar_estacion(n)
+            n += 1
+        elif operacion < 0.45:
+            via = (rng.randrange(n), rng.randrange(n), rng.randint(1, 50))
+            red.agregar_via(paso, *via)
+            vias[paso] = via
+        elif operacion < 0.55 and vias:
+            id_via = rng.choice(list(vias))
+            red.quitar_via(id_via)
+            del vias[id_via]
+        elif operacion < 0.7 and vias:
+            id_via = rng.choice(list(vias))
+            a, b, _ = vias[id_via]
+            vias[id_via] = (a, b, rng.randint(1, 50))
+            red.agregar_via(id_via, *vias[id_via])
+        else:
+            distancias = _floyd(n, vias)
+            for _ in range(5):
+                i, j = rng.randrange(n), rng.randrange(n)
+                tiempo = red.tiempo_viaje(i, j)
+                assert (math.inf if tiempo is None else tiempo) == distancias[i][j]
+                ruta = red.ruta(i, j)
+                if tiempo is not None:
+                    assert ruta[0] == i and ruta[-1] == j
+                    assert len(ruta) - 1 <= len(vias)
+                esperados = sorted(
+                    (b if a == i else a, minutos)
+                    for a, b, minutos in vias.values()
+                    for _ in range(2 if a == b == i else 1)
+                    if i in (a, b)
+                )
+                assert sorted(red.vecinos(i)) == esperados